@@ -0,0 +1,90 @@
+"""
+The tools' data path replayed offline from AkShare fixtures.
+
+Runs every data tool (fund flow, chip distribution, institutional holdings,
+Stock Connect holdings, financial indicators, technical indicators) for each
+ticker with upstream.AKSHARE_MODE = "replay", and prints per-tool latency and the
+share spent waiting on the (injected) upstream latency. Each tool runs twice
+and the two results must be identical.
+
+By default synthetic fixtures (benchmarks/synthetic.py) are written to a
+temporary directory; pass --fixtures to replay a recording made with
+EQUI_AKSHARE_MODE=record instead.
+
+    python -m benchmarks.akshare_replay --latency 0.2 --bars 2000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.mock_llm import COMPANY_NAMES
+from benchmarks.synthetic import record_fixtures, tool_calls
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.fund_agent.tools import (
+    fetch_stock_individual_fund_flow, fetch_stock_chip_distribution,
+    fetch_stock_institute_hold_detail, fetch_stock_hsgt_individual_detail,
+)
+from stock_analysis_agent.sub_agents.fundamental_agent.tools import fetch_stock_financial_indicators
+from stock_analysis_agent.sub_agents.technical_agent.tools import calculate_technical_indicators
+
+
+def tool_runs(symbol: str) -> list[tuple[str, callable, dict]]:
+    calls = tool_calls(symbol)
+    hsgt = calls["stock_hsgt_individual_detail_em"]
+    return [
+        ("fetch_stock_individual_fund_flow", fetch_stock_individual_fund_flow,
+         calls["stock_individual_fund_flow"]),
+        ("fetch_stock_chip_distribution", fetch_stock_chip_distribution, calls["stock_cyq_em"]),
+        ("fetch_stock_institute_hold_detail", fetch_stock_institute_hold_detail,
+         calls["stock_institute_hold_detail"]),
+        ("fetch_stock_hsgt_individual_detail", fetch_stock_hsgt_individual_detail, hsgt),
+        ("fetch_stock_financial_indicators", fetch_stock_financial_indicators,
+         calls["stock_financial_analysis_indicator"]),
+        ("calculate_technical_indicators", calculate_technical_indicators, dict(provided_ticker=symbol)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixtures", help="replay this fixture directory instead of synthetic data")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds injected per akshare call")
+    parser.add_argument("--bars", type=int, default=2000, help="daily bars in the synthetic price history")
+    parser.add_argument("--tickers", nargs="+", default=list(COMPANY_NAMES))
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = args.fixtures or tmp
+        if not args.fixtures:
+            paths = record_fixtures({t: COMPANY_NAMES.get(t, t) for t in args.tickers}, tmp, args.bars)
+            print(f"wrote {len(paths)} synthetic fixtures to {tmp}")
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixture_dir
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": args.latency}
+
+        timings: dict[str, list[float]] = {}
+        for symbol in args.tickers:
+            for name, tool, kwargs in tool_runs(symbol):
+                results = []
+                for _ in range(2):
+                    start = time.perf_counter()
+                    results.append(tool(**kwargs))
+                    timings.setdefault(name, []).append(time.perf_counter() - start)
+                if isinstance(results[0], dict) and ("status" in results[0] or "error" in results[0]):
+                    raise SystemExit(f"{name}({symbol}) failed: {results[0]}")
+                if results[0] != results[1]:
+                    raise SystemExit(f"{name}({symbol}) is not deterministic under replay")
+
+    total = 0.0
+    for name, samples in timings.items():
+        median = statistics.median(samples)
+        total += median
+        print(f"{name:<36} median {median * 1e3:8.1f} ms  "
+              f"(compute {(median - args.latency) * 1e3:8.1f} ms)")
+    print(f"data path per ticker: {total:.2f}s, of which injected upstream latency "
+          f"{args.latency * len(timings):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Batch watchlist runs: throughput, shared work and resume after a crash.
+
+Runs run_batch() over a synthetic watchlist of --tickers stocks in 10
+industries. Models are replaced by the scripted model behind model_slot, AkShare
+is replayed from synthetic fixtures with --akshare-latency per call, and policy
+searches go to the search stand-in (as in load_test). The first batch process is
+killed with SIGKILL once --crash-after reports are done, and the batch is then
+resumed from its progress file. A sequential run (one ticker, one tool thread)
+over --baseline-tickers stocks gives the throughput to compare with. A last run
+over --agent-search-tickers stocks uses the shipped BATCH_* limits and the
+production AgentSearchBackend, so policy searches run google_search_agent_for_policy
+on the same (scripted, slotted) model as the agents that are waiting for them.
+
+Prints throughput per run, the policy searches and code-table fetches across
+both batch runs, and peak in-flight model requests and AkShare calls. Exits
+with status 1 if a ticker is missing or has two reports, if tickers that were
+not in flight at the crash ran again, if a concurrency limit was exceeded, or if
+a report of the AgentSearchBackend run is missing or has degraded sections.
+
+    python -m benchmarks.batch_watchlist --tickers 40 --crash-after 15
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks.mock_llm import ScriptedLlm, install_mock_model
+from benchmarks.search_standin import StandInSearchBackend
+from benchmarks.synthetic import INDUSTRIES, earnings_reports, record_fixtures
+from stock_analysis_agent import agent as agents
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.batch import BatchProgress, run_batch
+from stock_analysis_agent.config import BATCH_LLM_CONCURRENCY, BATCH_TICKER_CONCURRENCY
+from stock_analysis_agent.models import slotted
+from stock_analysis_agent.sub_agents.fundamental_agent.peers import report_periods
+from stock_analysis_agent.sub_agents.policy_agent import store as policy_store
+from stock_analysis_agent.sub_agents.policy_agent.search import AgentSearchBackend
+from stock_analysis_agent.sub_agents.policy_agent.tools import google_search_agent_for_policy, set_search_backend
+
+TOPICS = 3                      # policy topics in the scripted policy agent's search_policy_batch call
+
+
+class Peaks:
+    """Current and peak number of in-flight calls, by kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.now: Counter = Counter()
+        self.peak: Counter = Counter()
+
+    def enter(self, kind: str) -> None:
+        with self._lock:
+            self.now[kind] += 1
+            self.peak[kind] = max(self.peak[kind], self.now[kind])
+
+    def leave(self, kind: str) -> None:
+        with self._lock:
+            self.now[kind] -= 1
+
+
+peaks = Peaks()
+
+
+class SlottedLlm(ScriptedLlm):
+    """ScriptedLlm behind model slots, like the pooled production models."""
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        async for response in slotted(self.model, self._counted(llm_request, stream)):
+            yield response
+
+    async def _counted(self, llm_request, stream: bool):
+        """The scripted responses, counting a request as in flight only while its next response is awaited."""
+        responses = super().generate_content_async(llm_request, stream)
+        try:
+            while True:
+                peaks.enter("llm")
+                try:
+                    response = await responses.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    peaks.leave("llm")
+                yield response
+        finally:
+            await responses.aclose()
+
+
+class LoggedSearch(StandInSearchBackend):
+    """Search stand-in that appends each query to a file, so searches survive the killed process."""
+
+    def __init__(self, log_path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.log_path = log_path
+
+    async def search(self, query: str) -> list[dict]:
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(query + "\n")
+        return await super().search(query)
+
+
+def install_upstream_log(log_path: str, latency: float) -> None:
+    """Count replayed AkShare calls per function in `log_path` and inject `latency` inside the in-flight window."""
+    load = upstream.load_fixture
+
+    def logged(function, *a, **kw):
+        peaks.enter("upstream")
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(function + "\n")
+            time.sleep(latency)
+            return load(function, *a, **kw)
+        finally:
+            peaks.leave("upstream")
+
+    upstream.load_fixture = logged
+
+
+def lines(path: str) -> list[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def done_count(progress_path: str) -> tuple[int, int]:
+    """(done, running) tickers in a progress file being written by another process."""
+    if not os.path.exists(progress_path):
+        return 0, 0
+    conn = sqlite3.connect(progress_path)
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    except sqlite3.OperationalError:      # table not created yet
+        counts = {}
+    finally:
+        conn.close()
+    return counts.get("done", 0), counts.get("running", 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=40)
+    parser.add_argument("--crash-after", type=int, default=15, help="reports done before the first run is killed")
+    parser.add_argument("--baseline-tickers", type=int, default=4, help="tickers in the sequential comparison run")
+    parser.add_argument("--agent-search-tickers", type=int, default=2 * BATCH_TICKER_CONCURRENCY,
+                        help="tickers in the run with AgentSearchBackend at the shipped limits")
+    parser.add_argument("--concurrency", type=int, default=8, help="ticker pipelines in flight")
+    parser.add_argument("--llm", type=int, default=12, help="model requests in flight")
+    parser.add_argument("--upstream", type=int, default=4, help="data tool threads")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per model call before tokens")
+    parser.add_argument("--output-tps", type=float, default=200, help="output tokens/s (0 = free)")
+    parser.add_argument("--section-chars", type=int, default=1000, help="characters per report section")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per policy search")
+    parser.add_argument("--akshare-latency", type=float, default=0.1, help="seconds per replayed akshare call")
+    parser.add_argument("--bars", type=int, default=500, help="daily bars in the replayed price history")
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    names = {f"{600000 + i:06d}" if i % 2 else f"{i + 2:06d}": f"公司{i}" for i in range(args.tickers)}
+    watchlist = list(names) + [names[next(iter(names))]]          # one stock listed twice, by code and by name
+    limits = dict(ticker_concurrency=args.concurrency, llm_concurrency=args.llm,
+                  upstream_concurrency=args.upstream, render_concurrency=2)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        record_fixtures(names, fixtures, args.bars)
+        for period in report_periods():
+            upstream.save_fixture("stock_yjbb_em", {"date": period}, earnings_reports(names, period), fixtures)
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        os.chdir(tmp)                     # reports/ and cache/ (policy store, section cache) under the temp dir
+        calls_log, search_log = os.path.join(tmp, "akshare.log"), os.path.join(tmp, "searches.log")
+        install_upstream_log(calls_log, args.akshare_latency)
+        set_search_backend(LoggedSearch(search_log, latency=args.search_latency))
+        install_mock_model(agents.analysis_agent, SlottedLlm(
+            latency=args.latency, call_tools=True, output_tokens_per_second=args.output_tps,
+            section_chars=args.section_chars,
+        ))
+        progress_path = os.path.join(tmp, "cache", "batches", "watchlist.sqlite3")
+
+        # 1. first run, killed mid-batch
+        context = multiprocessing.get_context("fork")
+        child = context.Process(target=lambda: asyncio.run(run_batch(watchlist, progress_path, **limits)))
+        start = time.perf_counter()
+        child.start()
+        done = running = 0
+        while child.is_alive() and done < args.crash_after:
+            time.sleep(0.1)
+            done, running = done_count(progress_path)
+        os.kill(child.pid, signal.SIGKILL)
+        child.join()
+        first_wall = time.perf_counter() - start
+        done, running = done_count(progress_path)
+        print(f"run 1: killed after {first_wall:.1f}s with {done} reports done and {running} in flight")
+
+        # 2. resume
+        summary = asyncio.run(run_batch(watchlist, progress_path, **limits))
+        print(f"run 2: {summary['completed']} reports in {summary['wall_seconds']:.1f}s: "
+              f"{summary['reports_per_minute']:.2f} reports/min, p50 {summary['latency_p50']}s, "
+              f"p95 {summary['latency_p95']}s; {summary['already_done']} skipped, {len(summary['failed'])} failed")
+
+        progress = BatchProgress(progress_path)
+        jobs = progress.jobs()
+        progress.close()
+        attempts = sum(job["attempts"] for job in jobs)
+        if len(jobs) != args.tickers or any(job["status"] != "done" for job in jobs):
+            failures.append(f"{sum(job['status'] == 'done' for job in jobs)}/{args.tickers} tickers done")
+        if attempts != args.tickers + running:
+            failures.append(f"{attempts} attempts for {args.tickers} tickers with {running} in flight at the crash")
+        reports = [name for name in os.listdir("reports") if name.endswith(".pdf")]
+        missing = [job["ticker"] for job in jobs if not os.path.exists(job["report_path"] or "")]
+        if len(reports) != args.tickers or missing:
+            failures.append(f"{len(reports)} PDF reports for {args.tickers} tickers; missing {missing[:5]}")
+
+        searches, calls = lines(search_log), Counter(lines(calls_log))
+        industries = len({INDUSTRIES[int(code) % len(INDUSTRIES)] for code in names})
+        print(f"policy searches: {len(searches)} for {industries} industries x {TOPICS} topics "
+              f"(one search per report: {args.tickers * TOPICS}); code-table fetches: "
+              f"{calls['stock_info_a_code_name']} (one per run); industry-table fetches: {calls['stock_yjbb_em']}")
+        if len(searches) > 2 * industries * TOPICS:
+            failures.append(f"{len(searches)} policy searches, expected at most {2 * industries * TOPICS}")
+        if calls["stock_info_a_code_name"] != 2:
+            failures.append(f"{calls['stock_info_a_code_name']} code-table fetches in 2 runs")
+        print(f"peak in flight (run 2): {peaks.peak['llm']} model requests (limit {args.llm}), "
+              f"{peaks.peak['upstream']} akshare calls (limit {args.upstream})")
+        if peaks.peak["llm"] > args.llm or not 1 < peaks.peak["upstream"] <= args.upstream:
+            failures.append(f"peaks {dict(peaks.peak)} against limits llm {args.llm}, upstream {args.upstream}")
+
+        # 3. sequential comparison (policy evidence already cached, which favours it)
+        baseline = asyncio.run(run_batch(
+            list(names)[:args.baseline_tickers], os.path.join(tmp, "baseline.sqlite3"),
+            ticker_concurrency=1, llm_concurrency=1, upstream_concurrency=1, render_concurrency=1,
+        ))
+        print(f"sequential: {baseline['completed']} reports in {baseline['wall_seconds']:.1f}s: "
+              f"{baseline['reports_per_minute']:.2f} reports/min, p50 {baseline['latency_p50']}s")
+
+        # 4. production search path at the shipped limits, with an empty policy store
+        policy_store._store = policy_store.PolicyEvidenceStore(os.path.join(tmp, "agent_search", "policy.sqlite3"))
+        set_search_backend(AgentSearchBackend(google_search_agent_for_policy))
+        peaks.peak.clear()
+        agent_tickers = list(names)[:args.agent_search_tickers]
+        agent_run = asyncio.run(run_batch(
+            agent_tickers, os.path.join(tmp, "agent_search", "progress.sqlite3"),
+            ticker_concurrency=BATCH_TICKER_CONCURRENCY, llm_concurrency=BATCH_LLM_CONCURRENCY,
+        ))
+        print(f"AgentSearchBackend (tickers {BATCH_TICKER_CONCURRENCY}, llm {BATCH_LLM_CONCURRENCY}): "
+              f"{agent_run['completed']} reports in {agent_run['wall_seconds']:.1f}s: "
+              f"{agent_run['reports_per_minute']:.2f} reports/min; {len(agent_run['failed'])} failed, "
+              f"{len(agent_run['degraded'])} with degraded sections")
+        if agent_run["completed"] != len(agent_tickers) or agent_run["failed"] or agent_run["degraded"]:
+            failures.append(f"AgentSearchBackend run: {agent_run['completed']}/{len(agent_tickers)} reports, "
+                            f"failed {agent_run['failed']}, degraded {agent_run['degraded']}")
+        if peaks.peak["llm"] > BATCH_LLM_CONCURRENCY:
+            failures.append(f"{peaks.peak['llm']} model requests in flight, limit {BATCH_LLM_CONCURRENCY}")
+        os.chdir("/")
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
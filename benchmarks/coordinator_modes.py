@@ -0,0 +1,76 @@
+"""
+End-to-end comparison of the conversational and the workflow coordinator.
+
+Both coordinators drive the same equity_research_pipeline with every model
+replaced by benchmarks.mock_llm.ScriptedLlm, so the difference is the number
+of orchestration model turns times the per-turn latency.
+
+    python -m benchmarks.coordinator_modes --latency 1.0 --reports 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from benchmarks.mock_llm import COMPANY_NAMES, ScriptedLlm, install_mock_model
+from stock_analysis_agent import agent as agents
+from stock_analysis_agent import workflow
+
+
+async def _run_report(root, ticker: str) -> float:
+    runner = InMemoryRunner(agent=root, app_name="bench")
+    session = await runner.session_service.create_session(
+        app_name="bench", user_id="bench", session_id=uuid.uuid4().hex
+    )
+    start = time.perf_counter()
+    async for _ in runner.run_async(
+        user_id="bench",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=f"请分析 {ticker}")]),
+    ):
+        pass
+    return time.perf_counter() - start
+
+
+async def run(args) -> None:
+    # offline: resolve names from the mock's table instead of AkShare
+    workflow.a_share_names = lambda: COMPANY_NAMES
+    tickers = list(COMPANY_NAMES)
+
+    results = {}
+    for mode, root in (("llm", agents.coordinator_agent), ("workflow", agents.workflow_coordinator)):
+        llm = ScriptedLlm(latency=args.latency)
+        install_mock_model(root, llm)
+        latencies = [await _run_report(root, tickers[i % len(tickers)]) for i in range(args.reports)]
+        results[mode] = latencies
+        per_report = {k: v / args.reports for k, v in sorted(llm.calls.items())}
+        print(f"{mode:>8}: mean {statistics.mean(latencies):.2f}s, "
+              f"max {max(latencies):.2f}s, model turns/report {llm.total_calls / args.reports:.1f} {per_report}")
+
+    saved = statistics.mean(results["llm"]) - statistics.mean(results["workflow"])
+    print(f"workflow saves {saved:.2f}s per report ({saved / statistics.mean(results['llm']):.0%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per mocked model turn")
+    parser.add_argument("--reports", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.makedirs("reports", exist_ok=True)
+        try:
+            asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
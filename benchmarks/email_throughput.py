@@ -0,0 +1,89 @@
+"""
+Throughput benchmark: deliver one daily report to a large distribution list.
+
+Compares the pooled/batched MailQueue against the previous behaviour of one
+SMTP session (connect + EHLO + login + QUIT) per recipient, both against the
+local SMTP stand-in. Fails if a batch's headers disclose its recipients (they
+belong in RCPT TO only), or if a job whose attachment is missing opens a
+session or is retried instead of failing at once.
+
+    python -m benchmarks.email_throughput --recipients 500 --pdf-mb 2
+"""
+import argparse
+import os
+import smtplib
+import tempfile
+import time
+
+from benchmarks.smtp_standin import SMTPStandIn
+from stock_analysis_agent.mailer import MailJob, MailQueue, SMTPConnectionPool, iter_message
+
+
+def _make_pdf(path: str, size_mb: float) -> None:
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        f.write(os.urandom(int(size_mb * 1024 * 1024)))
+
+
+def _per_recipient(port: int, job: MailJob) -> float:
+    start = time.perf_counter()
+    for rcpt in job.recipients:
+        server = smtplib.SMTP("127.0.0.1", port)
+        server.ehlo()
+        server.sendmail(job.sender, [rcpt], b"".join(iter_message(job, [rcpt])))
+        server.quit()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipients", type=int, default=300)
+    parser.add_argument("--pdf-mb", type=float, default=1.0)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    recipients = [f"analyst{i:04d}@example.com" for i in range(args.recipients)]
+    with tempfile.TemporaryDirectory() as tmp, SMTPStandIn() as server:
+        pdf = os.path.join(tmp, "equity_research_report_demo_600519_20250101.pdf")
+        _make_pdf(pdf, args.pdf_mb)
+        job = MailJob(subject=os.path.basename(pdf), recipients=recipients,
+                      html_body="<p>daily report</p>", attachments=[pdf])
+        batch = recipients[:args.batch_size]
+        headers = next(iter_message(job, batch)).decode("ascii")
+        disclosed = [rcpt for rcpt in batch if rcpt in headers]
+        if len(batch) > 1 and disclosed:
+            print(f"headers of a {len(batch)}-recipient batch list {len(disclosed)} of them")
+            return 1
+
+        pool = SMTPConnectionPool(host="127.0.0.1", port=server.port, starttls=False,
+                                  size=args.workers)
+        mail_queue = MailQueue(pool, workers=args.workers, batch_size=args.batch_size)
+        report = mail_queue.send(job)
+        mail_queue.close()
+        print(f"pooled+batched: {report.status}, {len(report.delivered)} delivered in "
+              f"{report.elapsed:.3f}s ({len(report.delivered) / report.elapsed:.0f} rcpt/s), "
+              f"{pool.opened} SMTP session(s), {report.attempts} transaction(s)")
+        if report.status != "success":
+            return 1
+
+        missing = MailJob(subject="missing", recipients=batch, attachments=[os.path.join(tmp, "missing.pdf")])
+        pool = SMTPConnectionPool(host="127.0.0.1", port=server.port, starttls=False, size=1)
+        mail_queue = MailQueue(pool, workers=1, batch_size=args.batch_size)
+        missing_report = mail_queue.send(missing)
+        mail_queue.close()
+        print(f"missing attachment: {missing_report.status} after {missing_report.attempts} transaction(s), "
+              f"{pool.opened} SMTP session(s)")
+        if missing_report.status != "error" or missing_report.attempts or pool.opened:
+            return 1
+
+        if not args.skip_baseline:
+            elapsed = _per_recipient(server.port, job)
+            print(f"per-recipient sessions: {len(recipients)} delivered in {elapsed:.3f}s "
+                  f"({len(recipients) / elapsed:.0f} rcpt/s), {len(recipients)} SMTP session(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
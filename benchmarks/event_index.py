@@ -0,0 +1,127 @@
+"""
+Technical event index: nightly build over a synthetic market, and screen latency.
+
+Builds the (date, event) -> tickers index for --tickers synthetic daily histories
+of --bars bars (daily_bars is replaced by the in-memory frames, so only the event
+computation and the index writes are timed), then runs a few screens such as
+一年新高 AND 量价齐升>=3 and prints their median latency, cold and cached.
+
+Checks every screen against a brute-force scan of the per-ticker events, and the
+event definitions against calculate_technical_indicators' tail evaluation for
+--check-tickers tickers. Exits with status 1 on any mismatch.
+
+    python -m benchmarks.event_index --tickers 5000 --bars 300 --days 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import ohlcv
+from stock_analysis_agent import eventlog
+from stock_analysis_agent.sub_agents.technical_agent import events
+from stock_analysis_agent.sub_agents.technical_agent.events import (
+    CROSS_EVENTS, EVENTS, HIGH_LOW_EVENTS, STREAK_EVENTS, EventIndex, build_event_index, event_flags, parse_condition,
+)
+from stock_analysis_agent.sub_agents.technical_agent.tools import _tail_indicator_rows
+
+SCREENS = (
+    ["一年新高", "量价齐升>=3"],
+    ["创月新高", "突破布林带上轨"],
+    ["跌破20日均线", "连续下跌>=2", "持续放量"],
+    ["连续上涨>=2"],
+)
+
+
+def codes(count: int) -> list[str]:
+    """A mix of Shanghai, Shenzhen main board and ChiNext codes."""
+    prefixes = (600000, 1, 300001)
+    return [f"{prefixes[i % 3] + i // 3:06d}" for i in range(count)]
+
+
+def brute_force(flags: dict, screen: list[str], day: int) -> list[str]:
+    conditions = [parse_condition(c) for c in screen]
+    return sorted(t for t, f in flags.items() if all(f[e][day] >= n for e, n in conditions))
+
+
+def check_against_tool(ticker: str, frame, rows: int) -> list[str]:
+    """Event flags vs. the technical tool's flags on its last `rows` rows."""
+    out, _ = _tail_indicator_rows(frame, rows=rows)
+    flags = {name: values[-rows:] for name, values in event_flags(frame).items()}
+    problems = []
+    for i in range(rows):
+        row = out.iloc[i]
+        expected = {event: bool(row[event]) for event in HIGH_LOW_EVENTS}
+        expected |= {f"突破{m}": m in row["突破均线"] for m in (e[2:] for e in CROSS_EVENTS[:7])}
+        expected |= {f"跌破{m}": m in row["跌破均线"] for m in (e[2:] for e in CROSS_EVENTS[:7])}
+        expected |= {"突破布林带上轨": bool(row["突破布林带上轨"]), "跌破布林带下轨": bool(row["跌破布林带下轨"])}
+        expected |= {event: int(row[f"{event}天数"]) for event in STREAK_EVENTS}
+        got = {event: (int(flags[event][i]) if event in STREAK_EVENTS else bool(flags[event][i])) for event in EVENTS}
+        problems += [f"{ticker} row {i} {event}: {got[event]} != {value}"
+                     for event, value in expected.items()
+                     if got[event] != value and (i or event not in CROSS_EVENTS)]  # the tool's first row has no previous day
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--bars", type=int, default=300)
+    parser.add_argument("--days", type=int, default=5, help="trading days indexed")
+    parser.add_argument("--check-tickers", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    tickers = codes(args.tickers)
+    start = time.perf_counter()
+    frames = {t: ohlcv(t, args.bars) for t in tickers}
+    print(f"{len(tickers)} tickers x {args.bars} bars generated in {time.perf_counter() - start:.1f}s")
+    events.daily_bars = lambda ticker, end_date=None: frames[ticker]
+
+    failures = []
+    for ticker in tickers[:args.check_tickers]:
+        failures += check_against_tool(ticker, frames[ticker], rows=min(args.bars, 60))
+    print(f"event definitions vs. calculate_technical_indicators ({args.check_tickers} tickers): "
+          f"{'OK' if not failures else f'{len(failures)} mismatches'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "technical_events.sqlite3")
+        index = EventIndex(path)
+        summary = build_event_index(tickers=tickers, days=args.days, index=index)
+        print(f"build: {summary['seconds']:.1f}s for {summary['tickers']} tickers x {len(summary['dates'])} days "
+              f"({summary['tickers'] / summary['seconds']:,.0f} tickers/s), index {os.path.getsize(path) / 1024:.0f} KiB")
+
+        all_flags = {t: event_flags(frames[t]) for t in tickers}
+        dates = index.dates()
+        for screen in SCREENS:
+            cold = EventIndex(path)
+            start = time.perf_counter()
+            found = cold.screen(screen)
+            first = time.perf_counter() - start
+            cold.close()
+            samples = []
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                index.screen(screen)
+                samples.append(time.perf_counter() - start)
+            expected = brute_force(all_flags, screen, -1)
+            label = " AND ".join(screen)
+            print(f"  {label:<36} {len(found):5d} tickers  cold {first * 1e3:6.2f} ms  "
+                  f"cached {statistics.median(samples) * 1e3:6.3f} ms")
+            if found != expected:
+                failures.append(f"{label}: {len(found)} tickers, brute force {len(expected)}")
+            oldest = index.screen(screen, dates[0])
+            if oldest != brute_force(all_flags, screen, -len(dates)):
+                failures.append(f"{label} on {dates[0]} differs from brute force")
+        index.close()
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures[:10]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
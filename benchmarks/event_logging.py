@@ -0,0 +1,68 @@
+"""
+Cost of call_log: printing the full session state vs. the structured event log.
+
+The state is filled like it is late in a report: every earlier agent's Markdown
+section plus raw tool output. Both variants write to os.devnull so only the
+caller-side cost (formatting + I/O on the calling thread) is measured.
+
+    python -m benchmarks.event_logging --calls 200 --section-kb 40
+"""
+import argparse
+import contextlib
+import os
+import time
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from stock_analysis_agent import callbacks, eventlog
+from stock_analysis_agent.sections import SECTION_TITLES
+
+
+def _state(section_kb: int) -> State:
+    section = "| 日期 | 收盘 | 涨跌幅 |\n" + "| 2025-05-30 | 1520.00 | 0.85% |\n" * (section_kb * 1024 // 32)
+    value = {"provided_ticker": "600519", "company_name": "贵州茅台"}
+    for agent in SECTION_TITLES:
+        value[f"{agent}_output"] = f"# {SECTION_TITLES[agent]}\n\n{section}"
+        value[f"{agent}_tool_result"] = {str(i): {"收盘": "1520.00", "成交量": "31200"} for i in range(500)}
+    return State(value=value, delta={})
+
+
+def _print_full_state(ctx) -> None:
+    # call_log before the event log, printing the contents it was meant to show
+    # (google-adk 1.1's State has no __repr__, so the original line only printed an address)
+    print(f"[Callback] {ctx.agent_name} called with state: {ctx.state.to_dict()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--section-kb", type=int, default=40, help="size of each earlier agent's section")
+    args = parser.parse_args()
+
+    ctx = SimpleNamespace(agent_name="policy_agent", invocation_id="e-bench", state=_state(args.section_kb))
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            _print_full_state(ctx)
+        printed = time.perf_counter() - start
+
+    log = eventlog.EventLog(level="info", sinks=[eventlog.JsonLinesSink(os.devnull)])
+    eventlog._event_log = log
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        callbacks.call_log(ctx)
+    logged = time.perf_counter() - start
+    log.flush()
+    log.close()
+
+    state_chars = len(str(ctx.state.to_dict()))
+    print(f"state: {len(ctx.state.to_dict())} keys, {state_chars / 1024:.0f} KB when printed")
+    print(f"print full state: {printed / args.calls * 1e3:8.3f} ms/call")
+    print(f"event log:        {logged / args.calls * 1e3:8.3f} ms/call  ({printed / logged:.0f}x faster)")
+    print(f"last event: {log.recent(1)[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Fund-flow ranking snapshots: build cost per day, file size and per-ticker lookup latency.
+
+Replays --days trading days of synthetic market-wide fund flows for --stocks
+stocks in 10 industries. Each day is one stock_individual_fund_flow_rank call,
+ranked and saved as a snapshot. Prints the time and size per snapshot and the
+median get_fund_flow_rank latency over the last FUND_FLOW_LOOKUP_DAYS days. It
+also prints the upstream calls for --reports reports, which is 0, where one
+per-ticker history call per report was needed before. Ranks, percentiles and
+z-scores are checked against a direct computation, and neither a day off the
+replayed trading calendar nor a run before the close may be written. The
+snapshot's clock is moved to 15:30 of each replayed day. Exits with status 1 on
+any mismatch.
+
+    python -m benchmarks.fund_flow_ranks --stocks 5000 --days 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import earnings_reports, fund_flow_rank
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.fund_agent import flow_ranks
+from stock_analysis_agent.sub_agents.fund_agent.flow_ranks import FlowSnapshots, get_fund_flow_rank, snapshot_fund_flows
+from stock_analysis_agent.sub_agents.fundamental_agent import peers
+from stock_analysis_agent.sub_agents.fundamental_agent.peers import PeerTable, report_periods
+
+
+def direct_check(flows: pd.DataFrame, industries: dict, results: dict) -> list[str]:
+    """Latest-day rank context from the lookups vs. ranks computed from the raw frame."""
+    frame = pd.DataFrame({"code": flows["代码"], "net": flows["今日主力净流入-净额"].astype(float)})
+    frame["industry"] = frame["code"].map(industries)
+    problems = []
+    for code, result in results.items():
+        got = next(iter(result["days"].values()))
+        net = frame.loc[frame["code"] == code, "net"].iloc[0]
+        peers_net = frame.loc[frame["industry"] == industries[code], "net"]
+        expected = {
+            "net_market_rank": int((frame["net"] > net).sum() + 1),
+            "net_market_percentile": round(float((frame["net"] <= net).mean() * 100), 2),
+            "net_market_zscore": round(float((net - frame["net"].mean()) / frame["net"].std(ddof=0)), 2),
+            "net_industry_rank": int((peers_net > net).sum() + 1),
+            "net_industry_zscore": round(float((net - peers_net.mean()) / peers_net.std(ddof=0)), 2),
+        }
+        for key, value in expected.items():
+            if abs(got[key] - value) > 0.011:
+                problems.append(f"{code} {key}: {got[key]} != {value}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stocks", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--reports", type=int, default=200, help="tickers looked up, one per report")
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    names = {f"{600000 + i:06d}" if i % 2 else f"{i:06d}": f"股票{i}" for i in range(args.stocks)}
+    codes = list(names)
+    days = [d.date() for d in pd.bdate_range(end=pd.Timestamp.today(), periods=args.days)]
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        for period in report_periods():
+            upstream.save_fixture("stock_yjbb_em", {"date": period}, earnings_reports(names, period), fixtures)
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        peers._table = PeerTable(os.path.join(tmp, "no_peer_table.npz"))   # not built: industries from stock_yjbb_em
+        snapshots = flow_ranks._snapshots = FlowSnapshots(os.path.join(tmp, "fund_flow"))
+        upstream.save_fixture("tool_trade_date_hist_sina", {}, pd.DataFrame({"trade_date": days}), fixtures)
+
+        def clock(day, time_of_day: str = "15:30"):
+            flow_ranks._now = lambda: pd.Timestamp(f"{day} {time_of_day}", tz="Asia/Shanghai")
+
+        build = []
+        for day in days:
+            flows = fund_flow_rank(names, day)
+            upstream.save_fixture("stock_individual_fund_flow_rank", {"indicator": "今日"}, flows, fixtures)
+            clock(day, "10:00")
+            early = snapshot_fund_flows(snapshots=snapshots)
+            if "skipped" not in early:
+                failures.append(f"snapshot written before the close: {early}")
+            clock(day)
+            summary = snapshot_fund_flows(snapshots=snapshots)
+            build.append((summary["seconds"], summary["bytes"]))
+        clock(days[0] - pd.Timedelta(days=1))
+        holiday = snapshot_fund_flows(force=True, snapshots=snapshots)
+        if "skipped" not in holiday:
+            failures.append(f"snapshot written for a day off the trading calendar: {holiday}")
+        print(f"{args.days} snapshots of {args.stocks} stocks: median {statistics.median(s for s, _ in build):.2f}s "
+              f"and {statistics.median(b for _, b in build) / 1024:.0f} KiB each")
+
+        calls = 0
+        load = upstream.load_fixture
+
+        def counting(function, *a, **kw):
+            nonlocal calls
+            calls += 1
+            return load(function, *a, **kw)
+
+        upstream.load_fixture = counting
+        try:
+            get_fund_flow_rank(codes[0])          # first lookup loads the snapshots
+            samples, results = [], {}
+            for code in codes[:args.reports]:
+                start = time.perf_counter()
+                results[code] = get_fund_flow_rank(code)
+                samples.append(time.perf_counter() - start)
+        finally:
+            upstream.load_fixture = load
+        print(f"get_fund_flow_rank over {len(results[codes[0]]['days'])} days: median "
+              f"{statistics.median(samples) * 1e6:.0f} us; {args.reports} reports made {calls} upstream calls "
+              f"(per-ticker histories: {args.reports} stock_individual_fund_flow calls)")
+
+        reports = earnings_reports(names, report_periods()[0])
+        industries = dict(zip(reports["股票代码"], reports["所处行业"]))
+        problems = direct_check(flows, industries, {c: results[c] for c in codes[:50]})
+        print(f"ranks and z-scores vs. direct computation (50 stocks): "
+              f"{'OK' if not problems else f'{len(problems)} mismatches'}")
+        failures += problems
+        missing = get_fund_flow_rank("999999")
+        if missing.get("status") != "unavailable":
+            failures.append(f"unknown ticker: {missing}")
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures[:10]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
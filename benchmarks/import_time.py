@@ -0,0 +1,89 @@
+"""
+Cold-start import time of the agent package.
+
+Runs `python -X importtime -c "import stock_analysis_agent.agent"` in --repeat
+fresh interpreters, prints the median total (and the slowest top-level imports of
+the fastest run), and checks that the heavy optional dependencies (litellm,
+akshare, weasyprint, markdown, schedule, smtplib) are only loaded by the tools
+that need them.
+
+--check gates on the median, not a single run, and allows --tolerance over the
+budget: one cold run on a busy machine can take 40% longer than the others. The
+budget is the median measured after the lazy imports went in (~6.4s); with the
+default tolerance the gate is 7.8s, so the ~8.5s eager-import start-up still fails.
+
+pandas/numpy are not on the list: google-adk imports them itself (via vertexai).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --check
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGET = "stock_analysis_agent.agent"
+
+# modules that must not be imported by `import stock_analysis_agent.agent`
+LAZY_MODULES = ("litellm", "akshare", "weasyprint", "markdown", "schedule", "smtplib")
+
+DEFAULT_BUDGET_SECONDS = 6.5
+DEFAULT_TOLERANCE = 0.2              # fraction over the budget the median may reach
+
+
+def measure(target: str = TARGET) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for every module imported by `import target`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="maximum cumulative import time in seconds")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fraction over --budget the median run may take before --check fails")
+    parser.add_argument("--repeat", type=int, default=5, help="runs; the median is checked")
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list")
+    parser.add_argument("--check", action="store_true", help="exit 1 if the budget or a lazy module is violated")
+    args = parser.parse_args()
+
+    def total_of(rows: list[tuple[str, int, int]]) -> float:
+        return sum(cumulative for name, _, cumulative in rows if not name.startswith("  ")) / 1e6
+
+    runs = [measure() for _ in range(max(1, args.repeat))]
+    rows = min(runs, key=total_of)
+    total = statistics.median(total_of(run) for run in runs)
+    limit = args.budget * (1 + args.tolerance)
+
+    # self time summed per top-level package
+    by_package: dict[str, int] = {}
+    for name, self_us, _ in rows:
+        package = name.strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    print(f"import {TARGET}: median {total:.2f}s of {len(runs)} runs (fastest {total_of(rows):.2f}s, "
+          f"{len(rows)} modules), budget {args.budget:g}s + {args.tolerance:.0%} = {limit:.2f}s")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {self_us / 1e6:7.3f}s  {package}")
+
+    loaded = set(by_package)
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print("imported eagerly: " + ", ".join(eager))
+
+    if args.check and (total > limit or eager):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Streaming intraday engine at scale, checked against a batch computation.
+
+Generates --days trading days of synthetic 1-minute bars for --tickers tickers,
+merges them into one time-ordered stream (replay_minute_bars) and feeds it to an
+IntradayEngine. Prints bars/s, the cost per bar on the first and the last day
+(equal when updates are O(1) in the history length) and the cost of a snapshot.
+
+Then checks one ticker's snapshot against the same indicators computed in batch
+with pandas (rolling means, ewm, cumulative VWAP on 1/5/15-minute bars), and
+replays --replay-tickers tickers from recorded stock_zh_a_hist_min_em fixtures
+through the async feed, which must reach the same snapshots. Finally polls one
+recorded ticker's last day through MinuteBarPoller at 10:00 (twice) and at the
+close: each bar must be fed once, and only once its minute has ended. Exits with
+status 1 on any mismatch.
+
+    python -m benchmarks.intraday --tickers 2000 --days 2
+"""
+import argparse
+import asyncio
+import math
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import minute_bars
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.technical_agent.intraday import (
+    IntradayEngine, MinuteBarPoller, load_minute_bars, minute_bars_from_frame, replay_minute_bars,
+    replay_minute_bars_async,
+)
+
+RSI_WINDOW, VOLUME_WINDOW = 14, 20
+
+
+def trading_days(count: int) -> list[date]:
+    return [d.date() for d in pd.bdate_range(end=pd.Timestamp.today(), periods=count)]
+
+
+def frames_for(ticker: str, days: list[date]) -> pd.DataFrame:
+    return pd.concat([minute_bars(ticker, day) for day in days], ignore_index=True)
+
+
+def batch_indicators(frame: pd.DataFrame, minutes: int) -> dict:
+    """Last completed bar's indicators for `minutes`-minute bars, computed in batch."""
+    times = pd.to_datetime(frame["时间"])
+    minute = times.dt.hour * 60 + times.dt.minute
+    end = minute if minutes == 1 else ((-(-minute // minutes)) * minutes).clip(lower=570 + minutes)
+    bars = frame.groupby([times.dt.date, end], sort=True).agg(
+        收盘=("收盘", "last"), 成交量=("成交量", "sum"))
+    close, volume = bars["收盘"], bars["成交量"].astype(float)
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).rolling(RSI_WINDOW).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(RSI_WINDOW).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    diff = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = diff.ewm(span=9, adjust=False).mean()
+    amplification = volume / volume.rolling(VOLUME_WINDOW).mean()
+    return {"RSI": rsi.iloc[-1], "MACD_diff": diff.iloc[-1], "MACD_signal": signal.iloc[-1],
+            "volume_amplification": amplification.iloc[-1], "bars": len(bars)}
+
+
+def check_against_batch(engine: IntradayEngine, ticker: str, frame: pd.DataFrame) -> list[str]:
+    snapshot = engine.snapshot(ticker)
+    problems = []
+    last_day = frame[pd.to_datetime(frame["时间"]).dt.date == pd.to_datetime(frame["时间"]).iloc[-1].date()]
+    typical = (last_day["最高"] + last_day["最低"] + last_day["收盘"]) / 3
+    vwap = (typical * last_day["成交量"]).sum() / last_day["成交量"].sum()
+    if abs(snapshot["VWAP"] - vwap) > 1e-3:
+        problems.append(f"VWAP {snapshot['VWAP']} != {vwap:.4f}")
+    tolerance = {"RSI": 0.011, "MACD_diff": 1e-3, "MACD_signal": 1e-3, "volume_amplification": 0.011, "bars": 0}
+    for minutes in engine.timeframes:
+        streamed = snapshot["timeframes"][f"{minutes}m"]
+        for key, expected in batch_indicators(frame, minutes).items():
+            value = streamed[key]
+            if math.isnan(expected):    # not enough bars yet
+                ok = value is None
+            else:
+                ok = value is not None and abs(value - expected) <= tolerance[key]
+            if not ok:
+                problems.append(f"{minutes}m {key}: streamed {value} vs batch {expected:.4f}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=2, help="trading days of minute bars per ticker")
+    parser.add_argument("--replay-tickers", type=int, default=20, help="tickers replayed from fixtures (async)")
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    days = trading_days(args.days)
+    tickers = [f"{600000 + i:06d}" for i in range(args.tickers)]
+    frames = {t: frames_for(t, days) for t in tickers[:max(1, args.replay_tickers)]}
+    feeds = {t: minute_bars_from_frame(t, frames[t] if t in frames else frames_for(t, days)) for t in tickers}
+    stream = list(replay_minute_bars(feeds))
+    print(f"{len(tickers)} tickers x {len(stream) // len(tickers)} minute bars = {len(stream)} updates")
+
+    engine = IntradayEngine()
+    per_day = []
+    start = time.perf_counter()
+    for day in days:
+        bars = [bar for bar in stream if bar.time.date() == day]
+        day_start = time.perf_counter()
+        engine.consume(bars)
+        per_day.append((time.perf_counter() - day_start) / len(bars))
+    elapsed = time.perf_counter() - start
+    print(f"engine: {len(stream) / elapsed:,.0f} bars/s; "
+          f"{per_day[0] * 1e6:.2f} us/bar on the first day, {per_day[-1] * 1e6:.2f} us/bar on the last")
+
+    start = time.perf_counter()
+    for i in range(10_000):
+        engine.snapshot(tickers[i % len(tickers)])
+    print(f"snapshot: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us")
+
+    failures = check_against_batch(engine, tickers[0], frames[tickers[0]])
+    print(f"{tickers[0]} vs batch computation: {'OK' if not failures else '; '.join(failures)}")
+
+    with tempfile.TemporaryDirectory() as fixtures:
+        replayed = list(frames)
+        for ticker in replayed:
+            for day in days:
+                text = day.isoformat()
+                upstream.save_fixture("stock_zh_a_hist_min_em", dict(
+                    symbol=ticker, period="1", start_date=f"{text} 09:30:00", end_date=f"{text} 15:00:00",
+                    adjust=""), minute_bars(ticker, day), fixtures)
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        recorded = {t: [bar for day in days for bar in load_minute_bars(t, day.isoformat())] for t in replayed}
+        async_engine = IntradayEngine()
+        start = time.perf_counter()
+        count = asyncio.run(async_engine.consume_async(replay_minute_bars_async(recorded)))
+        elapsed = time.perf_counter() - start
+        differ = [t for t in replayed if async_engine.snapshot(t) != engine.snapshot(t)]
+        print(f"async replay of {len(replayed)} recorded tickers: {count} bars in {elapsed:.2f}s, "
+              f"{'snapshots match' if not differ else f'{len(differ)} snapshots differ'}")
+        failures += [f"replayed snapshot of {t} differs" for t in differ]
+
+        ticker, day = replayed[0], days[-1]
+        session = load_minute_bars(ticker, day.isoformat())
+        poller = MinuteBarPoller(IntradayEngine())
+        polls = [datetime.combine(day, datetime.min.time()).replace(hour=h) for h in (10, 10, 15)]
+        fed = [poller.poll(ticker, now) for now in polls]
+        expected = IntradayEngine()
+        expected.consume(session)
+        morning = sum(bar.time <= polls[0] for bar in session)
+        ok = fed == [morning, 0, len(session) - morning] and poller.engine.snapshot(ticker) == expected.snapshot(ticker)
+        print(f"poller on {ticker} {day}: fed {fed} bars at 10:00, 10:00, 15:00; {'OK' if ok else 'MISMATCH'}")
+        if not ok:
+            failures.append(f"poller fed {fed}, expected {[morning, 0, len(session) - morning]}")
+
+    if failures:
+        print("FAIL", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Load test of the full report pipeline with a scripted model and replayed data.
+
+Every model is replaced by benchmarks.mock_llm.ScriptedLlm (with tool calls and
+configurable token rates), AkShare is replayed from synthetic fixtures with
+injected latency, and policy searches go to the local search stand-in. Each of
+--workers forked processes drives --concurrency concurrent sessions until it has
+produced --reports reports, cycling through --tickers.
+
+Reports throughput (reports/min), latency percentiles and CPU / peak memory per
+worker. With --baseline, exits with status 1 when throughput is more than
+--max-regression below the baseline; --save-baseline records the current run.
+
+    python -m benchmarks.load_test --workers 2 --concurrency 4 --reports 8
+    python -m benchmarks.load_test --baseline benchmarks/baselines/load_test.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from benchmarks.mock_llm import COMPANY_NAMES, ScriptedLlm, install_mock_model
+from benchmarks.search_standin import StandInSearchBackend
+from benchmarks.synthetic import record_fixtures
+from stock_analysis_agent import agent as agents
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.policy_agent.tools import set_search_backend
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load_test.json")
+ROOTS = {
+    "llm": lambda: agents.coordinator_agent,
+    "workflow": lambda: agents.workflow_coordinator,
+    "pipeline": lambda: agents.analysis_agent,
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered), math.ceil(q / 100 * len(ordered))) - 1)]
+
+
+async def _run_report(runner: InMemoryRunner, ticker: str) -> float:
+    session = await runner.session_service.create_session(
+        app_name="load_test", user_id="load_test", session_id=uuid.uuid4().hex
+    )
+    start = time.perf_counter()
+    async for _ in runner.run_async(
+        user_id="load_test",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=f"请分析 {ticker}")]),
+    ):
+        pass
+    return time.perf_counter() - start
+
+
+async def _drive(options: dict) -> tuple[list[float], int, dict[str, int]]:
+    root = ROOTS[options["mode"]]()
+    llm = ScriptedLlm(
+        latency=options["latency"], call_tools=True,
+        prefill_tokens_per_second=options["prefill_tps"],
+        output_tokens_per_second=options["output_tps"],
+        section_chars=options["section_chars"],
+    )
+    install_mock_model(root, llm)
+    set_search_backend(StandInSearchBackend(latency=options["search_latency"]))
+    runner = InMemoryRunner(agent=root, app_name="load_test")
+
+    tickers = options["tickers"]
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(options["concurrency"])
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            try:
+                latencies.append(await _run_report(runner, tickers[i % len(tickers)]))
+            except Exception as e:
+                errors += 1
+                print(f"report failed: {e!r}", file=sys.stderr)
+
+    await asyncio.gather(*(one(i) for i in range(options["reports"])))
+    return latencies, errors, dict(llm.calls)
+
+
+def run_worker(index: int, options: dict) -> dict:
+    """One worker process: its own working directory (reports/, cache/) and event loop."""
+    os.chdir(tempfile.mkdtemp(prefix=f"load_test_{index}_"))
+    os.makedirs("reports", exist_ok=True)
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    latencies, errors, calls = asyncio.run(_drive(options))
+    return {
+        "worker": index,
+        "latencies": latencies,
+        "errors": errors,
+        "model_calls": calls,
+        "wall_seconds": time.perf_counter() - start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def summarize(results: list[dict], wall: float) -> dict:
+    latencies = [x for r in results for x in r["latencies"]]
+    return {
+        "reports": len(latencies),
+        "errors": sum(r["errors"] for r in results),
+        "wall_seconds": round(wall, 2),
+        "reports_per_minute": round(len(latencies) / wall * 60, 2),
+        "latency_p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "latency_p99": round(percentile(latencies, 99), 3) if latencies else None,
+        "latency_mean": round(statistics.mean(latencies), 3) if latencies else None,
+    }
+
+
+def check_regression(summary: dict, baseline: dict, max_regression: float) -> str | None:
+    """Why `summary` fails against `baseline`, or None if it passes."""
+    floor = baseline["reports_per_minute"] * (1 - max_regression)
+    if summary["reports_per_minute"] < floor:
+        return (f"throughput {summary['reports_per_minute']:.2f} reports/min is below "
+                f"{floor:.2f} (baseline {baseline['reports_per_minute']:.2f} - {max_regression:.0%})")
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=sorted(ROOTS), default="workflow",
+                        help="coordinator_agent (llm), workflow_coordinator or equity_research_pipeline alone")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent sessions per worker")
+    parser.add_argument("--reports", type=int, default=8, help="reports per worker")
+    parser.add_argument("--tickers", nargs="+", default=list(COMPANY_NAMES))
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per model call before tokens")
+    parser.add_argument("--prefill-tps", type=float, default=5000, help="prompt tokens/s (0 = free)")
+    parser.add_argument("--output-tps", type=float, default=100, help="output tokens/s (0 = free)")
+    parser.add_argument("--section-chars", type=int, default=1500, help="characters per report section")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per policy search")
+    parser.add_argument("--akshare-latency", type=float, default=0.1, help="seconds per replayed akshare call")
+    parser.add_argument("--bars", type=int, default=1000, help="daily bars in the replayed price history")
+    parser.add_argument("--baseline", help=f"compare throughput with this baseline (e.g. {DEFAULT_BASELINE})")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed fractional throughput drop against the baseline")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="write this run as the baseline")
+    args = parser.parse_args()
+    options = {k: v for k, v in vars(args).items() if k not in ("baseline", "max_regression", "save_baseline")}
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        record_fixtures({t: COMPANY_NAMES.get(t, t) for t in args.tickers}, fixture_dir, args.bars)
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixture_dir
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": args.akshare_latency}
+
+        # fork: workers inherit the imported package and the replay settings
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        workers = [context.Process(target=lambda i=i: queue.put(run_worker(i, options)))
+                   for i in range(args.workers)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        results = sorted((queue.get() for _ in workers), key=lambda r: r["worker"])
+        wall = time.perf_counter() - start
+        for worker in workers:
+            worker.join()
+
+    summary = summarize(results, wall)
+    for r in results:
+        cpu_share = r["cpu_seconds"] / r["wall_seconds"] if r["wall_seconds"] else 0
+        print(f"worker {r['worker']}: {len(r['latencies'])} reports, {r['errors']} errors, "
+              f"cpu {r['cpu_seconds']:.1f}s ({cpu_share:.0%}), peak rss {r['max_rss_mb']:.0f} MB, "
+              f"model calls {sum(r['model_calls'].values())}")
+    print(f"{summary['reports']} reports in {summary['wall_seconds']:.1f}s: "
+          f"{summary['reports_per_minute']:.2f} reports/min, p50 {summary['latency_p50']}s, "
+          f"p99 {summary['latency_p99']}s, {summary['errors']} errors")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"options": options, **summary}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.save_baseline}")
+    failure = "errors during the run" if summary["errors"] else None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("options") != options:
+            print("warning: baseline was recorded with different options", file=sys.stderr)
+        failure = failure or check_regression(summary, baseline, args.max_regression)
+    if failure:
+        print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Micro-benchmarks for the data and rendering tools, with stored baselines.
+
+Stages (each timed as the median of --repeat runs after one warm-up run):
+
+- technical_indicators/N: calculate_technical_indicators on N daily bars
+- fund_flow/N, chip_distribution/N, hsgt_holdings/N: the daily fund tools on N rows
+- institute_holdings, financial_indicators: the remaining fetch/serialize tools
+- markdown_to_html/P, combine_reports/P: a P-page report, Markdown -> HTML and the full tool (-> PDF)
+
+Data comes from synthetic AkShare fixtures replayed with no injected latency, so
+the suite runs offline and measures only CPU work in this process.
+
+A stage fails the comparison when it is more than --threshold slower than its
+baseline and at least --min-delta-ms slower in absolute terms. A stage over the
+threshold is measured again (--retries more medians) and the fastest median
+counts; --save-baseline always records the fastest of 1 + --retries medians, so
+both sides use the same estimate and one noisy round (scheduler, a busy
+neighbour) neither fails an unchanged tree nor inflates the baseline. Timed runs
+have the cyclic GC off. The default threshold (+50%) is for a quiet machine,
+like the one the baseline was recorded on. On shared single-CPU runners, where
+unchanged stages drift by up to +80% between runs, pass --noisy (+100%) instead;
+an explicit --threshold overrides both.
+
+    python -m benchmarks.micro                               # run and compare with the stored baseline
+    python -m benchmarks.micro --stages 'technical*' --threshold 0.25
+    python -m benchmarks.micro --noisy                       # shared CI runner
+    python -m benchmarks.micro --save-baseline               # merge these results into the baseline
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+from benchmarks import synthetic
+from stock_analysis_agent import eventlog, upstream
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+DEFAULT_THRESHOLD = 0.5                 # fraction slower than the baseline that fails, on a quiet machine
+NOISY_THRESHOLD = 1.0                   # --noisy: shared single-CPU runners
+BAR_SCALES = (250, 2000, 8000)
+PAGE_SCALES = (10, 50, 200)
+SYMBOL = "600519"
+
+
+def _replay(fixture_dir: str, frames: dict[str, object]) -> None:
+    """Write `frames` (akshare function -> DataFrame) as SYMBOL's fixtures and replay from them."""
+    from stock_analysis_agent.sub_agents.technical_agent import bars
+
+    calls = synthetic.tool_calls(SYMBOL)
+    for function, frame in frames.items():
+        upstream.save_fixture(function, calls[function], frame, fixture_dir)
+    upstream.AKSHARE_MODE = "replay"
+    upstream.AKSHARE_FIXTURE_DIR = fixture_dir
+    upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+    bars.clear_daily_bars()               # cached by (ticker, date), not by fixture
+
+
+def stages(workdir: str) -> list[tuple[str, Callable[[], None], Callable[[], object]]]:
+    """(name, setup, run) for every stage; setup prepares fixtures or report sections."""
+    from stock_analysis_agent.sub_agents.fund_agent import tools as fund
+    from stock_analysis_agent.sub_agents.fundamental_agent.tools import fetch_stock_financial_indicators
+    from stock_analysis_agent.sub_agents.technical_agent.tools import calculate_technical_indicators
+    from stock_analysis_agent.tools import combine_reports
+
+    calls = synthetic.tool_calls(SYMBOL)
+    result: list[tuple[str, Callable[[], None], Callable[[], object]]] = []
+
+    for bars in BAR_SCALES:
+        fixtures = os.path.join(workdir, f"bars_{bars}")
+        frames = {
+            "stock_zh_a_hist": synthetic.ohlcv(SYMBOL, bars),
+            "stock_individual_fund_flow": synthetic.fund_flow(SYMBOL, bars),
+            "stock_cyq_em": synthetic.chip_distribution(SYMBOL, bars),
+            "stock_hsgt_individual_detail_em": synthetic.hsgt_holdings(SYMBOL, bars),
+        }
+        setup = lambda fixtures=fixtures, frames=frames: _replay(fixtures, frames)
+        result += [
+            (f"technical_indicators/{bars}", setup, lambda: calculate_technical_indicators(SYMBOL)),
+            (f"fund_flow/{bars}", setup,
+             lambda: fund.fetch_stock_individual_fund_flow(**calls["stock_individual_fund_flow"])),
+            (f"chip_distribution/{bars}", setup,
+             lambda: fund.fetch_stock_chip_distribution(**calls["stock_cyq_em"])),
+            (f"hsgt_holdings/{bars}", setup,
+             lambda: fund.fetch_stock_hsgt_individual_detail(**calls["stock_hsgt_individual_detail_em"])),
+        ]
+
+    fixtures = os.path.join(workdir, "fixed")
+    setup = lambda: _replay(fixtures, {
+        "stock_institute_hold_detail": synthetic.institute_holdings(SYMBOL),
+        "stock_financial_analysis_indicator": synthetic.financial_indicators(SYMBOL, 40),
+    })
+    result += [
+        ("institute_holdings", setup,
+         lambda: fund.fetch_stock_institute_hold_detail(**calls["stock_institute_hold_detail"])),
+        ("financial_indicators", setup,
+         lambda: fetch_stock_financial_indicators(**calls["stock_financial_analysis_indicator"])),
+    ]
+
+    for pages in PAGE_SCALES:
+        sections = synthetic.report_sections(pages)
+        # the session state combine_reports reads the sections from
+        context = SimpleNamespace(state={f"{name}_output": text for name, text in sections.items()})
+
+        def to_html(sections=sections):
+            import markdown
+            return markdown.markdown("\n\n".join(sections.values()), extensions=["tables"])
+
+        result += [
+            (f"markdown_to_html/{pages}", lambda: None, to_html),
+            (f"combine_reports/{pages}", lambda: None,
+             lambda pages=pages, context=context: combine_reports(SYMBOL, f"bench{pages}", context)),
+        ]
+    return result
+
+
+def _check(name: str, value: object) -> None:
+    if isinstance(value, dict) and (value.get("status") == "error" or "error" in value):
+        raise SystemExit(f"{name} failed: {value}")
+
+
+def _median(fn: Callable[[], object], repeat: int) -> float:
+    """Median of `repeat` timed runs, with the cyclic GC off (as timeit does) so collections do not land in one."""
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return statistics.median(samples)
+
+
+def _regressed(seconds: float, base: float | None, threshold: float, min_delta: float) -> bool:
+    return base is not None and seconds / base - 1 > threshold and seconds - base >= min_delta
+
+
+def run(patterns: list[str], repeat: int, baseline: dict[str, float] | None = None, threshold: float = 0.0,
+        min_delta: float = 0.0, retries: int = 0) -> dict[str, float]:
+    """Median seconds per selected stage, the fastest of up to 1 + `retries` medians.
+
+    With a `baseline`, stages stop after the first median that is not regressed against it;
+    without one, every stage gets all 1 + `retries` medians.
+    """
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name, setup, fn in stages(workdir):
+                if not any(fnmatch.fnmatch(name, p) for p in patterns):
+                    continue
+                setup()
+                _check(name, fn())  # warm-up: imports, caches
+                results[name] = _median(fn, repeat)
+                for _ in range(retries):
+                    if baseline is not None and not _regressed(results[name], baseline.get(name), threshold,
+                                                               min_delta):
+                        break
+                    results[name] = min(results[name], _median(fn, repeat))
+                print(f"{name:<28} {results[name] * 1e3:10.2f} ms", flush=True)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float,
+            min_delta: float = 0.0) -> list[str]:
+    """Stages more than `threshold` (and at least `min_delta` seconds) slower than their baseline."""
+    slower = []
+    print(f"\n{'stage':<28} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<28} {'-':>12} {seconds * 1e3:10.2f}ms {'new':>8}")
+            continue
+        change = seconds / base - 1
+        flag = "  SLOWER" if _regressed(seconds, base, threshold, min_delta) else ""
+        print(f"{name:<28} {base * 1e3:10.2f}ms {seconds * 1e3:10.2f}ms {change:+8.0%}{flag}")
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stages", nargs="+", default=["*"], help="glob patterns of stages to run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (median)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float,
+                        help=f"fail when a stage is this fraction slower than its baseline "
+                             f"(default {DEFAULT_THRESHOLD}, {NOISY_THRESHOLD} with --noisy)")
+    parser.add_argument("--noisy", action="store_true",
+                        help="shared or single-CPU runner: compare with the looser noisy-machine threshold")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="... and at least this many milliseconds slower")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="extra medians for a stage over the threshold (every stage when saving); fastest counts")
+    parser.add_argument("--save-baseline", action="store_true", help="merge these results into --baseline")
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+    min_delta = args.min_delta_ms / 1e3
+    if args.threshold is None:
+        args.threshold = NOISY_THRESHOLD if args.noisy else DEFAULT_THRESHOLD
+    if args.save_baseline:
+        results = run(args.stages, args.repeat, retries=args.retries)
+    else:
+        results = run(args.stages, args.repeat, stored.get("stages", {}), args.threshold, min_delta, args.retries)
+
+    if args.save_baseline:
+        stored["machine"] = f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+        stored["stages"] = {**stored.get("stages", {}), **{k: round(v, 6) for k, v in results.items()}}
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    elif stored:
+        slower = compare(results, stored.get("stages", {}), args.threshold, min_delta)
+        if slower:
+            print(f"FAIL: {len(slower)} stage(s) more than {args.threshold:.0%} slower: {', '.join(slower)}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Deterministic local stand-in for the LLM behind every agent.
+
+ScriptedLlm answers from a fixed script keyed by the calling agent's name
+(read from the "Your internal name is ..." system instruction ADK adds):
+
+- coordinator_agent calls get_current_time, google_search_agent,
+  equity_research_pipeline and combine_reports in order, one per turn, then answers;
+- google_search_agent answers "<ticker>,<company name>";
+- the four analysis sub-agents answer with a canned Markdown section; with
+  call_tools=True they first call their data tools (all in one turn, as a model
+  issuing parallel function calls would) and answer once the results are in.
+
+Each call waits `latency` seconds plus the prompt and output tokens at
+`prefill_tokens_per_second` / `output_tokens_per_second` (0 = free), so
+orchestration turns and generation time can be counted and timed without a live
+model. `section_chars` pads each section to a realistic length.
+"""
+import asyncio
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from stock_analysis_agent.sections import SECTION_TITLES
+
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+_TICKER_RE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+_INDUSTRY_RE = re.compile(r"industry: (\S+)")
+
+COMPANY_NAMES = {"600519": "贵州茅台", "000001": "平安银行", "300750": "宁德时代"}
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else ""
+    match = _AGENT_NAME_RE.search(str(instruction or ""))
+    return match.group(1) if match else ""
+
+
+def _texts(llm_request: LlmRequest) -> str:
+    return " ".join(p.text for c in llm_request.contents for p in (c.parts or []) if p.text)
+
+
+def _called(llm_request: LlmRequest) -> set[str]:
+    return {
+        p.function_response.name
+        for c in llm_request.contents for p in (c.parts or []) if p.function_response
+    }
+
+
+def _text_response(text: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _call_response(name: str, args: dict) -> LlmResponse:
+    return _calls_response([(name, args)])
+
+
+def _calls_response(calls: list[tuple[str, dict]]) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[
+        types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in calls
+    ]))
+
+
+def tool_plan(agent: str, ticker: str, industry: str | None = None) -> list[tuple[str, dict]]:
+    """The data tool calls an analysis sub-agent makes for `ticker` (in `industry`, when the input names it)."""
+    market = "sh" if ticker.startswith(("6", "9")) else "sz"
+    plans = {
+        "fundamental_agent": [("fetch_stock_financial_indicators", {"symbol": ticker, "start_year": "2020"})],
+        "technical_agent": [("calculate_technical_indicators", {"provided_ticker": ticker}),
+                            ("calculate_multi_timeframe_indicators", {"provided_ticker": ticker})],
+        "fund_agent": [
+            ("fetch_stock_individual_fund_flow", {"stock": ticker, "market": market}),
+            ("fetch_stock_chip_distribution", {"symbol": ticker, "adjust": ""}),
+            ("fetch_stock_institute_hold_detail", {"stock": ticker, "quarter": "20251"}),
+            ("fetch_stock_hsgt_individual_detail",
+             {"symbol": ticker, "start_date": "20250101", "end_date": "20250331"}),
+        ],
+        "policy_agent": [("search_policy_batch", {
+            "industry": industry or f"{COMPANY_NAMES.get(ticker, ticker)}所属行业",
+            "topics": ["宏观经济政策", "产业政策", "监管政策"],
+            "queries": ["宏观经济政策 影响", "产业政策 支持", "监管政策 变化"],
+        })],
+    }
+    return plans.get(agent, [])
+
+
+def _usage(llm_request: LlmRequest, response: LlmResponse) -> types.GenerateContentResponseUsageMetadata:
+    # rough token estimate (~2 characters per token for mixed Chinese/English text)
+    prompt = len(str(llm_request.config.system_instruction or "")) + sum(
+        len(p.text or "") + len(str(p.function_response.response) if p.function_response else "")
+        for c in llm_request.contents for p in (c.parts or [])
+    )
+    output = sum(len(p.text or "") for p in (response.content.parts or []))
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt // 2, candidates_token_count=output // 2,
+        total_token_count=(prompt + output) // 2,
+    )
+
+
+class ScriptedLlm(BaseLlm):
+    """Scripted model; `calls` counts model turns per agent name."""
+
+    model: str = "mock-gemini-2-scripted"  # "gemini-2" keeps the built-in google_search tool happy
+    latency: float = 0.0
+    prefill_tokens_per_second: float = 0.0
+    output_tokens_per_second: float = 0.0
+    section_chars: int = 0
+    call_tools: bool = False
+    calls: dict[str, int] = {}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent = _agent_name(llm_request)
+        self.calls[agent] = self.calls.get(agent, 0) + 1
+        response = self.respond(agent, llm_request)
+        usage = response.usage_metadata = _usage(llm_request, response)
+        delay = self.latency
+        if self.prefill_tokens_per_second:
+            delay += usage.prompt_token_count / self.prefill_tokens_per_second
+        if self.output_tokens_per_second:
+            delay += usage.candidates_token_count / self.output_tokens_per_second
+        await asyncio.sleep(delay)
+        yield response
+
+    def respond(self, agent: str, llm_request: LlmRequest) -> LlmResponse:
+        texts = _texts(llm_request)
+        match = _TICKER_RE.search(texts)
+        ticker = match.group(1) if match else "600519"
+        industry = _INDUSTRY_RE.search(texts)
+        company = COMPANY_NAMES.get(ticker, f"公司{ticker}")
+
+        if agent == "coordinator_agent":
+            called = _called(llm_request)
+            plan = [
+                ("get_current_time", {}),
+                ("google_search_agent", {"request": f"{ticker} 公司名称"}),
+                ("equity_research_pipeline", {"request": ticker}),
+                ("combine_reports", {"provided_ticker": ticker, "company_name": company}),
+            ]
+            for name, args in plan:
+                if name not in called:
+                    return _call_response(name, args)
+            return _text_response(f"{company}（{ticker}）研究报告已生成。")
+        if agent in ("google_search_agent", "google_search_agent_for_policy"):
+            return _text_response(f"{ticker},{company}")
+        if self.call_tools and llm_request.tools_dict:
+            called = _called(llm_request)
+            pending = [(name, args) for name, args in tool_plan(agent, ticker, industry and industry.group(1))
+                       if name in llm_request.tools_dict and name not in called]
+            if pending:
+                return _calls_response(pending)
+        title = SECTION_TITLES.get(agent, agent)
+        body = "（模拟输出）\n"
+        if self.section_chars > len(body):
+            line = f"- {company} 模拟分析要点，仅用于压测。\n"
+            body += line * ((self.section_chars - len(body)) // len(line))
+        return _text_response(f"# {title}：{company}（{ticker}）\n\n{body}")
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+def install_mock_model(agent: BaseAgent, llm: BaseLlm) -> None:
+    """Point every LlmAgent reachable from `agent` (sub-agents, AgentTools, lookup agents) at `llm`."""
+    seen: set[int] = set()
+
+    def visit(node: BaseAgent | None) -> None:
+        if node is None or id(node) in seen:
+            return
+        seen.add(id(node))
+        if isinstance(node, LlmAgent):
+            node.model = llm
+            for tool in node.tools:
+                if isinstance(tool, AgentTool):
+                    visit(tool.agent)
+        visit(getattr(node, "lookup_agent", None))
+        for sub in node.sub_agents:
+            visit(sub)
+
+    visit(agent)
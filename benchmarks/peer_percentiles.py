@@ -0,0 +1,142 @@
+"""
+Industry peer table: companies re-fetched per refresh, and lookup latency.
+
+Replays two nights of a synthetic market of --companies companies in 10
+industries. On the first night the table is built from scratch. On the second,
+--newly-reported more companies have published the latest quarter in
+ak.stock_yjbb_em, and only those should be re-fetched. Prints the
+stock_financial_analysis_indicator calls per night, the table size and the
+median get_industry_percentiles latency. It also checks percentiles, medians
+and quartiles against a direct computation over the industry's rows, and exits
+with status 1 on any mismatch.
+
+    python -m benchmarks.peer_percentiles --companies 2000 --newly-reported 0.2
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import earnings_reports, financial_indicators
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.config import PEER_HISTORY_YEARS, PEER_RATIOS
+from stock_analysis_agent.sub_agents.fundamental_agent import peers
+from stock_analysis_agent.sub_agents.fundamental_agent.peers import PeerTable, refresh_peer_table, report_periods
+
+TODAY = "2026-05-10"            # Q1 reports are being published; the annual reports are out
+
+
+def indicators(code: str, latest: str, start_year: str) -> pd.DataFrame:
+    """Quarterly indicators of `code` up to the `latest` quarter end (YYYYMMDD)."""
+    frame = financial_indicators(code, quarters=16, end_year=int(latest[:4]) - (latest[4:] != "1231"))
+    if latest[4:] != "1231":
+        extra = financial_indicators(f"{code}{latest}", quarters=1, end_year=int(latest[:4]))
+        extra["日期"] = [pd.Timestamp(latest).date()]
+        frame = pd.concat([frame, extra], ignore_index=True)
+    return frame[pd.to_datetime(frame["日期"]).dt.year >= int(start_year)].reset_index(drop=True)
+
+
+def record_night(fixtures: str, names: dict, reported: set, periods: list[str], start_year: str, changed) -> None:
+    latest, previous = periods
+    upstream.save_fixture("stock_yjbb_em", {"date": latest},
+                          earnings_reports({c: names[c] for c in names if c in reported}, latest), fixtures)
+    upstream.save_fixture("stock_yjbb_em", {"date": previous}, earnings_reports(names, previous), fixtures)
+    for code in changed:
+        upstream.save_fixture("stock_financial_analysis_indicator", {"symbol": code, "start_year": start_year},
+                              indicators(code, latest if code in reported else previous, start_year), fixtures)
+
+
+def direct_check(table: PeerTable, codes: list[str]) -> list[str]:
+    """Percentiles / quartiles from the lookup vs. a direct computation over the stored rows."""
+    frame = table.frame()
+    problems = []
+    for code in codes:
+        found = table.lookup(code)
+        for day, ratios in found["reports"].items():
+            peers_rows = frame[(frame["industry"] == found["industry"]) & (frame["date"] == pd.Timestamp(day))]
+            for ratio, stats in ratios.items():
+                values = peers_rows[ratio].dropna().to_numpy()
+                expected = {
+                    "industry_percentile": round(float((values <= stats["value"] + 1e-9).mean() * 100), 2),
+                    "industry_median": round(float(np.median(values)), 2),
+                    "industry_p25": round(float(np.percentile(values, 25)), 2),
+                    "peers": len(values),
+                }
+                for key, value in expected.items():
+                    if abs(stats[key] - value) > 0.011:
+                        problems.append(f"{code} {day} {ratio} {key}: {stats[key]} != {value}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--companies", type=int, default=2000)
+    parser.add_argument("--newly-reported", type=float, default=0.2, help="share reporting between the two nights")
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    names = {f"{600000 + i:06d}" if i % 2 else f"{i:06d}": f"公司{i}" for i in range(args.companies)}
+    codes = list(names)
+    periods = report_periods(TODAY)
+    start_year = str(int(periods[0][:4]) - PEER_HISTORY_YEARS)
+    rng = np.random.default_rng(0)
+    order = rng.permutation(codes)
+    night1 = set(order[:int(len(codes) * 0.4)])
+    night2 = night1 | set(order[int(len(codes) * 0.4):int(len(codes) * (0.4 + args.newly_reported))])
+
+    calls = 0
+    load = upstream.load_fixture
+
+    def counting(function, *a, **kw):
+        nonlocal calls
+        calls += function == "stock_financial_analysis_indicator"
+        return load(function, *a, **kw)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        upstream.load_fixture = counting
+        table = peers._table = PeerTable(os.path.join(tmp, "fundamental_peers.npz"))
+        try:
+            for night, reported, changed in ((1, night1, codes), (2, night2, sorted(night2 - night1))):
+                record_night(fixtures, names, reported, periods, start_year, changed)
+                calls = 0
+                summary = refresh_peer_table(today=TODAY, table=table)
+                expected_calls = len(changed)
+                print(f"night {night}: {calls} indicator fetches (expected {expected_calls}), "
+                      f"{summary['rows']} rows, {summary['seconds']:.1f}s")
+                if calls != expected_calls:
+                    failures.append(f"night {night}: {calls} fetches, expected {expected_calls}")
+        finally:
+            upstream.load_fixture = load
+
+        print(f"table: {os.path.getsize(table.path) / 1024:.0f} KiB for {len(PEER_RATIOS)} ratios")
+        samples = []
+        for i in range(args.lookups):
+            start = time.perf_counter()
+            peers.get_industry_percentiles(codes[i % len(codes)])
+            samples.append(time.perf_counter() - start)
+        print(f"get_industry_percentiles: median {statistics.median(samples) * 1e6:.0f} us "
+              f"(instead of ~{len(codes) // 10} peer fetches at request time)")
+        sample = list(order[:10]) + list(order[-10:])
+        problems = direct_check(table, sample)
+        print(f"percentiles vs. direct computation ({len(sample)} companies): "
+              f"{'OK' if not problems else f'{len(problems)} mismatches'}")
+        failures += problems
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures[:10]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Policy search fan-out benchmark against the local search stand-in.
+
+Compares one search per aspect, awaited sequentially (the old per-aspect
+google_search_agent_for_policy turns), with a single search_policy_batch
+call, and then shows the second ticker in the same industry served from the
+policy evidence store.
+
+    python -m benchmarks.policy_fanout --aspects 6 --queries-per-aspect 2 --latency 1.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# keep the benchmark's evidence store out of the real cache
+os.environ.setdefault("EQUI_CACHE_DIR", tempfile.mkdtemp(prefix="equi_bench_"))
+
+from benchmarks.search_standin import StandInSearchBackend
+from stock_analysis_agent.sub_agents.policy_agent import tools
+
+ASPECTS = ["宏观经济政策", "行业监管政策", "地方及区域政策", "外部贸易与国际政策", "环保与安全监管政策", "社会民生与消费政策"]
+
+
+async def run(args) -> None:
+    topics, queries = [], []
+    for aspect in ASPECTS[:args.aspects]:
+        for i in range(args.queries_per_aspect):
+            topics.append(aspect)
+            queries.append(f"{aspect} 新能源汽车 {i}")
+
+    backend = StandInSearchBackend(latency=args.latency)
+    tools.set_search_backend(backend)
+
+    start = time.perf_counter()
+    for query in queries:
+        await backend.search(query)
+    sequential = time.perf_counter() - start
+    print(f"sequential:      {len(queries)} searches in {sequential:.2f}s")
+
+    backend.calls = backend.max_in_flight = 0
+    start = time.perf_counter()
+    first = await tools.search_policy_batch(f"bench-{time.time()}", topics, queries)
+    batched = time.perf_counter() - start
+    print(f"batch (cold):    {backend.calls} searches in {batched:.2f}s, "
+          f"max {backend.max_in_flight} in flight, stats={first['stats']}")
+
+    backend.calls = 0
+    start = time.perf_counter()
+    second = await tools.search_policy_batch(first["industry"], topics, queries)
+    print(f"batch (2nd ticker, same industry): {backend.calls} searches in "
+          f"{time.perf_counter() - start:.3f}s, stats={second['stats']}")
+    print(f"speed-up cold batch vs sequential: {sequential / batched:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--aspects", type=int, default=6)
+    parser.add_argument("--queries-per-aspect", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per stand-in search")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Price store: rows downloaded after a corporate action, and the cost of adjusting at read time.
+
+Builds a synthetic --bars day history with --actions dividends / splits, then
+simulates two days of reports for one ticker through daily_bars() with
+PRICE_SOURCE="store": day 0 fills the store (full unadjusted history plus the
+hfq factor series); on day 1 one new bar arrives and it is an ex-date, so the
+whole qfq history changes. The factors fetched on day 0 are still fresh, so the
+store must notice the ex-date from the new bar's 涨跌幅. The first day-1 report
+still gets the day-0 factor series (published late), so the ex-date must stay
+pending and be re-fetched by the second report, whose bars no longer show it.
+Prints the rows fetched from AkShare on day 1 by the store (the new bar, the
+re-fetched last day and the factor series, twice) against a full qfq
+re-download, and the median time of a read with qfq / hfq applied.
+
+Checks the adjusted prices against an independent merge_asof computation, that
+the latest qfq bar equals the unadjusted one, and that the ex-dates found from
+涨跌幅 over the whole history are exactly the factor dates. Exits with status 1
+on any mismatch.
+
+    python -m benchmarks.price_store --bars 8000 --actions 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import adjustment_factors, ohlcv, unadjusted
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.technical_agent import bars as daily
+from stock_analysis_agent.sub_agents.technical_agent import store as price_store
+from stock_analysis_agent.sub_agents.technical_agent.store import PRICE_COLUMNS, PriceStore
+
+SYMBOL = "600519"
+
+
+def hist_kwargs(start_date: str, end_date: str, adjust: str) -> dict:
+    return dict(symbol=SYMBOL, period="daily", start_date=start_date, end_date=end_date, adjust=adjust)
+
+
+def reference(raw: pd.DataFrame, factors: pd.DataFrame, adjust: str) -> pd.DataFrame:
+    """Adjusted prices via merge_asof, independently of adjust_prices()."""
+    left = raw.assign(_date=pd.to_datetime(raw["日期"]))
+    right = factors.assign(_date=pd.to_datetime(factors["date"])).sort_values("_date")[["_date", "hfq_factor"]]
+    merged = pd.merge_asof(left, right, on="_date")
+    scale = merged["hfq_factor"].fillna(right["hfq_factor"].iloc[0]).astype(float)
+    if adjust == "qfq":
+        scale = scale / float(right["hfq_factor"].iloc[-1])
+    return pd.DataFrame({column: raw[column] * scale for column in PRICE_COLUMNS})
+
+
+def compare(label: str, got: pd.DataFrame, expected: pd.DataFrame) -> list[str]:
+    if len(got) != len(expected):
+        return [f"{label}: {len(got)} rows, expected {len(expected)}"]
+    worst = max(float(np.max(np.abs(got[c].to_numpy(float) - expected[c].to_numpy(float)))) for c in PRICE_COLUMNS)
+    return [] if worst < 1e-9 else [f"{label}: prices differ by up to {worst:.3g}"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, default=8000)
+    parser.add_argument("--actions", type=int, default=30, help="dividends / splits before the last day")
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    history = ohlcv(SYMBOL, args.bars + 1)
+    dates = pd.to_datetime(history["日期"])
+    factors_before = adjustment_factors(SYMBOL, dates.iloc[:-1], args.actions)
+    factors_after = pd.concat([pd.DataFrame({"date": [dates.iloc[-1]],
+                                             "hfq_factor": [round(factors_before["hfq_factor"].iloc[0] * 1.05, 4)]}),
+                               factors_before], ignore_index=True)
+    raw = unadjusted(history, factors_after)
+    day0, day1 = (d.strftime("%Y%m%d") for d in dates.iloc[-2:])
+
+    fetched: dict[str, int] = {}
+    load = upstream.load_fixture
+
+    def counting(function, *a, **kw):
+        df = load(function, *a, **kw)
+        fetched[function] = fetched.get(function, 0) + len(df)
+        return df
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        factor_kwargs = dict(symbol=daily.market_symbol(SYMBOL), adjust="hfq-factor")
+        upstream.save_fixture("stock_zh_a_hist", hist_kwargs(daily.HISTORY_START_DATE, day0, ""),
+                              raw.iloc[:-1], fixtures)
+        upstream.save_fixture("stock_zh_a_hist", hist_kwargs(day0, day1, ""), raw.iloc[-2:], fixtures)
+        upstream.save_fixture("stock_zh_a_hist", hist_kwargs(day1, day1, ""), raw.iloc[-1:], fixtures)
+        upstream.save_fixture("stock_zh_a_hist", hist_kwargs(daily.HISTORY_START_DATE, day1, "qfq"), history, fixtures)
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        upstream.load_fixture = counting
+
+        store = price_store._store = PriceStore(os.path.join(tmp, "prices.sqlite3"))
+        daily.PRICE_SOURCE = "store"
+        try:
+            upstream.save_fixture("stock_zh_a_daily", factor_kwargs, factors_before, fixtures)
+            before = daily.daily_bars(SYMBOL, day0)
+            failures += compare("day 0 qfq", before, reference(raw.iloc[:-1], factors_before, "qfq"))
+            print(f"day 0 (fill the store): {fetched.get('stock_zh_a_hist', 0)} bars + "
+                  f"{fetched.get('stock_zh_a_daily', 0)} factor rows")
+
+            fetched.clear()
+            daily.daily_bars(SYMBOL, day1)             # factors not published yet: the ex-date stays pending
+            ex_date = dates.iloc[-1].strftime("%Y-%m-%d")
+            if store.pending_ex_date(SYMBOL) != ex_date:
+                failures.append(f"day 1: ex-date {ex_date} missing from the factors but not pending "
+                                f"({store.pending_ex_date(SYMBOL)})")
+            lagging_factors = fetched.get("stock_zh_a_daily", 0)
+
+            upstream.save_fixture("stock_zh_a_daily", factor_kwargs, factors_after, fixtures)
+            daily.clear_daily_bars()
+            after = daily.daily_bars(SYMBOL, day1)
+            store_bars, store_factors = fetched.get("stock_zh_a_hist", 0), fetched.get("stock_zh_a_daily", 0)
+            failures += compare("day 1 qfq", after, reference(raw, factors_after, "qfq"))
+            failures += compare("day 1 hfq", store.adjusted(SYMBOL, "hfq"), reference(raw, factors_after, "hfq"))
+            last_differs = [c for c in PRICE_COLUMNS if after[c].iloc[-1] != raw[c].iloc[-1]]
+            if last_differs:
+                failures.append(f"latest qfq bar differs from the unadjusted one in {last_differs}")
+            if not lagging_factors:
+                failures.append("day 1: ex-date not detected, factors not re-fetched")
+            if store_factors == lagging_factors:
+                failures.append("day 1: pending ex-date not retried, factors not re-fetched")
+            if store.pending_ex_date(SYMBOL) is not None:
+                failures.append("day 1: ex-date still pending after the factors arrived")
+
+            fetched.clear()
+            daily.PRICE_SOURCE = "download"
+            daily.clear_daily_bars()
+            daily.daily_bars(SYMBOL, day1)
+            download_rows = sum(fetched.values())
+            print(f"day 1 (ex-date): store fetches {store_bars} bars + {store_factors} factor rows, "
+                  f"full qfq re-download fetches {download_rows} bars")
+        finally:
+            upstream.load_fixture = load
+
+        for adjust in ("", "qfq", "hfq"):
+            times = []
+            for _ in range(args.reads):
+                start = time.perf_counter()
+                store.adjusted(SYMBOL, adjust)
+                times.append(time.perf_counter() - start)
+            print(f"read {args.bars + 1} bars, adjust={adjust or 'none':<4} {statistics.median(times) * 1e3:7.2f} ms")
+        store.close()
+        price_store._store = None
+
+    found = daily.ex_dates(raw)
+    expected = [d.strftime("%Y-%m-%d") for d in sorted(pd.to_datetime(factors_after["date"])) if d > dates.iloc[0]]
+    print(f"ex-dates from 涨跌幅: {len(found)} found, {len(expected)} in the factor series")
+    if found != expected:
+        failures.append(f"ex-dates from 涨跌幅 differ from the factor dates: "
+                        f"{sorted(set(found) ^ set(expected))[:5]}")
+
+    print("adjusted prices: " + ("OK" if not failures else "; ".join(failures)))
+    if failures:
+        print("FAIL", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
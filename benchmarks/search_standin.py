@@ -0,0 +1,49 @@
+"""
+Local stand-in for the policy search backend.
+
+Returns deterministic results for any query after an injected latency, and
+counts calls so that cache reuse and fan-out can be measured without Google:
+
+    backend = StandInSearchBackend(latency=0.5)
+    set_search_backend(backend)
+"""
+import asyncio
+import hashlib
+from datetime import date, timedelta
+
+from stock_analysis_agent.sub_agents.policy_agent.search import SearchBackend
+
+
+class StandInSearchBackend(SearchBackend):
+
+    def __init__(self, latency: float = 0.0, results_per_query: int = 5, overlap: int = 2):
+        """`overlap` results per query are shared across all queries (same URL), to exercise dedup."""
+        self.latency = latency
+        self.results_per_query = results_per_query
+        self.overlap = overlap
+        self.calls = 0
+        self.queries: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def search(self, query: str) -> list[dict]:
+        self.calls += 1
+        self.queries.append(query)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        digest = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+        results = []
+        for i in range(self.results_per_query):
+            key = f"shared{i}" if i < self.overlap else f"{digest}-{i}"
+            results.append({
+                "title": f"政策文件 {key}",
+                "url": f"https://gov.example.cn/policy/{key}.html",
+                "snippet": f"关于{key}的政策解读：支持行业高质量发展，加大财政补贴与信贷支持力度。",
+                "published_date": (date.today() - timedelta(days=30 * i)).isoformat(),
+            })
+        return results
@@ -0,0 +1,110 @@
+"""
+Signal backtests: vectorized statistics vs. a per-trade loop, for one ticker and the universe.
+
+Times signal_statistics() on one --bars day history and universe_statistics()
+over --tickers histories loaded into a temporary price store (unadjusted bars +
+adjustment factors, read back as qfq), and recomputes the same statistics with
+a plain loop over every event day and horizon. Prints both timings and exits
+with status 1 if any statistic differs.
+
+    python -m benchmarks.signal_backtest --bars 8000 --tickers 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import adjustment_factors, ohlcv, unadjusted
+from stock_analysis_agent import eventlog
+from stock_analysis_agent.config import BACKTEST_HORIZONS
+from stock_analysis_agent.sub_agents.technical_agent.backtest import (
+    DEFAULT_SIGNALS, signal_statistics, universe_statistics,
+)
+from stock_analysis_agent.sub_agents.technical_agent.events import STREAK_EVENTS, event_flags, parse_condition
+from stock_analysis_agent.sub_agents.technical_agent.store import PriceStore
+
+
+def per_trade(frames: list[pd.DataFrame]) -> dict:
+    """signal -> horizon -> (count, mean %, hit rate) from a loop over every event day."""
+    results: dict[str, dict] = {}
+    for df in frames:
+        close = df["收盘"].tolist()
+        flags = event_flags(df)
+        for signal in DEFAULT_SIGNALS:
+            event, days = parse_condition(signal)
+            values = flags[event]
+            for i in range(len(close)):
+                fired = values[i] == days if event in STREAK_EVENTS else bool(values[i])
+                if not fired:
+                    continue
+                for h in BACKTEST_HORIZONS:
+                    if i + h < len(close):
+                        results.setdefault(signal, {}).setdefault(h, []).append(close[i + h] / close[i] - 1)
+    return {signal: {h: (len(r), round(sum(r) / len(r) * 100, 2), round(sum(x > 0 for x in r) / len(r), 3))
+                     for h, r in by_horizon.items()}
+            for signal, by_horizon in results.items()}
+
+
+def compare(stats: dict, expected: dict) -> list[str]:
+    problems = []
+    for signal, by_horizon in expected.items():
+        got = stats["events"].get(signal)
+        for h, (count, mean, hit_rate) in by_horizon.items():
+            entry = got and got[f"{h}d"]
+            if not entry or (entry["count"], entry["mean_pct"], entry["hit_rate"]) != (count, mean, hit_rate):
+                problems.append(f"{signal} {h}d: {entry} vs loop ({count}, {mean}, {hit_rate})")
+    return problems
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, default=8000)
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--universe-bars", type=int, default=1500)
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    df = ohlcv("600519", args.bars)
+    stats, vectorized = timed(signal_statistics, df, list(DEFAULT_SIGNALS))
+    expected, looped = timed(per_trade, [df])
+    failures = compare(stats, expected)
+    print(f"one ticker, {args.bars} bars, {len(DEFAULT_SIGNALS)} signals: vectorized {vectorized * 1e3:.0f} ms, "
+          f"per-trade loop {looped * 1e3:.0f} ms; {'OK' if not failures else f'{len(failures)} mismatches'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(os.path.join(tmp, "prices.sqlite3"))
+        tickers = [f"{600000 + i:06d}" for i in range(args.tickers)]
+        for ticker in tickers:
+            bars = ohlcv(ticker, args.universe_bars)
+            factors = adjustment_factors(ticker, bars["日期"], actions=8)
+            store.add_bars(ticker, unadjusted(bars, factors))
+            store.set_factors(ticker, factors)
+        stats, vectorized = timed(universe_statistics, signals=list(DEFAULT_SIGNALS), store=store)
+        frames, reads = timed(lambda: [store.adjusted(t, "qfq") for t in tickers])
+        expected, looped = timed(per_trade, frames)
+        store.close()
+    universe_failures = compare(stats, expected)
+    failures += universe_failures
+    print(f"universe, {args.tickers} tickers x {args.universe_bars} bars: store reads {reads:.2f}s, then "
+          f"vectorized {vectorized - reads:.2f}s, per-trade loop {looped:.2f}s; "
+          f"{'OK' if not universe_failures else f'{len(universe_failures)} mismatches'}")
+    best = max(stats["events"].items(), key=lambda kv: kv[1]["5d"].get("excess_mean_pct") or -np.inf)
+    print(f"  e.g. {best[0]}: {best[1]['occurrences']} events, 5d {best[1]['5d']}")
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures[:10]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
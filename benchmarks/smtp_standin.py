@@ -0,0 +1,92 @@
+"""
+Minimal local SMTP stand-in server for exercising stock_analysis_agent.mailer.
+
+Speaks just enough ESMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) to accept
+mail on 127.0.0.1 without TLS or auth. Messages are counted, not stored, unless
+keep_messages=True. Recipients listed in `reject` get a 550 at RCPT time.
+
+    with SMTPStandIn() as server:
+        pool = SMTPConnectionPool(host="127.0.0.1", port=server.port, starttls=False)
+"""
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self) -> None:
+        stats = self.server.stats
+        with stats["lock"]:
+            stats["sessions"] += 1
+        self._reply("220 standin ESMTP ready")
+        rcpts: list[str] = []
+        while line := self.rfile.readline():
+            cmd = line.decode("utf-8", errors="replace").strip()
+            verb = cmd[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-standin\r\n250-8BITMIME\r\n250 SIZE 104857600\r\n")
+            elif verb == "MAIL":
+                rcpts = []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                addr = cmd.split(":", 1)[1].strip().strip("<>")
+                if addr in self.server.reject:
+                    self._reply("550 No such user")
+                else:
+                    rcpts.append(addr)
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                chunks = [] if self.server.keep_messages else None
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    size += len(data)
+                    if chunks is not None:
+                        chunks.append(data)
+                with stats["lock"]:
+                    stats["messages"] += 1
+                    stats["recipients"] += len(rcpts)
+                    stats["bytes"] += size
+                    if chunks is not None:
+                        self.server.messages.append((list(rcpts), b"".join(chunks)))
+                self._reply("250 OK queued")
+            elif verb == "RSET":
+                rcpts = []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                break
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 reject: set[str] | None = None, keep_messages: bool = False):
+        super().__init__((host, port), _Handler)
+        self.reject = reject or set()
+        self.keep_messages = keep_messages
+        self.messages: list[tuple[list[str], bytes]] = []
+        self.stats = {"lock": threading.Lock(), "sessions": 0, "messages": 0,
+                      "recipients": 0, "bytes": 0}
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,287 @@
+"""
+Synthetic AkShare-shaped DataFrames.
+
+Each generator returns a frame with the columns (and the Chinese column names)
+of the ak.* function it stands in for, filled with a seeded random walk so
+results are reproducible. SYNTHETIC_FRAMES maps the akshare function name to its
+generator; record_fixtures() writes one fixture per function and ticker so the
+tools can run in AKSHARE_MODE=replay without a recording from the live endpoints.
+minute_bars() builds one trading day of 1-minute bars; adjustment_factors() and
+unadjusted() build a factor series and the matching unadjusted prices;
+earnings_reports() and fund_flow_rank() build the market-wide 业绩报表 of one
+report period and the market-wide fund flows of one day;
+report_sections() builds Markdown report sections of a given page count.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from stock_analysis_agent import upstream
+
+FINANCIAL_INDICATOR_COLUMNS = 86
+FINANCIAL_RATIO_NAMES = (            # the first columns carry real ak.stock_financial_analysis_indicator names
+    "净资产收益率(%)", "加权净资产收益率(%)", "总资产净利润率(%)", "销售毛利率(%)", "销售净利率(%)",
+    "主营业务收入增长率(%)", "净利润增长率(%)", "资产负债率(%)", "流动比率", "速动比率", "总资产周转率(次)",
+    "存货周转率(次)",
+)
+INDUSTRIES = ("酿酒行业", "银行", "半导体", "医疗器械", "电力行业", "汽车整车", "光伏设备", "证券", "中药", "软件开发")
+
+
+def _rng(symbol: str, salt: int = 0) -> np.random.Generator:
+    return np.random.default_rng(int(symbol) * 31 + salt if symbol.isdigit() else salt)
+
+
+def _trading_days(bars: int, end: date | None = None) -> pd.DatetimeIndex:
+    return pd.bdate_range(end=pd.Timestamp(end or date.today()), periods=bars)
+
+
+def ohlcv(symbol: str, bars: int = 2000, end: date | None = None) -> pd.DataFrame:
+    """Like ak.stock_zh_a_hist(period="daily"): one row per trading day."""
+    rng = _rng(symbol)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, bars)))
+    open_ = close * (1 + rng.normal(0, 0.005, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, bars))
+    volume = rng.integers(10_000, 2_000_000, bars)
+    prev = np.concatenate(([close[0]], close[:-1]))
+    return pd.DataFrame({
+        "日期": _trading_days(bars, end).date,
+        "股票代码": symbol,
+        "开盘": open_.round(2),
+        "收盘": close.round(2),
+        "最高": high.round(2),
+        "最低": low.round(2),
+        "成交量": volume,
+        "成交额": (volume * close * 100).round(1),
+        "振幅": ((high - low) / prev * 100).round(2),
+        "涨跌幅": ((close / prev - 1) * 100).round(2),
+        "涨跌额": (close - prev).round(2),
+        "换手率": rng.uniform(0.1, 5, bars).round(2),
+    })
+
+
+def adjustment_factors(symbol: str, dates, actions: int = 12) -> pd.DataFrame:
+    """Like ak.stock_zh_a_daily(adjust="hfq-factor"): cumulative hfq factor from each ex-date, newest first."""
+    rng = _rng(symbol, 7)
+    dates = pd.to_datetime(pd.Series(dates)).sort_values()
+    ex_dates = sorted(rng.choice(dates.iloc[1:].to_numpy(), size=min(actions, len(dates) - 1), replace=False))
+    factors = np.cumprod(np.concatenate(([1.0], 1 + rng.uniform(0.005, 0.3, len(ex_dates)))))
+    frame = pd.DataFrame({"date": [dates.iloc[0], *ex_dates], "hfq_factor": factors.round(4)})
+    return frame.iloc[::-1].reset_index(drop=True)
+
+
+def unadjusted(bars: pd.DataFrame, factors: pd.DataFrame) -> pd.DataFrame:
+    """Unadjusted (adjust="") prices for `bars` read as hfq prices under `factors`.
+
+    涨跌幅 is recomputed from the rounded closes against the ex-rights previous close, as the exchange reports it.
+    """
+    ordered = factors.sort_values("date")
+    index = np.searchsorted(ordered["date"].to_numpy(), pd.to_datetime(bars["日期"]).to_numpy(), side="right") - 1
+    scale = ordered["hfq_factor"].to_numpy()[np.clip(index, 0, None)]
+    raw = bars.copy()
+    for column in ("开盘", "收盘", "最高", "最低", "涨跌额"):
+        raw[column] = (bars[column] / scale).round(2)
+    close = raw["收盘"].to_numpy(float)
+    pre_close = np.concatenate((close[:1], (close[:-1] * scale[:-1] / scale[1:]).round(2)))
+    raw["涨跌幅"] = ((close / pre_close - 1) * 100).round(2)
+    return raw
+
+
+def minute_bars(symbol: str, day: date | None = None, start_price: float = 50.0) -> pd.DataFrame:
+    """Like ak.stock_zh_a_hist_min_em(period="1"): 09:30 auction bar, 09:31-11:30 and 13:01-15:00."""
+    day = pd.Timestamp(day or date.today())
+    rng = _rng(symbol, 6 + day.toordinal())
+    minutes = [570] + list(range(571, 691)) + list(range(781, 901))
+    count = len(minutes)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.0015, count)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, count))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, count))
+    volume = rng.integers(100, 20_000, count)
+    return pd.DataFrame({
+        "时间": [day + pd.Timedelta(minutes=m) for m in minutes],
+        "开盘": open_.round(2),
+        "收盘": close.round(2),
+        "最高": high.round(2),
+        "最低": low.round(2),
+        "成交量": volume,
+        "成交额": (volume * close * 100).round(1),
+        "均价": close.round(3),
+    })
+
+
+def fund_flow(symbol: str, days: int = 120, end: date | None = None) -> pd.DataFrame:
+    """Like ak.stock_individual_fund_flow: daily net inflow by order size."""
+    rng = _rng(symbol, 1)
+    frame = {"日期": _trading_days(days, end).date,
+             "收盘价": (50 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))).round(2),
+             "涨跌幅": rng.normal(0, 2, days).round(2)}
+    for size in ("主力", "超大单", "大单", "中单", "小单"):
+        frame[f"{size}净流入-净额"] = rng.normal(0, 5e7, days).round(1)
+        frame[f"{size}净流入-净占比"] = rng.normal(0, 5, days).round(2)
+    return pd.DataFrame(frame)
+
+
+def fund_flow_rank(symbols: dict[str, str], day: date | None = None) -> pd.DataFrame:
+    """Like ak.stock_individual_fund_flow_rank(indicator="今日"): one row per stock (code -> name), by main inflow."""
+    codes = list(symbols)
+    rng = _rng(str(day or date.today()), 8)
+    amount = rng.lognormal(19, 1.2, len(codes))
+    shares = rng.dirichlet(np.ones(4), len(codes)) * rng.normal(0, 0.08, (len(codes), 1))
+    frame = pd.DataFrame({"代码": codes, "名称": list(symbols.values()),
+                          "最新价": rng.lognormal(2.5, 0.8, len(codes)).round(2),
+                          "今日涨跌幅": rng.normal(0, 2.5, len(codes)).round(2)})
+    net = shares * amount[:, None]
+    frame["今日主力净流入-净额"] = (net[:, 0] + net[:, 1]).round(0)
+    frame["今日主力净流入-净占比"] = ((shares[:, 0] + shares[:, 1]) * 100).round(2)
+    for i, size in enumerate(("超大单", "大单", "中单", "小单")):
+        frame[f"今日{size}净流入-净额"] = net[:, i].round(0)
+        frame[f"今日{size}净流入-净占比"] = (shares[:, i] * 100).round(2)
+    frame = frame.sort_values("今日主力净流入-净额", ascending=False, ignore_index=True)
+    frame.insert(0, "序号", np.arange(1, len(frame) + 1))
+    return frame
+
+
+def chip_distribution(symbol: str, days: int = 90, end: date | None = None) -> pd.DataFrame:
+    """Like ak.stock_cyq_em: daily cost distribution."""
+    rng = _rng(symbol, 2)
+    cost = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    frame = {"日期": _trading_days(days, end).date,
+             "获利比例": rng.uniform(0, 1, days).round(4),
+             "平均成本": cost.round(2)}
+    for band, width in (("90", 0.2), ("70", 0.1)):
+        frame[f"{band}成本-低"] = (cost * (1 - width)).round(2)
+        frame[f"{band}成本-高"] = (cost * (1 + width)).round(2)
+        frame[f"{band}集中度"] = rng.uniform(0.05, 0.3, days).round(4)
+    return pd.DataFrame(frame)
+
+
+def institute_holdings(symbol: str, institutions: int = 200) -> pd.DataFrame:
+    """Like ak.stock_institute_hold_detail: one row per holding institution."""
+    rng = _rng(symbol, 3)
+    shares = rng.uniform(1, 5000, institutions).round(2)
+    ratio = rng.uniform(0, 2, institutions).round(4)
+    return pd.DataFrame({
+        "持股机构类型": rng.choice(["基金", "QFII", "社保", "券商", "保险", "信托"], institutions),
+        "持股机构代码": [f"{i:08d}" for i in range(institutions)],
+        "持股机构简称": [f"机构{i}" for i in range(institutions)],
+        "持股机构全称": [f"机构{i}资产管理有限公司" for i in range(institutions)],
+        "持股数": shares,
+        "最新持股数": (shares * rng.uniform(0.8, 1.2, institutions)).round(2),
+        "持股比例": ratio,
+        "最新持股比例": ratio,
+        "占流通股比例": ratio,
+        "最新占流通股比例": ratio,
+        "持股比例增幅": rng.normal(0, 0.1, institutions).round(4),
+        "占流通股比例增幅": rng.normal(0, 0.1, institutions).round(4),
+    })
+
+
+def hsgt_holdings(symbol: str, days: int = 60, end: date | None = None) -> pd.DataFrame:
+    """Like ak.stock_hsgt_individual_detail_em: daily Stock Connect holdings."""
+    rng = _rng(symbol, 4)
+    shares = 1e7 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    value = shares * close
+    frame = pd.DataFrame({
+        "持股日期": _trading_days(days, end).date,
+        "当日收盘价": close.round(2),
+        "当日涨跌幅": rng.normal(0, 2, days).round(2),
+        "机构名称": "香港中央结算有限公司",
+        "持股数量": shares.round(0),
+        "持股市值": value.round(2),
+        "持股数量占A股百分比": rng.uniform(0, 10, days).round(2),
+    })
+    for lag in (1, 5, 10):
+        frame[f"持股市值变化-{lag}日"] = (value - np.roll(value, lag)).round(2)
+    return frame
+
+
+def financial_indicators(symbol: str, quarters: int = 20, end_year: int | None = None) -> pd.DataFrame:
+    """Like ak.stock_financial_analysis_indicator: one row of ~86 ratios per reporting quarter."""
+    rng = _rng(symbol, 5)
+    end_year = end_year or date.today().year - 1
+    days = [f"{end_year - q // 4}-{('12-31', '09-30', '06-30', '03-31')[q % 4]}" for q in range(quarters)]
+    frame = {"日期": [date.fromisoformat(d) for d in reversed(days)]}
+    for i in range(FINANCIAL_INDICATOR_COLUMNS):
+        name = FINANCIAL_RATIO_NAMES[i] if i < len(FINANCIAL_RATIO_NAMES) else f"财务指标{i}(%)"
+        frame[name] = rng.normal(0, 20, quarters).round(4)
+    return pd.DataFrame(frame)
+
+
+def earnings_reports(symbols: dict[str, str], period: str, industries: tuple[str, ...] = INDUSTRIES) -> pd.DataFrame:
+    """Like ak.stock_yjbb_em(date=period): one row per company (code -> name) that published the period."""
+    codes = list(symbols)
+    rng = _rng(period, 6)
+    announced = pd.Timestamp(period) + pd.to_timedelta(rng.integers(10, 60, len(codes)), unit="D")
+    return pd.DataFrame({
+        "序号": np.arange(1, len(codes) + 1),
+        "股票代码": codes,
+        "股票简称": list(symbols.values()),
+        "每股收益": rng.normal(0.5, 0.8, len(codes)).round(4),
+        "营业总收入-营业总收入": rng.lognormal(21, 1.5, len(codes)).round(2),
+        "净利润-净利润": rng.normal(1e8, 5e8, len(codes)).round(2),
+        "所处行业": [industries[int(code) % len(industries)] for code in codes],
+        "最新公告日期": announced.date,
+    })
+
+
+def report_sections(pages: int, company: str = "贵州茅台", ticker: str = "600519") -> dict[str, str]:
+    """Markdown for the four report sections, about `pages` A4 pages in total once rendered.
+
+    Keys are the agent names, as tools.state_sections returns them. Each page is a
+    heading, a paragraph and a ten-row table, like the sub-agents' output.
+    """
+    categories = ("fundamental", "technical", "fund", "policy")
+    paragraph = f"{company}（{ticker}）的模拟分析段落，用于衡量报告渲染耗时。" * 12
+    header = "| 日期 | 收盘 | 涨跌幅 | 成交量 | 主力净流入 | 换手率 |\n|---|---|---|---|---|---|\n"
+    sections = {}
+    for index, category in enumerate(categories):
+        count = pages // len(categories) + (index < pages % len(categories))
+        parts = [f"# {category} 分析：{company}（{ticker}）\n"]
+        for page in range(count):
+            rows = "".join(f"| 2025-05-{day:02d} | {1500 + day}.00 | {day / 10:.2f}% | {day * 1000} | "
+                           f"{day * 1e6:.0f} | {day / 20:.2f}% |\n" for day in range(1, 11))
+            parts.append(f"## 第 {page + 1} 节\n\n{paragraph}\n\n{header}{rows}")
+        sections[f"{category}_agent"] = "\n".join(parts)
+    return sections
+
+
+def a_share_names(symbols: dict[str, str]) -> pd.DataFrame:
+    """Like ak.stock_info_a_code_name."""
+    return pd.DataFrame({"code": list(symbols), "name": list(symbols.values())})
+
+
+SYNTHETIC_FRAMES = {
+    "stock_zh_a_hist": ohlcv,
+    "stock_individual_fund_flow": fund_flow,
+    "stock_cyq_em": chip_distribution,
+    "stock_institute_hold_detail": institute_holdings,
+    "stock_hsgt_individual_detail_em": hsgt_holdings,
+    "stock_financial_analysis_indicator": financial_indicators,
+}
+
+
+def tool_calls(symbol: str, market: str | None = None, start_year: str = "2020") -> dict[str, dict]:
+    """The akshare arguments each tool passes for `symbol`, by akshare function."""
+    market = market or ("sh" if symbol.startswith(("6", "9")) else "sz")
+    return {
+        "stock_zh_a_hist": dict(symbol=symbol, period="daily", start_date="19910101",
+                                end_date=date.today().strftime("%Y%m%d"), adjust="qfq"),
+        "stock_individual_fund_flow": dict(stock=symbol, market=market),
+        "stock_cyq_em": dict(symbol=symbol, adjust=""),
+        "stock_institute_hold_detail": dict(stock=symbol, quarter="20251"),
+        "stock_hsgt_individual_detail_em": dict(symbol=symbol, start_date="20250101", end_date="20250331"),
+        "stock_financial_analysis_indicator": dict(symbol=symbol, start_year=start_year),
+    }
+
+
+def record_fixtures(symbols: dict[str, str], fixture_dir: str, bars: int = 2000) -> list[str]:
+    """Write synthetic fixtures for every tool call on `symbols` (code -> name); returns the paths."""
+    paths = [upstream.save_fixture("stock_info_a_code_name", {}, a_share_names(symbols), fixture_dir)]
+    for symbol in symbols:
+        for function, kwargs in tool_calls(symbol).items():
+            frame = ohlcv(symbol, bars) if function == "stock_zh_a_hist" else SYNTHETIC_FRAMES[function](symbol)
+            paths.append(upstream.save_fixture(function, kwargs, frame, fixture_dir))
+    return paths
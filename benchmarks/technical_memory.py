@@ -0,0 +1,99 @@
+"""
+Peak memory and time of calculate_technical_indicators in full, tail and lean mode.
+
+Replays synthetic price histories of each size, runs the tool in each mode
+(TECHNICAL_TAIL_MODE / TECHNICAL_LEAN_MODE) under tracemalloc, and prints the
+peak traced memory, the wall time and how many output values differ from the
+full evaluation. Tail mode must match it exactly (exit status 1 otherwise);
+lean mode's float32 rounding can move a value by 0.01.
+
+    python -m benchmarks.technical_memory --bars 250 2000 8000 --days 9 30
+"""
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import record_fixtures
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.technical_agent import bars as daily
+from stock_analysis_agent.sub_agents.technical_agent import tools
+
+SYMBOL = "600519"
+
+
+MODES = ("full", "tail", "lean")
+
+
+def measure(mode: str) -> tuple[dict, int, float]:
+    """(result, peak traced bytes, seconds) for one call."""
+    tools.TECHNICAL_TAIL_MODE = mode == "tail"
+    tools.TECHNICAL_LEAN_MODE = mode == "lean"
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = tools.calculate_technical_indicators(SYMBOL)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if "error" in result or result.get("status") == "error":
+        raise SystemExit(f"calculate_technical_indicators failed: {result}")
+    return result, peak, elapsed
+
+
+def differences(full: dict, lean: dict) -> tuple[int, int, float]:
+    """(values compared, values that differ, largest numeric difference)."""
+    compared = differ = 0
+    largest = 0.0
+    for day, row in full.items():
+        for key, value in row.items():
+            other = lean[day][key]
+            compared += 1
+            if isinstance(value, float) and isinstance(other, float):
+                if math.isnan(value) and math.isnan(other):
+                    continue
+                largest = max(largest, abs(value - other))
+            if value != other:
+                differ += 1
+    return compared, differ, largest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, nargs="+", default=[250, 2000, 8000])
+    parser.add_argument("--days", type=int, nargs="+", default=[9], help="output windows (TECHNICAL_OUTPUT_DAYS)")
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    upstream.AKSHARE_MODE = "replay"
+    upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+    mismatches = []
+    print(f"{'bars':>6} {'days':>5} {'mode':>5} {'peak':>10} {'time':>9}  differing values")
+    for bars in args.bars:
+        with tempfile.TemporaryDirectory() as fixtures:
+            record_fixtures({SYMBOL: "贵州茅台"}, fixtures, bars)
+            upstream.AKSHARE_FIXTURE_DIR = fixtures
+            daily.clear_daily_bars()          # cached by (ticker, date): the previous scale's bars otherwise
+            for days in args.days:
+                tools.TECHNICAL_OUTPUT_DAYS = days
+                measure("lean")  # warm-up: imports and pandas caches outside the measurement
+                full = None
+                for mode in MODES:
+                    result, peak, elapsed = measure(mode)
+                    full = full or result
+                    compared, differ, largest = differences(full, result)
+                    print(f"{bars:>6} {days:>5} {mode:>5} {peak / 2**20:8.2f}MB {elapsed:8.3f}s  "
+                          f"{differ}/{compared} (max {largest:.4g})")
+                    # tail mode: same values, keys and order, down to the serialized JSON
+                    if mode == "tail" and (json.dumps(result, ensure_ascii=False, default=str)
+                                           != json.dumps(full, ensure_ascii=False, default=str)):
+                        mismatches.append(f"{bars} bars, {days} days")
+    if mismatches:
+        print(f"FAIL: tail mode differs from full evaluation at {', '.join(mismatches)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
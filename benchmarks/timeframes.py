@@ -0,0 +1,131 @@
+"""
+Weekly / monthly resampling: cost per report, the in-progress flag, and upstream calls.
+
+Times resample_bars and the indicator set per timeframe on synthetic daily
+histories of --bars days, checks resample_bars against a pandas groupby over the
+same calendar weeks / months, and checks which week / month open_period reports
+as still in progress at fixed points of a trading week (a Friday after the close
+completes the week, the last weekday after the close completes the month).
+Prints the number of stock_zh_a_hist calls made when both technical tools run
+for one ticker (1: the daily series is shared).
+
+    python -m benchmarks.timeframes --bars 2000 8000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import ohlcv, record_fixtures
+from stock_analysis_agent import eventlog, upstream
+from stock_analysis_agent.sub_agents.technical_agent import bars as daily
+from stock_analysis_agent.sub_agents.technical_agent.timeframes import (
+    TIMEFRAMES, calculate_multi_timeframe_indicators, open_period, period_keys, resample_bars, timeframe_indicators,
+)
+from stock_analysis_agent.sub_agents.technical_agent import tools as technical
+
+SYMBOL = "600519"
+
+# (Shanghai time, timeframe, period expected to be open: the date's week / month, or None)
+OPEN_PERIODS = [
+    ("2026-10-14 10:00", "weekly", "2026-10-14"),    # Wednesday in session
+    ("2026-10-16 14:59", "weekly", "2026-10-16"),    # Friday before the close
+    ("2026-10-16 15:30", "weekly", None),            # Friday after the close
+    ("2026-10-17 09:00", "weekly", None),            # Saturday
+    ("2026-10-16 15:30", "monthly", "2026-10-16"),   # weekdays left in October
+    ("2026-10-30 14:00", "monthly", "2026-10-30"),   # last weekday of October, in session
+    ("2026-10-30 15:30", "monthly", None),           # ... after the close
+    ("2026-10-31 09:00", "monthly", None),           # Saturday the 31st
+]
+
+
+def check_resample(history, repeat: int = 5) -> tuple[dict, list[str]]:
+    """Median seconds per step, by label, and the timeframes where resample_bars disagrees with a groupby."""
+    times: dict[str, list[float]] = {}
+    failures = []
+    for timeframe in TIMEFRAMES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            bars = resample_bars(history, timeframe)
+            times.setdefault(f"{timeframe} resample", []).append(time.perf_counter() - start)
+            start = time.perf_counter()
+            timeframe_indicators(bars)
+            times.setdefault(f"{timeframe} indicators", []).append(time.perf_counter() - start)
+        grouped = history.groupby(period_keys(history["日期"], timeframe), sort=True).agg(
+            日期=("日期", "last"), 开盘=("开盘", "first"), 收盘=("收盘", "last"), 最高=("最高", "max"),
+            最低=("最低", "min"), 成交量=("成交量", "sum"))
+        got = bars[list(grouped.columns)].reset_index(drop=True)
+        expected = grouped.reset_index(drop=True)
+        if not got.equals(expected.astype(got.dtypes.to_dict())):
+            failures.append(f"{timeframe}: resample_bars differs from a groupby over the same periods")
+    return {label: statistics.median(samples) for label, samples in times.items()}, failures
+
+
+def check_open_periods() -> list[str]:
+    failures = []
+    for now, timeframe, expected in OPEN_PERIODS:
+        got = open_period(timeframe, pd.Timestamp(now, tz="Asia/Shanghai"))
+        want = None if expected is None else period_keys([expected], timeframe)[0]
+        if got != want:
+            failures.append(f"{timeframe} at {now}: open period {got}, expected {want}")
+    return failures
+
+
+def upstream_calls() -> int:
+    """stock_zh_a_hist calls when both technical tools run once for SYMBOL."""
+    calls = 0
+    load = upstream.load_fixture
+
+    def counting(function, *args, **kwargs):
+        nonlocal calls
+        calls += function == "stock_zh_a_hist"
+        return load(function, *args, **kwargs)
+
+    upstream.load_fixture = counting
+    try:
+        daily.clear_daily_bars()
+        for tool in (technical.calculate_technical_indicators, calculate_multi_timeframe_indicators):
+            result = tool(SYMBOL)
+            if "error" in result or result.get("status") == "error":
+                raise SystemExit(f"{tool.__name__} failed: {result}")
+    finally:
+        upstream.load_fixture = load
+    return calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, nargs="+", default=[2000, 8000])
+    args = parser.parse_args()
+
+    eventlog._event_log = eventlog.EventLog(sinks=[])
+    failures = []
+    for bars in args.bars:
+        medians, failed = check_resample(ohlcv(SYMBOL, bars))
+        failures += failed
+        print(f"{bars} daily bars: {'OK' if not failed else f'{len(failed)} mismatches'}")
+        for label, seconds in medians.items():
+            print(f"  {label:<28} {seconds * 1e3:8.2f} ms")
+    failed = check_open_periods()
+    failures += failed
+    print(f"in-progress week / month at {len(OPEN_PERIODS)} points in time: "
+          f"{'OK' if not failed else f'{len(failed)} wrong'}")
+
+    with tempfile.TemporaryDirectory() as fixtures:
+        record_fixtures({SYMBOL: "贵州茅台"}, fixtures, args.bars[0])
+        upstream.AKSHARE_MODE = "replay"
+        upstream.AKSHARE_FIXTURE_DIR = fixtures
+        upstream.AKSHARE_REPLAY_LATENCY = {"default": 0.0}
+        technical.TECHNICAL_TAIL_MODE = True  # only the upstream calls matter here
+        print(f"stock_zh_a_hist calls for daily + weekly + monthly indicators: {upstream_calls()}")
+
+    if failures:
+        print("FAIL:\n" + "\n".join(failures[:5]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Tool response sizes before and after the token budget middleware.
+
+Builds responses shaped like calculate_technical_indicators (9 date-keyed rows of
+~80 indicator columns plus price_hist_over_past_month),
+fetch_stock_financial_indicators (one row of ~86 columns per quarter since
+start_year) and search_policy_batch (--topics topics of --results search results
+each), runs them through payloads.enforce_tool_budget and prints the bytes/tokens
+the model would receive and what was trimmed. Exits with status 1 if a trimmed
+response is over its tool's budget or had to be cut as raw text.
+
+    python -m benchmarks.tool_payloads --quarters 40
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from stock_analysis_agent import eventlog, payloads
+from stock_analysis_agent.config import TOOL_TOKEN_BUDGETS
+
+
+def technical_response(days: int = 9, columns: int = 80) -> dict:
+    rng = random.Random(0)
+    names = ["股票代码", "开盘", "收盘", "最高", "最低", "成交量", "成交额", "振幅", "涨跌幅", "涨跌额", "换手率",
+             "volatility", "RSI", "MACD_diff", "MACD_signal", "MACD_hist", "BB_mid", "BB_std", "BB_upper",
+             "BB_lower", "K", "D", "J", "volume_amplification", "MA5", "MA10", "MA20", "MA30", "MA60",
+             "MA120", "MA250", "量价齐升期间换手率", "量价齐跌期间换手率"]
+    names += [f"指标{i}" for i in range(columns - len(names))]
+    start = date(2025, 5, 1)
+    response = {
+        (start + timedelta(days=i)).isoformat(): {n: round(rng.uniform(0, 2000), 2) for n in names}
+        for i in range(days)
+    }
+    response[max(response)]["price_hist_over_past_month"] = [round(rng.uniform(1400, 1600), 2) for _ in range(20)]
+    return response
+
+
+def fundamental_response(quarters: int, columns: int = 86) -> dict:
+    rng = random.Random(1)
+    names = [f"财务指标{i}(%)" for i in range(columns)]
+    rows = {}
+    for q in range(quarters):
+        year, quarter = 2025 - q // 4, 4 - q % 4
+        day = {1: "03-31", 2: "06-30", 3: "09-30", 4: "12-31"}[quarter]
+        rows[f"{year}-{day}"] = {n: f"{rng.uniform(-50, 50):.4f}" for n in names}
+    return rows
+
+
+def policy_batch_response(topics: int, results: int) -> dict:
+    rng = random.Random(2)
+    return {
+        "status": "success", "industry": "白酒",
+        "topics": {f"政策维度{t}": {"source": "search", "results": [
+            {"title": f"关于推动行业高质量发展的若干意见（{t}-{r}）", "url": f"https://gov.example.cn/{t}/{r}",
+             "snippet": "".join(rng.choice("政策支持行业发展监管消费税收产能") for _ in range(400)),
+             "published_date": None}
+            for r in range(results)]} for t in range(topics)},
+        "stats": {"queries": topics, "searched": topics, "cache_hits": 0, "duplicates_removed": 0},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quarters", type=int, default=40, help="quarters of financial indicators")
+    parser.add_argument("--topics", type=int, default=6, help="policy topics in the search_policy_batch response")
+    parser.add_argument("--results", type=int, default=8, help="search results per policy topic")
+    args = parser.parse_args()
+
+    log = eventlog._event_log = eventlog.EventLog(sinks=[])  # keep trim events in memory
+    cases = [
+        ("calculate_technical_indicators", technical_response()),
+        ("fetch_stock_financial_indicators", fundamental_response(args.quarters)),
+        ("search_policy_batch", policy_batch_response(args.topics, args.results)),
+    ]
+    failures = []
+    for tool_name, response in cases:
+        context = SimpleNamespace(agent_name="bench_agent", invocation_id=uuid.uuid4().hex)
+        size, tokens = payloads.measure(response)
+        start = time.perf_counter()
+        trimmed = payloads.enforce_tool_budget(SimpleNamespace(name=tool_name), {}, context, response)
+        elapsed = time.perf_counter() - start
+        out_size, out_tokens = payloads.measure(trimmed if trimmed is not None else response)
+        actions = trimmed["_budget"]["actions"] if trimmed is not None else []
+        print(f"{tool_name:<34} {size / 1024:7.1f} KB {tokens:7d} tok -> "
+              f"{out_size / 1024:7.1f} KB {out_tokens:7d} tok  {actions}  ({elapsed * 1e3:.1f} ms)")
+        budget = TOOL_TOKEN_BUDGETS.get(tool_name, TOOL_TOKEN_BUDGETS["default"])
+        if out_tokens > budget or "truncated" in actions:
+            failures.append(f"{tool_name}: {out_tokens} tokens (budget {budget}), {actions}")
+    print(f"tool_response_trimmed events: {len(log.recent(event='tool_response_trimmed'))}")
+    if failures:
+        print("FAIL:\n" + "\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
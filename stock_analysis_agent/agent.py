@@ -1,13 +1,18 @@
-from google.adk.agents import LlmAgent, ParallelAgent
+from google.adk.agents import LlmAgent
 from google.adk.tools.agent_tool import AgentTool
-from google.adk.models.lite_llm import LiteLlm
 """
 os: configure/customize
 OPS
 nnnm
 """
 from . import prompt
-from .config import MODEL, GEMINI_LIST
+from .config import COORDINATOR_MODE
+from .models import get_model
+from .deadlines import DeadlineParallelAgent
+from .workflow import WorkflowCoordinator
+from .tracing import setup_tracing
+from .metrics import start_metrics_exporters
+from .callbacks import record_token_usage, profile_tool_start, profile_tool_end
 
 from .sub_agents.fundamental_agent.agent import fundamental_agent
 from .sub_agents.technical_agent.agent import technical_agent
@@ -17,13 +22,13 @@ from .sub_agents.policy_agent.agent import policy_agent
 from .tools import *
 # Import Tools from *
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
-// a
+setup_tracing()  # exporter from TRACE_EXPORTER; no-op when tracing is off
+start_metrics_exporters()  # /metrics endpoint or file dump from METRICS_PORT / METRICS_DUMP_PATH; off by default
 
-analysis_agent = ParallelAgent(
+model_in_use = get_model("coordinator_agent")
+
+
+analysis_agent = DeadlineParallelAgent(
     name="equity_research_pipeline",
     description=(
         "Agent to analyse a stock from fundamental, technical, fund flow, and political perspectives and report findings into a structured detailed Markdown report in Chinese."
@@ -37,7 +42,7 @@ analysis_agent = ParallelAgent(
 )
 
 
-root_agent = LlmAgent(
+coordinator_agent = LlmAgent(
     name="coordinator_agent",
     model=model_in_use,
     description=(
@@ -48,10 +53,27 @@ root_agent = LlmAgent(
            AgentTool(agent=google_search_agent),
            AgentTool(agent=analysis_agent),
            combine_reports],
-    output_key="root_agent_output"
+    output_key="root_agent_output",
+    after_model_callback=record_token_usage,
+    before_tool_callback=profile_tool_start,
+    after_tool_callback=profile_tool_end
 )
 
 
+workflow_coordinator = WorkflowCoordinator(
+    name="workflow_coordinator",
+    description=(
+        "Deterministic coordinator: resolves the ticker, runs the analysis pipeline and consolidates the report without LLM orchestration turns."
+    ),
+    sub_agents=[analysis_agent],
+    lookup_agent=google_search_agent,
+)
+
+
+# Select the coordinator via COORDINATOR_MODE (config.py / EQUI_COORDINATOR_MODE)
+root_agent = workflow_coordinator if COORDINATOR_MODE == "workflow" else coordinator_agent
+
+
 
 
 
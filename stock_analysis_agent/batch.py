@@ -0,0 +1,392 @@
+"""
+Batch report runs for a watchlist.
+
+root_agent 一次对话只分析一只股票。run_batch() 读取自选股清单（每行一个 6 位代码或公司简称），为每只股票运行
+equity_research_pipeline 并生成报告，用于每天早上批量生成数百份报告：
+
+- 共享工作只做一次：A 股代码表与行业表（同行表，未构建时 ak.stock_yjbb_em）在开始前各取一次；全市场资金流快照、
+  技术事件索引和同行表由各自的夜间任务生成，所有报告共用。行业名称随输入传给 policy_agent，同行业股票使用同一
+  行业名称，共用同一份政策检索结果（并发检索同一行业维度时也只搜索一次）
+- 工作队列：BATCH_TICKER_CONCURRENCY 个 worker 依次领取股票；模型请求（BATCH_LLM_CONCURRENCY，经 model_slot）、
+  数据工具调用（BATCH_UPSTREAM_CONCURRENCY 个线程，同步工具不再阻塞事件循环）和 PDF 渲染（BATCH_RENDER_CONCURRENCY）
+  分别限流
+- 进度持久化：每只股票的状态在 BATCH_DIR/<清单名>_<日期>.sqlite3 中逐条提交，进程崩溃后重新运行同一命令即从中断处
+  继续：已完成的股票跳过，失败或中断的股票重新运行，直到 BATCH_MAX_ATTEMPTS 次
+- 结束时输出吞吐（报告/分钟、单只耗时分位数）与失败清单
+
+每份报告的章节从各自会话的 state 读取后直接渲染（render_report），不经过共享的 reports/<agent>_report.md，
+因此并发的报告互不覆盖。
+
+    python -m stock_analysis_agent.batch watchlist.txt
+    python -m stock_analysis_agent.batch watchlist.txt --tickers 16 --llm 12 --upstream 8 --render 2
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import BaseTool
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from .config import (
+    BATCH_DIR, BATCH_LLM_CONCURRENCY, BATCH_MAX_ATTEMPTS, BATCH_RENDER_CONCURRENCY, BATCH_TICKER_CONCURRENCY,
+    BATCH_UPSTREAM_CONCURRENCY, REPORT_DEADLINE_SECONDS,
+)
+from .deadlines import REPORT_DEADLINE_KEY
+from .eventlog import log_event
+from .models import set_model_concurrency
+from .profiling import run_profiled
+from .tools import get_current_time, render_report, state_sections
+from .workflow import lookup_stock
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    ticker       TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    industry     TEXT,
+    position     INTEGER NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    report_path  TEXT,
+    degraded     TEXT,
+    error        TEXT,
+    seconds      REAL,
+    finished_at  REAL
+);
+"""
+
+
+def read_watchlist(path: str) -> list[str]:
+    """Entries of a watchlist file: one 6-digit code or company short name per line; "#" starts a comment."""
+    with open(path, encoding="utf-8") as f:
+        entries = [line.split("#", 1)[0].strip() for line in f]
+    return [entry for entry in entries if entry]
+
+
+def resolve_watchlist(entries: list[str]) -> tuple[list[tuple[str, str]], list[str]]:
+    """(ticker, company name) of each distinct stock in watchlist order, and the entries that could not be resolved."""
+    jobs, seen, unresolved = [], set(), []
+    for entry in entries:
+        resolved = lookup_stock(entry)
+        if resolved is None:
+            unresolved.append(entry)
+        elif resolved[0] not in seen:
+            seen.add(resolved[0])
+            jobs.append(resolved)
+    return jobs, unresolved
+
+
+def progress_path_for(watchlist: str, day: date | None = None) -> str:
+    """BATCH_DIR/<watchlist name>_<YYYYMMDD>.sqlite3: re-running the same watchlist on the same day resumes."""
+    name = os.path.splitext(os.path.basename(watchlist))[0]
+    return os.path.join(BATCH_DIR, f"{name}_{(day or date.today()):%Y%m%d}.sqlite3")
+
+
+class BatchProgress:
+    """Per-ticker state of one batch run (pending / running / done / failed), committed after every change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, jobs: list[tuple[str, str, str | None]]) -> None:
+        """Register (ticker, company name, industry) jobs; tickers already in the run keep their state."""
+        with self._lock, self._conn:
+            start = self._conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM jobs").fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (ticker, company_name, industry, position) VALUES (?, ?, ?, ?)",
+                [(ticker, name, industry, start + i) for i, (ticker, name, industry) in enumerate(jobs)],
+            )
+
+    def runnable(self, max_attempts: int = BATCH_MAX_ATTEMPTS) -> list[dict]:
+        """Jobs still to run, in watchlist order: pending, interrupted ("running" after a crash) or failed,
+        with fewer than `max_attempts` attempts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status != 'done' AND attempts < ? ORDER BY position", (max_attempts,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def start(self, ticker: str) -> None:
+        self._update("UPDATE jobs SET status = 'running', attempts = attempts + 1, error = NULL WHERE ticker = ?",
+                     ticker)
+
+    def finish(self, ticker: str, report_path: str, degraded: dict, seconds: float) -> None:
+        self._update("UPDATE jobs SET status = 'done', report_path = ?, degraded = ?, seconds = ?, finished_at = ? "
+                     "WHERE ticker = ?", report_path, json.dumps(degraded, ensure_ascii=False), seconds, time.time(),
+                     ticker)
+
+    def fail(self, ticker: str, error: str, seconds: float) -> None:
+        self._update("UPDATE jobs SET status = 'failed', error = ?, seconds = ?, finished_at = ? WHERE ticker = ?",
+                     error, seconds, time.time(), ticker)
+
+    def counts(self) -> dict[str, int]:
+        """status -> number of tickers."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def failures(self) -> dict[str, str]:
+        """ticker -> error of every failed ticker."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT ticker, error FROM jobs WHERE status = 'failed' ORDER BY position").fetchall())
+
+    def jobs(self) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute("SELECT * FROM jobs ORDER BY position").fetchall()]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _update(self, sql: str, *params) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+
+# data tools run in this pool while a batch is running (set by run_batch); otherwise they run inline as usual
+_tool_pool: ThreadPoolExecutor | None = None
+
+
+def offload_sync_tools(agent: BaseAgent) -> None:
+    """Run the sync function tools of every LlmAgent under `agent` in the batch's thread pool.
+
+    ADK calls sync tools on the event loop, so one AkShare fetch would stall every other report
+    in the batch. Each is replaced by an async wrapper with the same name, docstring and
+    signature (the FunctionTool declaration is unchanged). Tools taking a tool_context stay on the loop.
+    """
+    seen: set[int] = set()
+
+    def visit(node: BaseAgent | None) -> None:
+        if node is None or id(node) in seen:
+            return
+        seen.add(id(node))
+        if isinstance(node, LlmAgent):
+            node.tools = [_offloaded(tool) for tool in node.tools]
+            for tool in node.tools:
+                if isinstance(tool, AgentTool):
+                    visit(tool.agent)
+        visit(getattr(node, "lookup_agent", None))
+        for sub in node.sub_agents:
+            visit(sub)
+
+    visit(agent)
+
+
+def _offloaded(tool):
+    if (isinstance(tool, BaseTool) or not callable(tool) or inspect.iscoroutinefunction(tool)
+            or "tool_context" in inspect.signature(tool).parameters):
+        return tool
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        if _tool_pool is None:
+            return run_profiled(tool, *args, **kwargs)
+        # copy the context so the tool's span stays under the calling agent's span (and its profile is found)
+        call = functools.partial(contextvars.copy_context().run, run_profiled, tool, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(_tool_pool, call)
+
+    wrapper.profile_in_worker = True  # callbacks.profile_tool_start defers the profile to run_profiled
+    return wrapper
+
+
+def shared_context(entries: list[str]) -> tuple[list[tuple[str, str]], list[str], dict[str, str]]:
+    """Work shared by every report, done once per batch: resolve the watchlist and load the industry table."""
+    from .sub_agents.fund_agent.flow_ranks import industry_map
+
+    jobs, unresolved = resolve_watchlist(entries)   # one stock_info_a_code_name call
+    try:
+        industries = industry_map()                 # peer table, or one stock_yjbb_em call
+    except Exception as e:
+        log_event("batch_industries_unavailable", level="warning", error=f"{type(e).__name__}: {e}")
+        industries = {}
+    return jobs, unresolved, industries
+
+
+async def _report(runner: InMemoryRunner, job: dict, render_pool: ThreadPoolExecutor) -> dict:
+    """Run the pipeline for one ticker in its own session and render its report; returns render_report's dict."""
+    ticker, company_name, industry = job["ticker"], job["company_name"], job["industry"]
+    state = {"provided_ticker": ticker, "company_name": company_name,
+             REPORT_DEADLINE_KEY: time.time() + REPORT_DEADLINE_SECONDS}
+    lines = [f"provided_ticker: {ticker}", f"company_name: {company_name}"]
+    if industry:
+        state["industry"] = industry
+        lines.append(f"industry: {industry}")
+    lines.append(get_current_time()["current date and time"])
+
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="batch", session_id=uuid.uuid4().hex, state=state
+    )
+    try:
+        async for _ in runner.run_async(
+            user_id="batch",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="\n".join(lines))]),
+        ):
+            pass
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="batch", session_id=session.id
+        )
+    finally:
+        await runner.session_service.delete_session(app_name=runner.app_name, user_id="batch", session_id=session.id)
+
+    return await asyncio.get_running_loop().run_in_executor(
+        render_pool, render_report, ticker, company_name, *state_sections(session.state)
+    )
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, min(len(ordered), math.ceil(q / 100 * len(ordered))) - 1)], 2)
+
+
+async def run_batch(
+    entries: list[str],
+    progress_path: str,
+    ticker_concurrency: int = BATCH_TICKER_CONCURRENCY,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+    upstream_concurrency: int = BATCH_UPSTREAM_CONCURRENCY,
+    render_concurrency: int = BATCH_RENDER_CONCURRENCY,
+    max_attempts: int = BATCH_MAX_ATTEMPTS,
+    pipeline: BaseAgent | None = None,
+) -> dict:
+    """Generate a report for every stock in `entries` (codes or short names), resuming from `progress_path`.
+
+    One batch per process: the tool thread pool and the model limit (llm_concurrency per model,
+    for event loops that have not called a model yet) are process-wide. Returns the throughput
+    and failure summary.
+    """
+    global _tool_pool
+
+    if pipeline is None:
+        from .agent import analysis_agent as pipeline
+    set_model_concurrency({"default": llm_concurrency})
+    os.makedirs("reports", exist_ok=True)   # save_agent_output still writes the latest sections there
+
+    start = time.perf_counter()
+    jobs, unresolved, industries = await asyncio.to_thread(shared_context, entries)
+    progress = BatchProgress(progress_path)
+    progress.add([(ticker, name, industries.get(ticker)) for ticker, name in jobs])
+    already_done = progress.counts().get("done", 0)
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in progress.runnable(max_attempts):
+        queue.put_nowait(job)
+    log_event("batch_started", progress_path=progress_path, tickers=len(jobs), queued=queue.qsize(),
+              already_done=already_done, unresolved=len(unresolved), industries=len(industries))
+
+    runner = InMemoryRunner(agent=pipeline, app_name="batch")
+    latencies: list[float] = []
+    degraded: dict[str, list[str]] = {}
+
+    async def worker() -> None:
+        while not queue.empty():
+            job = queue.get_nowait()
+            ticker = job["ticker"]
+            progress.start(ticker)
+            job_start = time.perf_counter()
+            try:
+                result = await _report(runner, job, render_pool)
+                error = None if result.get("status") == "success" else result.get("error_message")
+            except Exception as e:
+                result, error = {}, f"{type(e).__name__}: {e}"
+            seconds = round(time.perf_counter() - job_start, 2)
+            if error:
+                progress.fail(ticker, error, seconds)
+                log_event("batch_ticker_failed", level="error", ticker=ticker, error=error, seconds=seconds)
+                continue
+            progress.finish(ticker, result["report_path"], result["degraded_sections"], seconds)
+            latencies.append(seconds)
+            if result["degraded_sections"]:
+                degraded[ticker] = sorted(result["degraded_sections"])
+            log_event("batch_ticker_done", ticker=ticker, seconds=seconds, report_path=result["report_path"],
+                      degraded=len(result["degraded_sections"]))
+
+    offload_sync_tools(pipeline)
+    _tool_pool = ThreadPoolExecutor(upstream_concurrency, thread_name_prefix="batch-tool")
+    render_pool = ThreadPoolExecutor(render_concurrency, thread_name_prefix="batch-render")
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(ticker_concurrency, queue.qsize()))))
+    finally:
+        _tool_pool.shutdown(wait=False)
+        render_pool.shutdown(wait=False)
+        _tool_pool = None
+
+    wall = time.perf_counter() - start
+    counts = progress.counts()
+    failed = progress.failures()
+    progress.close()
+    summary = {
+        "progress_path": progress_path,
+        "tickers": len(jobs),
+        "completed": len(latencies),
+        "already_done": already_done,
+        "done": counts.get("done", 0),
+        "failed": failed,
+        "unresolved": unresolved,
+        "degraded": degraded,
+        "wall_seconds": round(wall, 2),
+        "reports_per_minute": round(len(latencies) / wall * 60, 2) if wall else 0.0,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+    }
+    log_event("batch_finished", **{k: len(v) if isinstance(v, (dict, list)) else v for k, v in summary.items()})
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate reports for every stock in a watchlist file.")
+    parser.add_argument("watchlist", help="one 6-digit code or company short name per line")
+    parser.add_argument("--progress", help="progress file (default: BATCH_DIR/<watchlist>_<YYYYMMDD>.sqlite3)")
+    parser.add_argument("--fresh", action="store_true", help="discard the progress file and start over")
+    parser.add_argument("--tickers", type=int, default=BATCH_TICKER_CONCURRENCY, help="ticker pipelines in flight")
+    parser.add_argument("--llm", type=int, default=BATCH_LLM_CONCURRENCY, help="model requests in flight per model")
+    parser.add_argument("--upstream", type=int, default=BATCH_UPSTREAM_CONCURRENCY, help="data tool calls in flight")
+    parser.add_argument("--render", type=int, default=BATCH_RENDER_CONCURRENCY, help="PDF renders at once")
+    parser.add_argument("--max-attempts", type=int, default=BATCH_MAX_ATTEMPTS)
+    args = parser.parse_args()
+
+    progress_path = args.progress or progress_path_for(args.watchlist)
+    if args.fresh and os.path.exists(progress_path):
+        os.remove(progress_path)
+    summary = asyncio.run(run_batch(
+        read_watchlist(args.watchlist), progress_path, ticker_concurrency=args.tickers, llm_concurrency=args.llm,
+        upstream_concurrency=args.upstream, render_concurrency=args.render, max_attempts=args.max_attempts,
+    ))
+
+    print(f"{summary['completed']} reports in {summary['wall_seconds']:.1f}s: {summary['reports_per_minute']:.2f} "
+          f"reports/min, p50 {summary['latency_p50']}s, p95 {summary['latency_p95']}s")
+    print(f"{summary['done']}/{summary['tickers']} tickers done ({summary['already_done']} in earlier runs), "
+          f"{len(summary['failed'])} failed, {len(summary['degraded'])} with degraded sections")
+    for ticker, error in summary["failed"].items():
+        print(f"  failed {ticker}: {error}")
+    for entry in summary["unresolved"]:
+        print(f"  unresolved: {entry}")
+    print(f"progress: {summary['progress_path']} (run the same command again to resume)")
+    if summary["failed"] or summary["unresolved"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+from google.adk.tools.agent_tool import AgentTool
+
+from .eventlog import log_event, state_summary
+from .metrics import LLM_TOKENS
+from .profiling import wants_profile, start_tool_profile, finish_tool_profile
+from .sections import cache_section, resolve_ticker
+from .tracing import traced
 
 # --- Defining callback function---v
+@traced("callback")
 def save_agent_output(callback_context: CallbackContext) -> None:
-    print(f"Callback running before agent returns: {callback_context.agent_name}")
-    
     agent_name = callback_context.agent_name
     state = callback_context.state
 
@@ -14,19 +22,57 @@ def save_agent_output(callback_context: CallbackContext) -> None:
         filename = f"reports/{agent_name}_report.md"
         with open(filename, "w", encoding="utf-8") as f:
             f.write(md_content)
-        print(f"[Callback] Saved {agent_name} output to {filename}")
+        log_event("agent_output_saved", agent=agent_name, path=filename, chars=len(md_content),
+                  invocation_id=callback_context.invocation_id)
+
+        # 按股票代码缓存一份，供超时降级时使用
+        ticker = resolve_ticker(state, callback_context.user_content)
+        if ticker:
+            cache_section(agent_name, ticker, md_content)
 
 
     return None # Allow the model call to proceed
 
 
+@traced("callback")
 def call_log(callback_context: CallbackContext) -> None:
 # call log function
-    # Purpose: to log/print the agentname with the respective state
-    agent_name = callback_context.agent_name
-    state = callback_context.state
-
-    print(f"[Callback] {agent_name} called with state: {state}")
+    # Purpose: to log the agentname with the keys/sizes of the state (not its contents,
+    # which include every earlier agent's full report)
+    log_event("agent_start", agent=callback_context.agent_name,
+              invocation_id=callback_context.invocation_id,
+              state=state_summary(callback_context.state))
 
 
     return None
+
+
+def record_token_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    # after_model_callback: count input/output tokens per agent (equi_llm_tokens_total)
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        agent_name = callback_context.agent_name
+        LLM_TOKENS.inc(usage.prompt_token_count or 0, agent=agent_name, direction="input")
+        LLM_TOKENS.inc(usage.candidates_token_count or 0, agent=agent_name, direction="output")
+
+    return None  # keep the model response unchanged
+
+
+def profile_tool_start(tool: BaseTool, args: dict, tool_context: ToolContext) -> None:
+    # before_tool_callback: profile this call if EQUI_PROFILE or the session's "profile" key selects the tool
+    # (not AgentTools: a whole sub-agent run would hold the profiler while its own tools run;
+    # tools offloaded to the batch's thread pool are profiled on their worker thread)
+    if not isinstance(tool, AgentTool) and wants_profile(tool.name, tool_context.state):
+        start_tool_profile(tool.name, args, tool_context.function_call_id, tool_context.agent_name,
+                           resolve_ticker(tool_context.state, tool_context.user_content),
+                           tool_context.invocation_id,
+                           deferred=getattr(getattr(tool, "func", None), "profile_in_worker", False))
+
+    return None  # run the tool as usual
+
+
+def profile_tool_end(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response) -> None:
+    # after_tool_callback: list it before enforce_tool_budget, which ends the chain when it trims
+    finish_tool_profile(tool_context.function_call_id)
+
+    return None  # keep the tool response unchanged
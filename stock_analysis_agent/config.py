@@ -1,4 +1,6 @@
-# List of Gemini modelsm
+import os
+
+# List of Gemini models
 GEMINI_LIST = [
     "gemini-2.5-flash-preview-05-20",
     "gemini-2.5-pro-preview-06-05",
@@ -16,5 +18,215 @@ MODEL = "gemini-2.5-pro-preview-06-05"
 
 # Validate that MODEL is defined in one of the lists
 assert MODEL in GEMINI_LIST + OTHER_LIST, \
-
     f"MODEL ('{MODEL}') must be in GEMINI_LIST or OTHER_LIST"
+
+# --- Model routing and shared client pool (models.py) ---
+# Agent name -> model; agents not listed use MODEL
+AGENT_MODELS = {
+    "google_search_agent": GEMINI_LIST[0],   # the google_search built-in tool needs a Gemini model
+}
+MODEL_CONCURRENCY = {"default": 8}         # max in-flight requests per model name
+LLM_HTTP_MAX_CONNECTIONS = 32              # shared keep-alive HTTP pool for all model clients
+LLM_HTTP_KEEPALIVE_SECONDS = 120
+
+for _agent, _model in AGENT_MODELS.items():
+    assert _model in GEMINI_LIST + OTHER_LIST, \
+        f"AGENT_MODELS['{_agent}'] ('{_model}') must be in GEMINI_LIST or OTHER_LIST"
+
+
+# --- Email delivery (see mailer.py) ---
+# SMTP 服务器与账号，优先从环境变量读取（可写入 stock_analysis_agent/.env）
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.example.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_SENDER = os.getenv("SMTP_SENDER", "sender@example.com")
+# STARTTLS on port 587; set to "false" for a local stand-in server
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = 30                # seconds per SMTP command
+SMTP_POOL_SIZE = 2               # persistent SMTP sessions kept open
+SMTP_IDLE_TIMEOUT = 60           # seconds before an idle session is re-checked with NOOP
+SMTP_BATCH_SIZE = 50             # recipients per message (RCPT TO) in one transaction
+SMTP_MAX_RETRIES = 3             # retries for transient (4xx / connection) failures
+SMTP_RETRY_BACKOFF = 1.0         # base seconds for exponential backoff
+
+
+# --- Local caches ---
+CACHE_DIR = os.getenv("EQUI_CACHE_DIR", "cache")
+
+# --- AkShare record / replay (upstream.py) ---
+# "live": call AkShare; "record": call AkShare and save each DataFrame as a fixture; "replay": serve fixtures offline
+AKSHARE_MODE = os.getenv("EQUI_AKSHARE_MODE", "live")
+AKSHARE_FIXTURE_DIR = os.getenv("EQUI_AKSHARE_FIXTURES", os.path.join("fixtures", "akshare"))
+AKSHARE_REPLAY_LATENCY = {           # seconds slept before each replayed call, by akshare function
+    "default": float(os.getenv("EQUI_AKSHARE_LATENCY", "0")),
+}
+AKSHARE_FIXTURE_IGNORE_ARGS = {      # date arguments left out of fixture names, so a recording replays on any day
+    "stock_zh_a_hist": ("end_date",),
+    "stock_institute_hold_detail": ("quarter",),
+    "stock_hsgt_individual_detail_em": ("start_date", "end_date"),
+}
+assert AKSHARE_MODE in ("live", "record", "replay"), \
+    f"AKSHARE_MODE ('{AKSHARE_MODE}') must be 'live', 'record' or 'replay'"
+
+# --- Technical indicators (sub_agents/technical_agent/) ---
+# Lean mode keeps derived series as float32/int16 arrays and formats strings only for the output rows
+TECHNICAL_LEAN_MODE = os.getenv("EQUI_TECHNICAL_LEAN", "false").lower() == "true"
+# Tail mode advances rolling/recursive state over the whole history but materializes flags, strings and
+# breakouts only for the output window; its output is identical to the full evaluation
+TECHNICAL_TAIL_MODE = os.getenv("EQUI_TECHNICAL_TAIL", "false").lower() == "true"
+# Trading days returned by calculate_technical_indicators (ending the day before the latest bar)
+TECHNICAL_OUTPUT_DAYS = int(os.getenv("EQUI_TECHNICAL_DAYS", "9"))
+assert TECHNICAL_OUTPUT_DAYS >= 1, "EQUI_TECHNICAL_DAYS must be at least 1"
+DAILY_BARS_CACHE_SIZE = 64           # tickers whose daily history bars.daily_bars() keeps in memory
+DAILY_BARS_INTRADAY_TTL_SECONDS = 60 # today's bars cached before the close are re-fetched after this long
+MARKET_CLOSE = "15:00"               # A-share close (Asia/Shanghai); today's daily bar is final after it
+TIMEFRAME_OUTPUT_BARS = {            # bars per timeframe returned by calculate_multi_timeframe_indicators
+    "weekly": 8,
+    "monthly": 6,
+}
+
+# --- Price store (sub_agents/technical_agent/store.py) ---
+# "download": fetch the qfq history from AkShare for each ticker and day
+# "store": keep unadjusted bars + hfq adjustment factors in PRICE_STORE_PATH, fetch only new bars and the
+#          factor series, and derive qfq prices at read time (Sina factors; can differ from Eastmoney qfq by a cent)
+PRICE_SOURCE = os.getenv("EQUI_PRICE_SOURCE", "download")
+PRICE_STORE_PATH = os.path.join(CACHE_DIR, "prices.sqlite3")
+PRICE_FACTOR_MAX_AGE_HOURS = 12      # adjustment factors are re-fetched after this
+assert PRICE_SOURCE in ("download", "store"), \
+    f"PRICE_SOURCE ('{PRICE_SOURCE}') must be 'download' or 'store'"
+
+# --- Technical event index (sub_agents/technical_agent/events.py) ---
+# (date, event) -> tickers, built nightly by build_event_index(); read by get_market_technical_context
+EVENT_INDEX_PATH = os.path.join(CACHE_DIR, "technical_events.sqlite3")
+EVENT_INDEX_WORKERS = int(os.getenv("EQUI_EVENT_INDEX_WORKERS", "8"))   # tickers fetched concurrently
+assert EVENT_INDEX_WORKERS >= 1, "EQUI_EVENT_INDEX_WORKERS must be at least 1"
+
+# --- Signal backtests (sub_agents/technical_agent/backtest.py) ---
+BACKTEST_HORIZONS = (1, 5, 20)       # trading days after the event close over which forward returns are measured
+BACKTEST_MIN_OCCURRENCES = 5         # events seen fewer times are left out of the default (all-events) statistics
+# market-wide statistics written by `python -m ...technical_agent.backtest --universe`, cited next to a stock's own
+BACKTEST_UNIVERSE_PATH = os.path.join(CACHE_DIR, "signal_backtest_universe.json")
+
+# --- Intraday indicators (sub_agents/technical_agent/intraday.py) ---
+INTRADAY_TIMEFRAMES = (1, 5, 15)     # minutes per bar; 5/15-minute bars are aggregated from the 1-minute stream
+INTRADAY_RSI_WINDOW = 14
+INTRADAY_VOLUME_WINDOW = 20          # volume amplification: bar volume / mean volume of the last N bars
+INTRADAY_POLL_SECONDS = 30           # minute-bar poll interval of the in-process feed during the session
+INTRADAY_ACTIVE_MINUTES = 30         # tickers not asked for by get_intraday_indicators for this long stop being polled
+
+# --- Industry peer percentiles (sub_agents/fundamental_agent/peers.py) ---
+PEER_TABLE_PATH = os.path.join(CACHE_DIR, "fundamental_peers.npz")
+PEER_RATIOS = (                      # ak.stock_financial_analysis_indicator columns ranked within industry and report date
+    "净资产收益率(%)",
+    "加权净资产收益率(%)",
+    "总资产净利润率(%)",
+    "销售毛利率(%)",
+    "销售净利率(%)",
+    "主营业务收入增长率(%)",
+    "净利润增长率(%)",
+    "资产负债率(%)",
+    "流动比率",
+    "速动比率",
+    "总资产周转率(次)",
+    "存货周转率(次)",
+)
+PEER_HISTORY_YEARS = 3               # report dates kept from this many years before the latest period
+PEER_REPORT_PERIODS = 2              # recent quarter ends checked with ak.stock_yjbb_em for newly published reports
+PEER_OUTPUT_REPORTS = 4              # report dates returned by get_industry_percentiles
+PEER_FETCH_WORKERS = int(os.getenv("EQUI_PEER_FETCH_WORKERS", "8"))   # companies fetched concurrently
+assert PEER_FETCH_WORKERS >= 1, "EQUI_PEER_FETCH_WORKERS must be at least 1"
+
+# --- Fund-flow ranking snapshots (sub_agents/fund_agent/flow_ranks.py) ---
+FUND_FLOW_SNAPSHOT_DIR = os.path.join(CACHE_DIR, "fund_flow")   # one <YYYY-MM-DD>.npz per trading day
+FUND_FLOW_KEEP_DAYS = 60             # snapshots kept; older ones are deleted when a new one is written
+FUND_FLOW_LOOKUP_DAYS = 5            # trading days returned by get_fund_flow_rank
+
+# --- Policy evidence store (sub_agents/policy_agent/store.py) ---
+POLICY_STORE_PATH = os.path.join(CACHE_DIR, "policy_evidence.sqlite3")
+POLICY_EVIDENCE_MAX_AGE_DAYS = 7     # cached findings are reused across tickers for this long
+POLICY_LOOKBACK_DAYS = 365           # policy analysis covers the past year
+POLICY_SEARCH_CONCURRENCY = 4       # concurrent searches in search_policy_batch
+POLICY_SNIPPET_MAX_CHARS = 300      # snippets are compacted to this length in batch responses
+POLICY_RESULTS_PER_TOPIC = 8        # results kept per topic in batch responses
+
+# --- Report deadlines (deadlines.py) ---
+REPORT_DEADLINE_SECONDS = 600        # global budget for one report, from pipeline start
+AGENT_TIME_BUDGET_SECONDS = {        # per sub-agent budgets inside equity_research_pipeline
+    "fundamental_agent": 240,
+    "technical_agent": 240,
+    "fund_agent": 240,
+    "policy_agent": 300,
+}
+SECTION_CACHE_DIR = os.path.join(CACHE_DIR, "sections")
+SECTION_CACHE_MAX_AGE_DAYS = 7       # older cached sections are not used as a fallback
+
+# --- Coordinator mode (agent.py) ---
+# "llm": conversational LlmAgent coordinator (one model turn per step)
+# "workflow": deterministic WorkflowCoordinator, the LLM is only used to resolve a ticker it cannot look up
+COORDINATOR_MODE = os.getenv("EQUI_COORDINATOR_MODE", "llm")
+assert COORDINATOR_MODE in ("llm", "workflow"), \
+    f"COORDINATOR_MODE ('{COORDINATOR_MODE}') must be 'llm' or 'workflow'"
+
+# --- Batch watchlist runs (batch.py) ---
+BATCH_DIR = os.path.join(CACHE_DIR, "batches")     # progress of each run: <watchlist>_<YYYYMMDD>.sqlite3
+BATCH_TICKER_CONCURRENCY = int(os.getenv("EQUI_BATCH_TICKERS", "8"))      # ticker pipelines in flight
+BATCH_LLM_CONCURRENCY = int(os.getenv("EQUI_BATCH_LLM", "8"))             # model requests in flight per model
+BATCH_UPSTREAM_CONCURRENCY = int(os.getenv("EQUI_BATCH_UPSTREAM", "8"))   # data tool calls (AkShare fetches) in worker threads
+BATCH_RENDER_CONCURRENCY = int(os.getenv("EQUI_BATCH_RENDER", "2"))       # PDF renders at once
+BATCH_MAX_ATTEMPTS = 2               # a failed or interrupted ticker is run again on resume until this many attempts
+for _name, _value in (("EQUI_BATCH_TICKERS", BATCH_TICKER_CONCURRENCY), ("EQUI_BATCH_LLM", BATCH_LLM_CONCURRENCY),
+                      ("EQUI_BATCH_UPSTREAM", BATCH_UPSTREAM_CONCURRENCY), ("EQUI_BATCH_RENDER", BATCH_RENDER_CONCURRENCY)):
+    assert _value >= 1, f"{_name} must be at least 1"
+
+# --- Event log (eventlog.py) ---
+EVENT_LOG_LEVEL = os.getenv("EQUI_LOG_LEVEL", "info")     # debug / info / warning / error
+EVENT_LOG_PATH = os.getenv("EQUI_EVENT_LOG", "-")         # JSON lines sink: "-" = stdout, "" = ring buffer only
+EVENT_LOG_BUFFER_SIZE = 1000         # recent events kept in memory (EventLog.recent)
+EVENT_LOG_QUEUE_SIZE = 10000         # events waiting for the sink writer; further events are dropped, not blocked on
+EVENT_LOG_SAMPLE_RATES = {           # fraction of events recorded, by event name; warnings and errors are never sampled out
+    "default": 1.0,
+}
+assert EVENT_LOG_LEVEL in ("debug", "info", "warning", "error"), \
+    f"EVENT_LOG_LEVEL ('{EVENT_LOG_LEVEL}') must be one of debug, info, warning, error"
+
+# --- Tracing (tracing.py) ---
+TRACE_EXPORTER = os.getenv("EQUI_TRACE_EXPORTER", "")    # "" = off, "file" (JSON lines at TRACE_PATH) or "console"
+TRACE_PATH = os.getenv("EQUI_TRACE_PATH", os.path.join("logs", "spans.jsonl"))
+assert TRACE_EXPORTER in ("", "file", "console"), \
+    f"TRACE_EXPORTER ('{TRACE_EXPORTER}') must be '', 'file' or 'console'"
+
+# --- Metrics (metrics.py) ---
+METRICS_PORT = int(os.getenv("EQUI_METRICS_PORT", "0"))  # serve Prometheus text on :port/metrics; 0 = off
+METRICS_DUMP_PATH = os.getenv("EQUI_METRICS_DUMP", "")     # or rewrite this file every METRICS_DUMP_INTERVAL seconds
+METRICS_DUMP_INTERVAL = 60
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)  # seconds
+
+# --- Tool response token budgets (payloads.py) ---
+TOOL_TOKEN_BUDGETS = {               # estimated tokens per tool response
+    "default": 6000,
+    "calculate_technical_indicators": 3000,
+    "search_policy_batch": 8000,
+}
+AGENT_TOOL_TOKEN_BUDGETS = {         # all tool responses one agent receives in one invocation
+    "default": 30000,
+}
+TOOL_MIN_BUDGET_TOKENS = 500         # a response is never trimmed below this, even if the agent budget is spent
+TOOL_LOW_PRIORITY_COLUMNS = {        # dropped first when a response is over budget
+    "calculate_technical_indicators": [
+        "股票代码", "开盘", "振幅", "涨跌额", "BB_mid", "BB_std", "MACD_diff", "MACD_signal",
+        "MA30", "MA120", "量价齐升期间换手率", "量价齐跌期间换手率",
+    ],
+    "fetch_stock_financial_indicators": [],
+}
+
+# --- Tool profiling (profiling.py) ---
+# Off unless EQUI_PROFILE names tools ("calculate_technical_indicators,combine_reports" or "all")
+# or a session sets state["profile"] to True or a list of tool names
+PROFILE_TOOLS = [name.strip() for name in os.getenv("EQUI_PROFILE", "").split(",") if name.strip()]
+PROFILE_STATE_KEY = "profile"
+PROFILE_MODE = os.getenv("EQUI_PROFILE_MODE", "sampling")  # "sampling" (stack samples) or "cprofile" (+ .prof)
+PROFILE_DIR = os.getenv("EQUI_PROFILE_DIR", os.path.join("logs", "profiles"))
+PROFILE_SAMPLE_INTERVAL = 0.005      # seconds between stack samples
+assert PROFILE_MODE in ("sampling", "cprofile"), \
+    f"PROFILE_MODE ('{PROFILE_MODE}') must be 'sampling' or 'cprofile'"
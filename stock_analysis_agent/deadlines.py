@@ -0,0 +1,146 @@
+"""
+Deadline-bounded parallel pipeline.
+
+DeadlineParallelAgent 与 ParallelAgent 一样并行运行子智能体，但每个子智能体都有独立的时间预算
+（AGENT_TIME_BUDGET_SECONDS），且不超过整份报告的全局截止时间（REPORT_DEADLINE_SECONDS）。
+预算耗尽的子智能体会被取消，其章节由最近的缓存版本或“数据暂不可用”占位填充，
+降级情况记录在 state["degraded_sections"] 中（另写一份 reports/degraded_sections.json），combine_reports 从会话 state 读取。
+"""
+import asyncio
+import json
+import os
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.parallel_agent import _merge_agent_run, _set_branch_for_current_agent
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import Field
+from typing_extensions import override
+
+from .config import AGENT_TIME_BUDGET_SECONDS, REPORT_DEADLINE_SECONDS
+from .eventlog import log_event
+from .profiling import finish_invocation_profiles
+from .sections import fallback_section, resolve_ticker
+
+
+REPORTS_DIR = "reports"
+DEGRADED_SECTIONS_FILE = os.path.join(REPORTS_DIR, "degraded_sections.json")
+
+# state key holding the report's absolute deadline (time.time() epoch seconds);
+# set by the caller to share one global deadline across pipeline stages
+REPORT_DEADLINE_KEY = "report_deadline"
+
+
+class _BudgetExpired(Exception):
+    """The sub-agent's time budget ran out."""
+
+
+async def _run_with_budget(
+    agent: BaseAgent, ctx: InvocationContext, deadline: float, outcomes: dict[str, str]
+) -> AsyncGenerator[Event, None]:
+    """Yield the agent's events until it finishes or `deadline` (monotonic) passes."""
+    events = agent.run_async(ctx)
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _BudgetExpired
+            try:
+                # wait_for cancels the agent's pending step on timeout
+                event = await asyncio.wait_for(events.__anext__(), remaining)
+            except StopAsyncIteration:
+                outcomes[agent.name] = "completed"
+                return
+            except TimeoutError:
+                # a TimeoutError raised by the agent itself (e.g. an upstream call) is an error, not the budget
+                if time.monotonic() < deadline:
+                    raise
+                raise _BudgetExpired from None
+            yield event
+    except _BudgetExpired:
+        outcomes[agent.name] = "timeout"
+    except Exception as e:
+        outcomes[agent.name] = f"error: {type(e).__name__}: {e}"
+    finally:
+        await events.aclose()
+        if outcomes.get(agent.name) != "completed":
+            finish_invocation_profiles(ctx.invocation_id, agent.name)
+
+
+class DeadlineParallelAgent(ParallelAgent):
+    """A ParallelAgent whose sub-agents are cancelled when their time budget expires."""
+
+    agent_budgets: dict[str, float] = Field(default_factory=lambda: dict(AGENT_TIME_BUDGET_SECONDS))
+    """Seconds each sub-agent may run, keyed by agent name."""
+
+    default_budget: float = REPORT_DEADLINE_SECONDS
+    """Budget for sub-agents not listed in agent_budgets."""
+
+    report_deadline: float = REPORT_DEADLINE_SECONDS
+    """Global budget in seconds, unless state[REPORT_DEADLINE_KEY] already fixes the deadline."""
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        _set_branch_for_current_agent(self, ctx)
+
+        now_wall, now_mono = time.time(), time.monotonic()
+        global_deadline = ctx.session.state.get(REPORT_DEADLINE_KEY) or now_wall + self.report_deadline
+        global_left = max(0.0, global_deadline - now_wall)
+
+        budgets: dict[str, float] = {}
+        outcomes: dict[str, str] = {}
+        agent_runs = []
+        for agent in self.sub_agents:
+            budgets[agent.name] = min(self.agent_budgets.get(agent.name, self.default_budget), global_left)
+            agent_runs.append(_run_with_budget(agent, ctx, now_mono + budgets[agent.name], outcomes))
+
+        async for event in _merge_agent_run(agent_runs):
+            yield event
+
+        # 为超时/出错的章节填充降级内容
+        ticker = resolve_ticker(ctx.session.state, ctx.user_content)
+        degraded: dict[str, dict] = {}
+        state_delta: dict[str, object] = {}
+        for agent in self.sub_agents:
+            outcome = outcomes.get(agent.name, "timeout")
+            if outcome == "completed":
+                continue
+            reason = (f"{agent.name} 未在 {budgets[agent.name]:g} 秒内完成"
+                      if outcome == "timeout" else f"{agent.name} 运行出错")
+            content, kind = fallback_section(agent.name, ticker, reason)
+            _write_section(agent.name, content)
+            state_delta[f"{agent.name}_output"] = content
+            degraded[agent.name] = {"reason": outcome, "fallback": kind}
+            log_event("section_degraded", level="warning", agent=agent.name, ticker=ticker,
+                      reason=outcome, fallback=kind, budget=budgets[agent.name],
+                      invocation_id=ctx.invocation_id)
+
+        state_delta["degraded_sections"] = degraded
+        _write_degraded(degraded)
+
+        summary = "全部章节已按时完成。" if not degraded else "以下章节已降级：" + "；".join(
+            f"{name}（{info['reason']}，{'使用缓存版本' if info['fallback'] == 'cached' else '数据暂不可用'}）"
+            for name, info in degraded.items()
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=summary)]),
+            actions=EventActions(state_delta=state_delta),
+        )
+
+
+def _write_section(agent_name: str, content: str) -> None:
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    with open(os.path.join(REPORTS_DIR, f"{agent_name}_report.md"), "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _write_degraded(degraded: dict) -> None:
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    with open(DEGRADED_SECTIONS_FILE, "w", encoding="utf-8") as f:
+        json.dump(degraded, f, ensure_ascii=False, indent=2)
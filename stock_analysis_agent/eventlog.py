@@ -0,0 +1,163 @@
+"""
+Structured JSON-lines event log.
+
+- 事件是小字典（event、level、ts 及字段），先进入内存环形缓冲区（EVENT_LOG_BUFFER_SIZE 条），
+  再由后台线程批量序列化并写入 sink，调用方从不在 I/O 上阻塞；队列满时丢弃并计数
+- 按级别（EVENT_LOG_LEVEL）过滤，按事件名采样（EVENT_LOG_SAMPLE_RATES），warning/error 不采样
+- 记录 session state 时只记录键与大小（state_summary），不输出内容
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Protocol
+
+from .config import (
+    EVENT_LOG_LEVEL, EVENT_LOG_PATH, EVENT_LOG_BUFFER_SIZE, EVENT_LOG_QUEUE_SIZE,
+    EVENT_LOG_SAMPLE_RATES,
+)
+
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class Sink(Protocol):
+    """Receives batches of serialized JSON lines on the writer thread."""
+
+    def write_batch(self, lines: list[str]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class JsonLinesSink:
+    """Appends JSON lines to a file, or to stdout for path "-"."""
+
+    def __init__(self, path: str = "-"):
+        self.path = path
+        if path != "-":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._stream = sys.stdout if path == "-" else open(path, "a", encoding="utf-8")
+
+    def write_batch(self, lines: list[str]) -> None:
+        self._stream.write("\n".join(lines) + "\n")
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not sys.stdout:
+            self._stream.close()
+
+
+def sizeof(value: Any) -> int | None:
+    """Characters of a string, bytes of a bytes value, items of a container; None otherwise."""
+    if isinstance(value, (str, bytes, bytearray, Mapping, list, tuple, set)):
+        return len(value)
+    return None
+
+
+def state_summary(state: Any) -> dict[str, int | None]:
+    """{key: sizeof(value)} for a session State or mapping, without serializing the values."""
+    values = state.to_dict() if hasattr(state, "to_dict") else dict(state)
+    return {key: sizeof(value) for key, value in values.items()}
+
+
+class EventLog:
+    """Level-filtered, sampled event log with a ring buffer and background sinks."""
+
+    def __init__(self, level: str = EVENT_LOG_LEVEL, sinks: list[Sink] | None = None,
+                 buffer_size: int = EVENT_LOG_BUFFER_SIZE, queue_size: int = EVENT_LOG_QUEUE_SIZE,
+                 sample_rates: dict[str, float] | None = None):
+        self.threshold = LEVELS[level]
+        self.sinks = list(sinks or [])
+        self.sample_rates = dict(EVENT_LOG_SAMPLE_RATES if sample_rates is None else sample_rates)
+        self.dropped = 0
+        self._buffer: deque[dict] = deque(maxlen=buffer_size)
+        self._pending: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer: threading.Thread | None = None
+        if self.sinks:
+            self._writer = threading.Thread(target=self._write, name="event-log-writer", daemon=True)
+            self._writer.start()
+
+    def enabled(self, level: str = "info") -> bool:
+        return LEVELS[level] >= self.threshold
+
+    def emit(self, event: str, level: str = "info", **fields: Any) -> None:
+        """Record `event`; fields should be small values (ids, names, sizes, durations)."""
+        if LEVELS[level] < self.threshold:
+            return
+        if LEVELS[level] < LEVELS["warning"]:
+            rate = self.sample_rates.get(event, self.sample_rates.get("default", 1.0))
+            if rate < 1.0 and random.random() >= rate:
+                return
+        record = {"ts": round(time.time(), 3), "level": level, "event": event, **fields}
+        self._buffer.append(record)
+        if self._writer is not None:
+            try:
+                self._pending.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+    def recent(self, n: int | None = None, event: str | None = None) -> list[dict]:
+        """The last `n` buffered events, optionally only those named `event`."""
+        records = [r for r in self._buffer if event is None or r["event"] == event]
+        return records if n is None else records[-n:]
+
+    def flush(self, timeout: float | None = 5.0) -> None:
+        """Wait until every event emitted so far has been handed to the sinks."""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._pending.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join()
+        for sink in self.sinks:
+            sink.close()
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [json.dumps(r, ensure_ascii=False, default=str)
+                     for r in batch if isinstance(r, dict)]
+            if lines:
+                for sink in self.sinks:
+                    try:
+                        sink.write_batch(lines)
+                    except Exception:
+                        self.dropped += len(lines)
+            for marker in batch:
+                if isinstance(marker, threading.Event):
+                    marker.set()
+            if any(marker is None for marker in batch):
+                return
+
+
+_event_log: EventLog | None = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    """Process-wide event log, created on first use from config."""
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog(sinks=[JsonLinesSink(EVENT_LOG_PATH)] if EVENT_LOG_PATH else [])
+            atexit.register(_event_log.flush)
+        return _event_log
+
+
+def log_event(event: str, level: str = "info", **fields: Any) -> None:
+    get_event_log().emit(event, level, **fields)
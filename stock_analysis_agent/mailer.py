@@ -0,0 +1,375 @@
+"""
+Pooled, queued SMTP delivery for equity research reports.
+
+- SMTPConnectionPool: 复用已登录的 SMTP 会话（STARTTLS/登录只做一次），空闲过久时用 NOOP 探活
+- MailQueue: 后台线程消费发送任务，分发列表按 SMTP_BATCH_SIZE 分批在同一会话内发送，
+  临时性错误（4xx / 连接断开 / 超时）按指数退避重试，永久性错误（5xx）直接记为失败；
+  正文或附件文件不可读时在 MAIL FROM 之前即判定失败，不占用会话也不重试
+- 附件与 HTML 正文以 base64 分块流式写入 DATA，不把整个文件读入内存
+"""
+import base64
+import contextvars
+import mimetypes
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from typing import Iterator
+
+from .config import (
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_SENDER, SMTP_STARTTLS,
+    SMTP_TIMEOUT, SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT, SMTP_BATCH_SIZE,
+    SMTP_MAX_RETRIES, SMTP_RETRY_BACKOFF,
+)
+from .tracing import upstream_span
+
+
+# 57 raw bytes -> one 76-char base64 line; read the file 1000 lines at a time
+_B64_LINE_BYTES = 57
+_STREAM_CHUNK = _B64_LINE_BYTES * 1000
+
+# Errors after which the session is unusable and the batch may be retried; any other OSError
+# (an unreadable file, a name that does not resolve) fails the batch without a retry
+_TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    ConnectionError,
+    socket.timeout,
+)
+
+
+@dataclass
+class MailJob:
+    """One report to deliver to one or more recipients."""
+    subject: str
+    recipients: list[str]
+    html_body: str = ""
+    body_path: str | None = None          # HTML file streamed as the message body
+    attachments: list[str] = field(default_factory=list)
+    sender: str = SMTP_SENDER
+
+
+@dataclass
+class DeliveryReport:
+    """Per-recipient outcome of a MailJob."""
+    delivered: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def status(self) -> str:
+        if not self.failed:
+            return "success"
+        return "partial" if self.delivered else "error"
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "attempts": self.attempts,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+class SMTPConnectionPool:
+    """A small pool of persistent, authenticated SMTP sessions."""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, user: str = SMTP_USER,
+                 password: str = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS,
+                 size: int = SMTP_POOL_SIZE, timeout: float = SMTP_TIMEOUT,
+                 idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        self.opened = 0  # number of sessions ever opened (handshake + login)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.user:
+            server.login(self.user, self.password)
+        self.opened += 1
+        return server
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.idle_timeout:
+                return server
+            # 空闲过久，服务端可能已断开，先 NOOP 探活
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self._discard(server)
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a live session; broken sessions are dropped instead of returned."""
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+        self._slots.acquire()
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except BaseException:
+            if server is not None:
+                self._discard(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                try:
+                    server.rset()
+                    self._idle.put((server, time.monotonic()))
+                except Exception:
+                    self._discard(server)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
+
+
+def _b64_lines(data: bytes) -> Iterator[bytes]:
+    encoded = base64.b64encode(data)
+    for i in range(0, len(encoded), 76):
+        yield encoded[i:i + 76] + b"\r\n"
+
+
+def _stream_file_b64(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(_STREAM_CHUNK):
+            yield b"".join(_b64_lines(chunk))
+
+
+def _encode_header(value: str) -> str:
+    try:
+        value.encode("ascii")
+        return value
+    except UnicodeEncodeError:
+        return Header(value, "utf-8").encode()
+
+
+def unreadable_file(job: MailJob) -> str | None:
+    """Why the job's body file or an attachment cannot be read, or None if they all can."""
+    for path in filter(None, [job.body_path, *job.attachments]):
+        try:
+            with open(path, "rb"):
+                pass
+        except OSError as e:
+            return f"{type(e).__name__}: {e}"
+    return None
+
+
+def iter_message(job: MailJob, recipients: list[str]) -> Iterator[bytes]:
+    """Yield the RFC 5322 message for `job` in chunks, CRLF-terminated.
+
+    All bodies are base64 encoded, so no line ever starts with "." and the
+    DATA stream needs no dot-stuffing. A batch of several recipients is
+    addressed to "undisclosed-recipients:;": the addresses only go into the
+    envelope (RCPT TO), so recipients do not see each other.
+    """
+    boundary = f"=_equi_{uuid.uuid4().hex}"
+    headers = [
+        f"From: {job.sender}",
+        f"To: {recipients[0] if len(recipients) == 1 else 'undisclosed-recipients:;'}",
+        f"Subject: {_encode_header(job.subject)}",
+        f"Date: {formatdate(localtime=True)}",
+        f"Message-ID: {make_msgid()}",
+        "MIME-Version: 1.0",
+        f'Content-Type: multipart/mixed; boundary="{boundary}"',
+    ]
+    yield ("\r\n".join(headers) + "\r\n\r\n").encode("ascii")
+
+    yield (f"--{boundary}\r\n"
+           "Content-Type: text/html; charset=utf-8\r\n"
+           "Content-Transfer-Encoding: base64\r\n\r\n").encode("ascii")
+    if job.body_path:
+        yield from _stream_file_b64(job.body_path)
+    else:
+        yield b"".join(_b64_lines(job.html_body.encode("utf-8")))
+
+    for path in job.attachments:
+        filename = os.path.basename(path)
+        ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        disp_name = _encode_header(filename)
+        yield (f"--{boundary}\r\n"
+               f'Content-Type: {ctype}; name="{disp_name}"\r\n'
+               "Content-Transfer-Encoding: base64\r\n"
+               f'Content-Disposition: attachment; filename="{disp_name}"\r\n\r\n').encode("ascii")
+        yield from _stream_file_b64(path)
+
+    yield f"--{boundary}--\r\n".encode("ascii")
+
+
+def send_streamed(server: smtplib.SMTP, job: MailJob, recipients: list[str]) -> dict[str, str]:
+    """Send one message to `recipients` over an open session.
+
+    Returns the recipients refused by the server ({address: reason}).
+    Raises SMTPResponseException on a failed transaction.
+    """
+    code, resp = server.mail(job.sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, resp, job.sender)
+
+    refused: dict[str, str] = {}
+    accepted = []
+    for rcpt in recipients:
+        code, resp = server.rcpt(rcpt)
+        if code in (250, 251):
+            accepted.append(rcpt)
+        else:
+            refused[rcpt] = f"{code} {resp.decode(errors='replace')}"
+    if not accepted:
+        server.rset()
+        return refused
+
+    server.putcmd("data")
+    code, resp = server.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+    for chunk in iter_message(job, recipients):
+        server.send(chunk)
+    server.send(b".\r\n")
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+class MailQueue:
+    """Background delivery queue backed by an SMTPConnectionPool."""
+
+    def __init__(self, pool: SMTPConnectionPool | None = None, workers: int = SMTP_POOL_SIZE,
+                 batch_size: int = SMTP_BATCH_SIZE, max_retries: int = SMTP_MAX_RETRIES,
+                 backoff: float = SMTP_RETRY_BACKOFF):
+        self.pool = pool or SMTPConnectionPool()
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._jobs: queue.Queue = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"mail-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, job: MailJob) -> Future:
+        """Queue a job; the future resolves to a DeliveryReport."""
+        future: Future = Future()
+        # deliver in the caller's context so upstream spans join the caller's trace
+        self._jobs.put((job, future, contextvars.copy_context()))
+        return future
+
+    def send(self, job: MailJob, timeout: float | None = None) -> DeliveryReport:
+        return self.submit(job).result(timeout=timeout)
+
+    def close(self) -> None:
+        for _ in self._workers:
+            self._jobs.put(None)
+        for t in self._workers:
+            t.join()
+        self.pool.close()
+
+    def _work(self) -> None:
+        while (item := self._jobs.get()) is not None:
+            job, future, context = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(self._deliver, job))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _deliver(self, job: MailJob) -> DeliveryReport:
+        report = DeliveryReport()
+        start = time.perf_counter()
+        # a missing report would fail every batch mid-DATA and every retry after it
+        if (reason := unreadable_file(job)) is not None:
+            report.failed.update({r: reason for r in job.recipients})
+            report.elapsed = time.perf_counter() - start
+            return report
+        batches = [job.recipients[i:i + self.batch_size]
+                   for i in range(0, len(job.recipients), self.batch_size)]
+        for batch in batches:
+            for attempt in range(self.max_retries + 1):
+                report.attempts += 1
+                try:
+                    with upstream_span("smtp", "send", recipients=len(batch), attempt=attempt), \
+                            self.pool.connection() as server:
+                        refused = send_streamed(server, job, batch)
+                    report.failed.update(refused)
+                    report.delivered.extend(r for r in batch if r not in refused)
+                    break
+                except smtplib.SMTPResponseException as e:
+                    error = e.smtp_error
+                    if isinstance(error, bytes):
+                        error = error.decode(errors="replace")
+                    reason = f"{e.smtp_code} {error}"
+                    # 5xx 为永久性错误，不重试
+                    if e.smtp_code >= 500 or attempt == self.max_retries:
+                        report.failed.update({r: reason for r in batch})
+                        break
+                except _TRANSIENT_ERRORS as e:
+                    if attempt == self.max_retries:
+                        report.failed.update({r: f"{type(e).__name__}: {e}" for r in batch})
+                        break
+                except OSError as e:
+                    report.failed.update({r: f"{type(e).__name__}: {e}" for r in batch})
+                    break
+                time.sleep(self.backoff * 2 ** attempt)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+
+_queue: MailQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_mail_queue() -> MailQueue:
+    """Process-wide delivery queue, created on first use from config."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = MailQueue()
+        return _queue
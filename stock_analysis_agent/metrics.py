@@ -0,0 +1,270 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+- 工具延迟直方图与错误数（tracing.traced 记录），上游请求延迟与错误率（tracing.upstream_span 记录）
+- 缓存命中/未命中（record_cache）及命中率、各 agent 输入/输出 token 数（callbacks.record_token_usage）
+- PDF 渲染耗时、报告数与每分钟报告数（combine_reports 记录）
+
+通过 METRICS_PORT 暴露 HTTP /metrics，或每 METRICS_DUMP_INTERVAL 秒把同样的文本写入 METRICS_DUMP_PATH。
+"""
+import atexit
+import bisect
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from .config import LATENCY_BUCKETS, METRICS_PORT, METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict[str, str]) -> tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge:
+    """A gauge computed when the registry is rendered: `fn` returns {label values: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...],
+                 fn: Callable[[], dict[tuple[str, ...], float]]):
+        self.name, self.help, self.labelnames, self.fn = name, help, labelnames, fn
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for key, value in sorted(self.fn().items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), series[-1]
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...],
+              fn: Callable[[], dict[tuple[str, ...], float]]) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, fn))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write render() to `path` atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_LATENCY = REGISTRY.histogram(
+    "equi_tool_latency_seconds", "Tool function and agent callback latency.", ("tool",))
+TOOL_ERRORS = REGISTRY.counter(
+    "equi_tool_errors_total", "Tool calls that raised or returned status=error.", ("tool",))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "equi_upstream_latency_seconds", "Upstream request latency (akshare, google_search, smtp).",
+    ("system", "operation"))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "equi_upstream_errors_total", "Upstream requests that raised.", ("system", "operation"))
+CACHE_REQUESTS = REGISTRY.counter(
+    "equi_cache_requests_total", "Cache lookups by result (hit or miss).", ("cache", "result"))
+LLM_TOKENS = REGISTRY.counter(
+    "equi_llm_tokens_total", "LLM tokens by agent and direction (input or output).", ("agent", "direction"))
+PDF_RENDER = REGISTRY.histogram(
+    "equi_pdf_render_seconds", "Time to render the combined report to PDF.")
+REPORTS = REGISTRY.counter(
+    "equi_reports_total", "Reports produced by combine_reports, by status.", ("status",))
+TOOL_RESPONSE_TOKENS = REGISTRY.histogram(
+    "equi_tool_response_tokens", "Estimated tokens per tool response, before trimming.", ("tool",),
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000))
+TOOL_RESPONSE_TRIMS = REGISTRY.counter(
+    "equi_tool_response_trims_total", "Tool responses trimmed to their token budget.", ("tool",))
+
+_report_times: deque[float] = deque(maxlen=10000)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_report(status: str) -> None:
+    REPORTS.inc(status=status)
+    if status == "success":
+        _report_times.append(time.monotonic())
+
+
+def _cache_hit_ratios() -> dict[tuple[str, ...], float]:
+    hits: dict[str, float] = {}
+    totals: dict[str, float] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        totals[cache] = totals.get(cache, 0) + value
+        if result == "hit":
+            hits[cache] = hits.get(cache, 0) + value
+    return {(cache,): hits.get(cache, 0) / total for cache, total in totals.items() if total}
+
+
+def _reports_per_minute() -> dict[tuple[str, ...], float]:
+    cutoff = time.monotonic() - 60
+    return {(): float(sum(1 for t in list(_report_times) if t >= cutoff))}
+
+
+REGISTRY.gauge("equi_cache_hit_ratio", "Cache hits / lookups since start.", ("cache",), _cache_hit_ratios)
+REGISTRY.gauge("equi_reports_per_minute", "Successful reports in the last 60 seconds.", (), _reports_per_minute)
+
+
+# --- exporters ---
+
+_started = False
+
+
+def start_metrics_exporters(port: int = METRICS_PORT, dump_path: str = METRICS_DUMP_PATH,
+                            interval: float = METRICS_DUMP_INTERVAL) -> None:
+    """Serve GET /metrics on `port` and/or rewrite `dump_path` every `interval` seconds.
+
+    Both are off by default (port 0, empty path); calling this again is a no-op.
+    """
+    global _started
+    if _started or (not port and not dump_path):
+        return
+    _started = True
+    if port:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = REGISTRY.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if dump_path:
+        def dump_loop():
+            while True:
+                time.sleep(interval)
+                REGISTRY.dump(dump_path)
+
+        threading.Thread(target=dump_loop, name="metrics-dump", daemon=True).start()
+        atexit.register(REGISTRY.dump, dump_path)
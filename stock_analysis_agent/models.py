@@ -0,0 +1,140 @@
+"""
+Central model factory and shared LLM client pool.
+
+各 agent 不再各自实例化模型：get_model(agent_name) 按模型名返回同一个实例，
+所有 Gemini 模型共用一个 google-genai Client，LiteLLM 模型共用一个 httpx 会话，
+两者都使用同一组 keep-alive 连接上限（LLM_HTTP_MAX_CONNECTIONS），
+并按模型名限制并发请求数（MODEL_CONCURRENCY）。
+"""
+import asyncio
+import functools
+import weakref
+from contextlib import asynccontextmanager
+from functools import cached_property
+from typing import AsyncGenerator
+
+import httpx
+from google.adk.models import BaseLlm, Gemini, LlmRequest, LlmResponse
+from google.genai import Client, types
+
+from .config import (
+    MODEL, GEMINI_LIST, AGENT_MODELS, MODEL_CONCURRENCY,
+    LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_KEEPALIVE_SECONDS,
+)
+
+
+_http_limits = httpx.Limits(
+    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+    keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS,
+)
+
+_genai_client: Client | None = None
+_models: dict[str, BaseLlm] = {}
+# asyncio primitives are bound to one event loop, so keep one semaphore per (loop, model)
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def shared_genai_client(headers: dict[str, str] | None = None) -> Client:
+    """The google-genai Client shared by every Gemini model."""
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = Client(http_options=types.HttpOptions(
+            headers=headers,
+            client_args={"limits": _http_limits},
+            async_client_args={"limits": _http_limits},
+        ))
+    return _genai_client
+
+
+def _configure_litellm() -> None:
+    """Route LiteLLM through one keep-alive httpx session instead of per-call clients."""
+    import litellm  # ~3s to import; only paid when a non-Gemini model is configured
+
+    if litellm.aclient_session is None:
+        litellm.aclient_session = httpx.AsyncClient(limits=_http_limits)
+    if litellm.client_session is None:
+        litellm.client_session = httpx.Client(limits=_http_limits)
+
+
+def set_model_concurrency(limits: dict[str, int]) -> None:
+    """Override MODEL_CONCURRENCY entries (e.g. {"default": 4}); applies to event loops with no model call yet."""
+    MODEL_CONCURRENCY.update(limits)
+
+
+@asynccontextmanager
+async def model_slot(model: str):
+    """Wait for one of the MODEL_CONCURRENCY slots of `model`."""
+    loop = asyncio.get_running_loop()
+    slots = _slots.setdefault(loop, {})
+    if model not in slots:
+        slots[model] = asyncio.Semaphore(MODEL_CONCURRENCY.get(model, MODEL_CONCURRENCY["default"]))
+    async with slots[model]:
+        yield
+
+
+async def slotted(model: str, responses: AsyncGenerator[LlmResponse, None]) -> AsyncGenerator[LlmResponse, None]:
+    """Yield from `responses`, holding a slot of `model` only while waiting for the next response.
+
+    The slot is released at each yield: ADK runs the turn's tool calls (including nested agents on
+    the same model) while the generator is paused there, and holding it would deadlock them.
+    """
+    try:
+        while True:
+            async with model_slot(model):
+                try:
+                    response = await responses.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield response
+    finally:
+        await responses.aclose()
+
+
+class PooledGemini(Gemini):
+    """Gemini on the shared client, limited to MODEL_CONCURRENCY in-flight requests (not agents mid-turn)."""
+
+    @cached_property
+    def api_client(self) -> Client:
+        return shared_genai_client(self._tracking_headers)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in slotted(self.model, super().generate_content_async(llm_request, stream)):
+            yield response
+
+
+@functools.lru_cache(maxsize=1)
+def pooled_litellm_class() -> type[BaseLlm]:
+    """PooledLiteLlm, defined on first use so litellm is not imported with the package."""
+    from google.adk.models.lite_llm import LiteLlm
+
+    class PooledLiteLlm(LiteLlm):
+        """LiteLlm on the shared httpx session, limited to MODEL_CONCURRENCY in-flight requests."""
+
+        async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+        ) -> AsyncGenerator[LlmResponse, None]:
+            async for response in slotted(self.model, super().generate_content_async(llm_request, stream)):
+                yield response
+
+    return PooledLiteLlm
+
+
+def model_name_for(agent_name: str | None) -> str:
+    return AGENT_MODELS.get(agent_name, MODEL)
+
+
+def get_model(agent_name: str | None = None) -> BaseLlm:
+    """The pooled model instance `agent_name` is routed to (AGENT_MODELS, else MODEL)."""
+    name = model_name_for(agent_name)
+    if name not in _models:
+        if name in GEMINI_LIST:
+            _models[name] = PooledGemini(model=name)
+        else:
+            _configure_litellm()
+            _models[name] = pooled_litellm_class()(model=name)
+    return _models[name]
@@ -0,0 +1,207 @@
+"""
+Token budgets for tool responses.
+
+enforce_tool_budget 作为 after_tool_callback 使用：测量每个工具返回值序列化后的字节数与估算 token 数，
+超过该工具的预算（TOOL_TOKEN_BUDGETS）或该 agent 本次调用剩余的预算（AGENT_TOOL_TOKEN_BUDGETS）时，依次
+1. 删除低优先级列（TOOL_LOW_PRIORITY_COLUMNS）
+2. 删除最早的行（按日期键排序的字典 / 列表，保留最新的行）；按主题分组的检索结果
+   （{"topics": {主题: {"results": [...]}}}，如 search_policy_batch）则每个主题保留排名最前的 N 条
+3. 以摘要代替明细（行数、起止日期、最新一行、数值列的最小/最大/均值）
+直到放得下，并记录 tool_response_trimmed 事件。
+"""
+import json
+import re
+from collections import OrderedDict
+from typing import Any
+
+from google.adk.tools import BaseTool, ToolContext
+
+from .config import (
+    TOOL_TOKEN_BUDGETS, AGENT_TOOL_TOKEN_BUDGETS, TOOL_LOW_PRIORITY_COLUMNS, TOOL_MIN_BUDGET_TOKENS,
+)
+from .eventlog import log_event
+from .metrics import TOOL_RESPONSE_TOKENS, TOOL_RESPONSE_TRIMS
+
+
+_CJK_RE = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+# (invocation_id, agent_name) -> tool-response tokens already returned to that agent
+_agent_usage: "OrderedDict[tuple[str, str], int]" = OrderedDict()
+_AGENT_USAGE_ENTRIES = 1024
+_BUDGET_NOTE_TOKENS = 50  # room for the "_budget" note added to trimmed responses
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per four other characters."""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def measure(value: Any) -> tuple[int, int]:
+    """(UTF-8 bytes, estimated tokens) of `value` serialized as JSON."""
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return len(text.encode("utf-8")), estimate_tokens(text)
+
+
+def _topics(response: dict) -> list[str] | None:
+    """Topic keys when results are grouped per topic: {"topics": {topic: {"results": [...]}}}."""
+    topics = response.get("topics")
+    if isinstance(topics, dict) and topics and all(
+            isinstance(v, dict) and isinstance(v.get("results"), list) for v in topics.values()):
+        return list(topics)
+    return None
+
+
+def _per_topic(response: dict, edit) -> dict:
+    """`response` with each topic's results replaced by edit(results)."""
+    return {**response, "topics": {topic: {**entry, "results": edit(entry["results"])}
+                                   for topic, entry in response["topics"].items()}}
+
+
+def _rows(response: dict) -> tuple[str | None, list[str] | None]:
+    """Where the row collection lives: (key holding a list, None) or (None, sorted row keys)."""
+    for key in ("data", "results"):
+        if isinstance(response.get(key), list):
+            return key, None
+    if response and all(isinstance(v, dict) for v in response.values()):
+        return None, sorted(response)  # date-keyed rows, e.g. {"2025-05-30": {...}}
+    return None, None
+
+
+def _drop_columns(response: dict, columns: list[str]) -> dict:
+    def strip(row):
+        return {k: v for k, v in row.items() if k not in columns} if isinstance(row, dict) else row
+
+    if _topics(response):
+        return _per_topic(response, lambda results: [strip(r) for r in results])
+    list_key, row_keys = _rows(response)
+    if list_key:
+        return {**response, list_key: [strip(r) for r in response[list_key]]}
+    if row_keys:
+        return {k: strip(response[k]) for k in row_keys}
+    return response
+
+
+def _keep_latest(response: dict, n: int) -> dict:
+    """The latest `n` rows, or the first (best-ranked) `n` results of each topic."""
+    if _topics(response):
+        return _per_topic(response, lambda results: results[:n])
+    list_key, row_keys = _rows(response)
+    if list_key:
+        return {**response, list_key: response[list_key][-n:]}
+    return {k: response[k] for k in row_keys[-n:]}
+
+
+def _row_count(response: dict) -> int:
+    """Rows, or the most results of any one topic."""
+    if _topics(response):
+        return max(len(entry["results"]) for entry in response["topics"].values())
+    list_key, row_keys = _rows(response)
+    return len(response[list_key]) if list_key else len(row_keys or [])
+
+
+def _summarize(response: dict) -> dict:
+    if _topics(response):
+        # per topic: how many results there were and the best-ranked one
+        return {**response, "topics": {topic: {"results": len(entry["results"]), "top": entry["results"][:1]}
+                                       for topic, entry in response["topics"].items()}}
+    list_key, row_keys = _rows(response)
+    rows = response[list_key] if list_key else [response[k] for k in row_keys or []]
+    numeric: dict[str, list[float]] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        for column, value in row.items():
+            try:
+                numeric.setdefault(column, []).append(float(str(value).rstrip("%")))
+            except ValueError:
+                pass
+    return {
+        "summary": {
+            "rows": len(rows),
+            "first": row_keys[0] if row_keys else None,
+            "last": row_keys[-1] if row_keys else None,
+            "latest": rows[-1] if rows else None,
+            "columns": {
+                column: {"min": min(v), "max": max(v), "mean": round(sum(v) / len(v), 4)}
+                for column, v in numeric.items() if len(v) == len(rows)
+            },
+        },
+    }
+
+
+def fit_to_budget(response: dict, budget: int, low_priority_columns: list[str] = ()) -> tuple[dict, list[str]]:
+    """Trim `response` to at most `budget` estimated tokens; returns (response, actions taken)."""
+    actions: list[str] = []
+    if measure(response)[1] <= budget:
+        return response, actions
+
+    if low_priority_columns:
+        response = _drop_columns(response, list(low_priority_columns))
+        actions.append("dropped_columns")
+        if measure(response)[1] <= budget:
+            return response, actions
+
+    total = _row_count(response)
+    if total > 1:
+        # binary search for the most recent rows that fit
+        lo, hi = 1, total - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if measure(_keep_latest(response, mid))[1] <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        trimmed = _keep_latest(response, lo)
+        if measure(trimmed)[1] <= budget:
+            actions.append(f"kept_latest_rows:{lo}/{total}")
+            return trimmed, actions
+
+    if total:
+        summary = _summarize(response)
+        actions.append("summarized")
+        if measure(summary)[1] <= budget:
+            return summary, actions
+        response = summary
+
+    text = json.dumps(response, ensure_ascii=False, default=str)
+    keep = max(0, len(text) * budget // max(1, estimate_tokens(text)))
+    # the estimate is from the unescaped text; shrink until the wrapped, escaped result fits
+    while keep and measure({"truncated_json": text[:keep]})[1] > budget:
+        keep = keep * 9 // 10
+    actions.append("truncated")
+    return {"truncated_json": text[:keep]}, actions
+
+
+def enforce_tool_budget(tool: BaseTool, args: dict, tool_context: ToolContext, tool_response: Any) -> dict | None:
+    """after_tool_callback: keep the response within the tool's and the agent's token budgets."""
+    if not isinstance(tool_response, dict) or tool_response.get("status") == "error":
+        return None
+
+    agent_name = tool_context.agent_name
+    usage_key = (tool_context.invocation_id, agent_name)
+    used = _agent_usage.get(usage_key, 0)
+    agent_budget = AGENT_TOOL_TOKEN_BUDGETS.get(agent_name, AGENT_TOOL_TOKEN_BUDGETS["default"])
+    budget = max(TOOL_MIN_BUDGET_TOKENS,
+                 min(TOOL_TOKEN_BUDGETS.get(tool.name, TOOL_TOKEN_BUDGETS["default"]), agent_budget - used))
+
+    size, tokens = measure(tool_response)
+    TOOL_RESPONSE_TOKENS.observe(tokens, tool=tool.name)
+    result = None
+    if tokens > budget:
+        trimmed, actions = fit_to_budget(tool_response, budget - _BUDGET_NOTE_TOKENS,
+                                         TOOL_LOW_PRIORITY_COLUMNS.get(tool.name, []))
+        trimmed_size, trimmed_tokens = measure(trimmed)
+        trimmed["_budget"] = {"original_tokens": tokens, "tokens": trimmed_tokens, "actions": actions}
+        TOOL_RESPONSE_TRIMS.inc(tool=tool.name)
+        log_event("tool_response_trimmed", agent=agent_name, tool=tool.name,
+                  invocation_id=tool_context.invocation_id, budget=budget,
+                  bytes=size, tokens=tokens, trimmed_bytes=trimmed_size, trimmed_tokens=trimmed_tokens,
+                  actions=actions)
+        result, tokens = trimmed, trimmed_tokens
+
+    _agent_usage[usage_key] = used + tokens
+    _agent_usage.move_to_end(usage_key)
+    while len(_agent_usage) > _AGENT_USAGE_ENTRIES:
+        _agent_usage.popitem(last=False)
+    return result
@@ -0,0 +1,276 @@
+"""
+On-demand profiling of tool calls.
+
+开启方式（默认关闭）：
+- 环境变量 EQUI_PROFILE：逗号分隔的工具名，或 "all"（PROFILE_TOOLS）
+- 单个会话：session state 中设置 "profile" 为 True 或工具名列表（PROFILE_STATE_KEY）
+
+callbacks.profile_tool_start / profile_tool_end 作为 before/after_tool_callback 包住被选中的工具调用：
+cProfile 或采样分析器（PROFILE_MODE）+ tracemalloc 峰值内存。每次调用在 PROFILE_DIR 下写出
+<时间>_<ticker>_<工具名>.collapsed（火焰图用的折叠栈），cProfile 模式另有 .prof（pstats），
+以及 .json 摘要（耗时、峰值内存、文件路径），并记录 tool_profiled 事件。
+关闭时每次工具调用只多一次字典查找。同一时刻只分析一个调用，其余重叠的调用直接跳过。
+被截止时间取消的工具不会触发 after_tool_callback：DeadlineParallelAgent 取消子智能体时调用
+finish_invocation_profiles 结束它仍在分析的调用（摘要中 "cancelled": true）。
+cProfile 与采样分析器只看得到启动它们的线程：在线程池里执行的工具（batch.offload_sync_tools）
+由 before_tool_callback 登记但延后启动，由包装函数在工作线程上通过 run_profiled 启动与停止。
+"""
+import cProfile
+import contextvars
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Any
+
+from .config import (
+    PROFILE_TOOLS, PROFILE_STATE_KEY, PROFILE_MODE, PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, REPORT_DEADLINE_SECONDS,
+)
+from .eventlog import log_event
+from .tracing import _TICKER_ARGS
+
+_MAX_STACK_DEPTH = 128
+
+
+def wants_profile(tool_name: str, state: Any) -> bool:
+    """Whether this tool call should be profiled, from PROFILE_TOOLS or the session's "profile" key."""
+    if PROFILE_TOOLS and ("all" in PROFILE_TOOLS or tool_name in PROFILE_TOOLS):
+        return True
+    selected = state.get(PROFILE_STATE_KEY) if state is not None else None
+    if selected is True:
+        return True
+    return isinstance(selected, (list, tuple, set)) and tool_name in selected
+
+
+def _frame_name(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{code.co_name}"
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id, self.interval = thread_id, interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and len(names) < _MAX_STACK_DEPTH:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+def _pstats_name(func: tuple[str, int, str]) -> str:
+    filename, _, name = func
+    if filename == "~":  # built-in
+        return name.strip("<>").replace(" ", "_")
+    return f"{os.path.splitext(os.path.basename(filename))[0]}.{name}"
+
+
+def collapse_pstats(stats: pstats.Stats, min_fraction: float = 1e-3) -> Counter[str]:
+    """Approximate collapsed stacks (microseconds) from a cProfile call graph.
+
+    Each function's inclusive time is split across its callees in proportion to the
+    per-caller times cProfile records; the rest is its own time. Recursion is cut, and
+    so are branches under `min_fraction` of the profiled time (the number of call-graph
+    paths grows exponentially otherwise).
+    """
+    raw = stats.stats  # func -> (cc, nc, tottime, cumtime, {caller: (cc, nc, tottime, cumtime)})
+    callees: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    stacks: Counter[str] = Counter()
+    cutoff = stats.total_tt * min_fraction
+
+    def walk(func: tuple, seconds: float, path: tuple[str, ...], seen: frozenset) -> None:
+        _, _, tottime, cumtime, _ = raw[func]
+        path = path + (_pstats_name(func),)
+        scale = seconds / cumtime if cumtime else 0.0
+        own = tottime * scale
+        if own > 0:
+            stacks[";".join(path)] += own * 1e6
+        if len(path) >= _MAX_STACK_DEPTH:
+            return
+        for callee, edge_cumtime in callees.get(func, ()):
+            if callee not in seen and edge_cumtime * scale >= cutoff:
+                walk(callee, edge_cumtime * scale, path, seen | {callee})
+
+    for root in roots:
+        if raw[root][3] >= cutoff:
+            walk(root, raw[root][3], (), frozenset({root}))
+    return Counter({stack: round(us) for stack, us in stacks.items() if round(us) > 0})
+
+
+class ToolProfile:
+    """One profiled tool call: started in before_tool_callback, finished in after_tool_callback."""
+
+    def __init__(self, tool: str, ticker: str | None, agent: str | None, mode: str = PROFILE_MODE,
+                 invocation_id: str | None = None):
+        self.tool, self.ticker, self.agent, self.mode = tool, ticker, agent, mode
+        self.invocation_id = invocation_id
+        self._profiler: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+        self._started_tracemalloc = False
+        self._start = time.perf_counter()
+        self._state = "pending"  # -> "running" -> "stopped"
+        self._lock = threading.Lock()
+        self._elapsed, self._peak = 0.0, 0
+
+    def start(self) -> None:
+        """Start profiling the calling thread (no-op once stopped)."""
+        with self._lock:
+            if self._state != "pending":
+                return
+            self._state = "running"
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+        else:
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        self._start = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        """Stop profiling; call it on the thread that started it (cProfile is per thread)."""
+        with self._lock:
+            running, self._state = self._state == "running", "stopped"
+        if not running:
+            return
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._elapsed = time.perf_counter() - self._start
+        if self._sampler is not None:
+            self._sampler.stop()
+        _, self._peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def finish(self, directory: str = PROFILE_DIR, cancelled: bool = False) -> dict:
+        """Stop profiling and write the artifacts; returns the summary written to <stem>.json."""
+        self.stop()
+        elapsed, peak = self._elapsed, self._peak
+
+        os.makedirs(directory, exist_ok=True)
+        label = re.sub(r"[^\w.-]", "_", f"{self.ticker or 'unknown'}_{self.tool}")
+        stem = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{label}_{uuid.uuid4().hex[:6]}")
+        artifacts = {}
+        if self._profiler is not None:
+            artifacts["pstats"] = f"{stem}.prof"
+            self._profiler.dump_stats(artifacts["pstats"])
+            stacks = collapse_pstats(pstats.Stats(self._profiler))
+        else:  # no sampler: a deferred call cancelled before it reached its worker thread
+            stacks = self._sampler.stacks if self._sampler is not None else Counter()
+        artifacts["collapsed"] = f"{stem}.collapsed"
+        with open(artifacts["collapsed"], "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+        summary = {
+            "tool": self.tool, "ticker": self.ticker, "agent": self.agent, "mode": self.mode,
+            "seconds": round(elapsed, 6), "peak_memory_bytes": peak, "artifacts": artifacts,
+            "cancelled": cancelled,
+        }
+        with open(f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+# function_call_id -> the call being profiled; at most one at a time
+_active: dict[str, ToolProfile] = {}
+_active_lock = threading.Lock()
+# the deferred profile of the tool call running in this context, started by run_profiled
+_deferred: contextvars.ContextVar[ToolProfile | None] = contextvars.ContextVar("deferred_tool_profile", default=None)
+
+
+def start_tool_profile(tool_name: str, args: dict, call_id: str, agent: str | None,
+                       fallback_ticker: str | None = None, invocation_id: str | None = None,
+                       deferred: bool = False) -> bool:
+    """Begin profiling call `call_id`; False if another call is already being profiled.
+
+    With `deferred`, profiling starts when the tool runs run_profiled (on its worker thread) instead of here.
+    """
+    ticker = next((args[name] for name in _TICKER_ARGS if isinstance(args.get(name), str)), fallback_ticker)
+    profile = ToolProfile(tool_name, ticker, agent, invocation_id=invocation_id)
+    with _active_lock:
+        stale = [k for k, p in _active.items() if profile._start - p._start > REPORT_DEADLINE_SECONDS]
+    for key in stale:  # its tool raised, so its after_tool_callback never ran
+        finish_tool_profile(key)
+    with _active_lock:
+        if _active:
+            log_event("tool_profile_skipped", level="debug", tool=tool_name, ticker=ticker,
+                      busy=next(iter(_active.values())).tool)
+            return False
+        _active[call_id] = profile
+    if deferred:
+        _deferred.set(profile)
+    else:
+        profile.start()
+    return True
+
+
+def run_profiled(func, *args, **kwargs):
+    """Call `func` on this thread, profiling it here if its before_tool_callback deferred a profile."""
+    profile = _deferred.get()
+    if profile is None:
+        return func(*args, **kwargs)
+    _deferred.set(None)
+    profile.start()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profile.stop()
+
+
+def finish_tool_profile(call_id: str, cancelled: bool = False) -> dict | None:
+    """Finish profiling call `call_id` (no-op if it was not profiled)."""
+    if not _active:
+        return None
+    with _active_lock:
+        profile = _active.pop(call_id, None)
+    if profile is None:
+        return None
+    summary = profile.finish(cancelled=cancelled)
+    log_event("tool_profiled", tool=profile.tool, ticker=profile.ticker, agent=profile.agent,
+              seconds=summary["seconds"], peak_memory_bytes=summary["peak_memory_bytes"],
+              collapsed=summary["artifacts"]["collapsed"], cancelled=cancelled)
+    return summary
+
+
+def finish_invocation_profiles(invocation_id: str, agent: str | None = None) -> list[dict]:
+    """Finish the calls of `invocation_id` (made by `agent`, if given) that are still being profiled.
+
+    For agents cancelled mid-tool: their after_tool_callback never runs.
+    """
+    if not _active:
+        return []
+    with _active_lock:
+        keys = [key for key, profile in _active.items()
+                if profile.invocation_id == invocation_id and agent in (None, profile.agent)]
+    summaries = (finish_tool_profile(key, cancelled=True) for key in keys)
+    return [summary for summary in summaries if summary is not None]
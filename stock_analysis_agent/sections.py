@@ -0,0 +1,73 @@
+"""
+Per-ticker cache of sub-agent report sections and their degraded fallbacks.
+
+save_agent_output 在写 reports/<agent>_report.md 的同时，按股票代码缓存一份到
+SECTION_CACHE_DIR/<ticker>/<agent>_report.md；当子智能体超时或出错时，用最近的缓存版本
+（或“数据暂不可用”占位）填充该章节。
+"""
+import os
+import re
+import time
+from datetime import datetime
+
+from .config import SECTION_CACHE_DIR, SECTION_CACHE_MAX_AGE_DAYS
+from .metrics import record_cache
+from .tracing import annotate
+
+
+SECTION_TITLES = {
+    "fundamental_agent": "基本面分析报告",
+    "technical_agent": "技术面分析报告",
+    "fund_agent": "资金流向分析报告",
+    "policy_agent": "政策分析报告",
+}
+
+_TICKER_RE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+
+
+def resolve_ticker(state, user_content=None) -> str | None:
+    """The 6-digit ticker from session state, or from the text the agent was invoked with."""
+    ticker = state.get("provided_ticker") if state is not None else None
+    if ticker:
+        return str(ticker)
+    if user_content is not None and user_content.parts:
+        text = " ".join(p.text for p in user_content.parts if p.text)
+        if match := _TICKER_RE.search(text):
+            return match.group(1)
+    return None
+
+
+def _cache_path(agent_name: str, ticker: str) -> str:
+    return os.path.join(SECTION_CACHE_DIR, ticker, f"{agent_name}_report.md")
+
+
+def cache_section(agent_name: str, ticker: str, content: str) -> None:
+    path = _cache_path(agent_name, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def load_cached_section(agent_name: str, ticker: str,
+                        max_age_days: float = SECTION_CACHE_MAX_AGE_DAYS) -> tuple[str, datetime] | None:
+    """Most recent cached section for the ticker and when it was written, if fresh enough."""
+    path = _cache_path(agent_name, ticker)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    hit = mtime is not None and time.time() - mtime <= max_age_days * 86400
+    annotate(section_cache_hit=hit)
+    record_cache("section", hit)
+    if not hit:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read(), datetime.fromtimestamp(mtime)
+
+
+def fallback_section(agent_name: str, ticker: str | None, reason: str) -> tuple[str, str]:
+    """Markdown to use in place of a missing section, and its kind ("cached" or "unavailable")."""
+    cached = load_cached_section(agent_name, ticker) if ticker else None
+    if cached:
+        content, written_at = cached
+        note = f"> ⚠️ 本节为 {written_at:%Y-%m-%d %H:%M} 生成的缓存版本（{reason}）。\n\n"
+        return note + content, "cached"
+    title = SECTION_TITLES.get(agent_name, agent_name)
+    return f"# {title}\n\n> ⚠️ 数据暂不可用（{reason}），本节已跳过。\n", "unavailable"
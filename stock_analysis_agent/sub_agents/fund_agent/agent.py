@@ -1,20 +1,19 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from google.adk.models.lite_llm import LiteLlm
 
 
 from . import prompt
 from ...config import *
+from ...models import get_model
 from .tools import fetch_stock_individual_fund_flow, fetch_stock_chip_distribution, fetch_stock_institute_hold_detail, fetch_stock_hsgt_individual_detail, get_last_quarter
+from .flow_ranks import get_fund_flow_rank
 from ...tools import get_current_time
 from ...callbacks import *
+from ...payloads import enforce_tool_budget
 
 
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
+model_in_use = get_model("fund_agent")
 
 
 
@@ -30,8 +29,12 @@ fund_agent = LlmAgent(
         fetch_stock_chip_distribution,
         fetch_stock_institute_hold_detail,
         fetch_stock_hsgt_individual_detail,
+        get_fund_flow_rank,
         get_current_time
     ],
     before_agent_callback=call_log,
-    after_agent_callback=save_agent_output
+    after_agent_callback=save_agent_output,
+    after_model_callback=record_token_usage,
+    before_tool_callback=profile_tool_start,
+    after_tool_callback=[profile_tool_end, enforce_tool_budget]
 )
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""
+Market-wide daily fund-flow snapshot with cross-sectional ranks.
+
+fetch_stock_individual_fund_flow 只返回单只股票近 100 日的资金流向，无法判断某日主力净流入在全市场里算大还是小。
+这里每个交易日收盘后用一次 ak.stock_individual_fund_flow_rank(indicator="今日") 拉取全市场个股资金流，
+预先计算主力净流入（净额与净占比）在全市场和所属行业内的排名、百分位与 z 分数，以及各行业的合计净流入，
+按交易日存成列式文件（FUND_FLOW_SNAPSHOT_DIR/<日期>.npz，每列一个数组）。
+
+- snapshot_fund_flows()：收盘后的日任务，写入当日快照并只保留最近 FUND_FLOW_KEEP_DAYS 个交易日；
+  非交易日（按 ak.tool_trade_date_hist_sina 交易日历）或尚未收盘（MARKET_CLOSE，--force 可跳过该检查）时不写入
+- FlowSnapshot：加载后以 代码 -> 行号 的字典定位，单只股票查询为常数时间
+- get_fund_flow_rank：资金面 agent 的工具，返回个股最近几个交易日的排名上下文，多份报告共享同一份快照，
+  不再逐只请求
+
+行业取自基本面同行表（fundamental_agent/peers.py）的“所处行业”，未构建时直接读取 ak.stock_yjbb_em。
+
+    python -m stock_analysis_agent.sub_agents.fund_agent.flow_ranks
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from ...config import FUND_FLOW_KEEP_DAYS, FUND_FLOW_LOOKUP_DAYS, FUND_FLOW_SNAPSHOT_DIR, MARKET_CLOSE
+from ...eventlog import log_event
+from ...tracing import traced
+from ...upstream import call_akshare
+from ..fundamental_agent.peers import UNKNOWN_INDUSTRY, get_peer_table, report_periods, reported_companies
+
+# ak.stock_individual_fund_flow_rank(indicator="今日") column -> snapshot column
+FLOW_COLUMNS = {
+    "最新价": "close",
+    "今日涨跌幅": "pct_change",
+    "今日主力净流入-净额": "main_net",
+    "今日主力净流入-净占比": "main_ratio",
+    "今日超大单净流入-净额": "super_large_net",
+    "今日大单净流入-净额": "large_net",
+    "今日中单净流入-净额": "medium_net",
+    "今日小单净流入-净额": "small_net",
+}
+RANKED = ("main_net", "main_ratio")     # measures ranked across the market and within each industry
+
+
+def industry_map() -> dict[str, str]:
+    """code -> 所处行业: from the peer table, or one ak.stock_yjbb_em call when it has not been built."""
+    industries = get_peer_table().industries()
+    if not industries:
+        _, industries = reported_companies(report_periods())
+    return industries
+
+
+def rank_flows(frame):
+    """Add market / industry ranks (1 = largest), percentiles and z-scores of RANKED to `frame` (code, industry, ...).
+
+    Returns (frame, industries: industry, companies, main_net_total, rank by main_net_total).
+    """
+    import numpy as np
+
+    by_industry = frame.groupby("industry")
+    for measure in RANKED:
+        values = frame[measure]
+        frame[f"{measure}_market_rank"] = values.rank(ascending=False, method="min")
+        frame[f"{measure}_market_pct"] = values.rank(pct=True, method="max") * 100
+        std = values.std(ddof=0)
+        frame[f"{measure}_market_z"] = (values - values.mean()) / std if std > 0 else np.nan
+        grouped = by_industry[measure]
+        frame[f"{measure}_industry_rank"] = grouped.rank(ascending=False, method="min")
+        frame[f"{measure}_industry_pct"] = grouped.rank(pct=True, method="max") * 100
+        industry_std = grouped.transform("std", ddof=0)
+        frame[f"{measure}_industry_z"] = ((values - grouped.transform("mean")) / industry_std).where(industry_std > 0)
+    frame["market_count"] = frame["main_net"].notna().sum()
+    frame["industry_count"] = by_industry["main_net"].transform("count")
+    industries = by_industry.agg(companies=("code", "size"), main_net_total=("main_net", "sum")).reset_index()
+    industries["rank"] = industries["main_net_total"].rank(ascending=False, method="min")
+    return frame, industries
+
+
+class FlowSnapshot:
+    """One trading day's ranked snapshot, loaded from its .npz; `row(code)` is a dict lookup."""
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.path = path
+        self.date = os.path.basename(path)[:-len(".npz")]
+        with np.load(path) as data:
+            self.columns = {name: data[name] for name in data.files}
+        self._rows = {code: i for i, code in enumerate(self.columns["code"].tolist())}
+        self._industries = {name: i for i, name in enumerate(self.columns["ind_name"].tolist())}
+
+    def row(self, code: str) -> dict | None:
+        """The ticker's flows and rank context on this day, or None if it is not in the snapshot."""
+        i = self._rows.get(code)
+        if i is None:
+            return None
+        c = self.columns
+        industry = str(c["industry"][i])
+        j = self._industries[industry]
+        out = {
+            "主力净流入-净额": _value(c["main_net"][i], 0),
+            "主力净流入-净占比": _value(c["main_ratio"][i]),
+            "涨跌幅": _value(c["pct_change"][i]),
+            "market_count": int(c["market_count"][i]),
+            "industry_count": int(c["industry_count"][i]),
+        }
+        for measure, label in (("main_net", "net"), ("main_ratio", "ratio")):
+            for scope in ("market", "industry"):
+                out[f"{label}_{scope}_rank"] = _value(c[f"{measure}_{scope}_rank"][i], 0)
+                out[f"{label}_{scope}_percentile"] = _value(c[f"{measure}_{scope}_pct"][i])
+                out[f"{label}_{scope}_zscore"] = _value(c[f"{measure}_{scope}_z"][i])
+        out["industry_net_total"] = _value(c["ind_main_net_total"][j], 0)
+        out["industry_rank_among_industries"] = int(c["ind_rank"][j])
+        out["industries"] = len(self._industries)
+        return {"industry": industry, "flows": out}
+
+
+def _value(value, digits: int = 2):
+    value = float(value)
+    if value != value:
+        return None
+    return int(round(value)) if digits == 0 else round(value, digits)
+
+
+class FlowSnapshots:
+    """The snapshot files in `directory`, each loaded once and reloaded when rewritten."""
+
+    def __init__(self, directory: str = FUND_FLOW_SNAPSHOT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded: dict[str, tuple[float, FlowSnapshot]] = {}
+
+    def paths(self) -> list[str]:
+        """Snapshot files, oldest first."""
+        return sorted(glob.glob(os.path.join(self.directory, "????-??-??.npz")))
+
+    def latest(self, days: int) -> list[FlowSnapshot]:
+        """The last `days` snapshots, newest first."""
+        snapshots = []
+        with self._lock:
+            for path in reversed(self.paths()[-days:]):
+                mtime = os.path.getmtime(path)
+                cached = self._loaded.get(path)
+                if cached is None or cached[0] != mtime:
+                    cached = self._loaded[path] = (mtime, FlowSnapshot(path))
+                snapshots.append(cached[1])
+        return snapshots
+
+    def write(self, date: str, frame, industries, keep: int = FUND_FLOW_KEEP_DAYS) -> str:
+        """Save the ranked `frame` as the snapshot of `date` (YYYY-MM-DD) and drop all but the last `keep`."""
+        import numpy as np
+
+        frame = frame.sort_values("code")
+        columns = {"code": frame["code"].to_numpy(str), "industry": frame["industry"].to_numpy(str)}
+        for name in frame.columns.drop(["code", "industry"]):
+            columns[name] = frame[name].to_numpy(np.float64)
+        columns.update(ind_name=industries["industry"].to_numpy(str),
+                       ind_companies=industries["companies"].to_numpy(np.int32),
+                       ind_main_net_total=industries["main_net_total"].to_numpy(np.float64),
+                       ind_rank=industries["rank"].to_numpy(np.int32))
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{date}.npz")
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp, path)
+        for old in self.paths()[:-keep]:
+            os.remove(old)
+            with self._lock:
+                self._loaded.pop(old, None)
+        return path
+
+
+_snapshots: FlowSnapshots | None = None
+
+
+def get_flow_snapshots() -> FlowSnapshots:
+    """Process-wide snapshots in FUND_FLOW_SNAPSHOT_DIR."""
+    global _snapshots
+    if _snapshots is None:
+        _snapshots = FlowSnapshots()
+    return _snapshots
+
+
+def is_trading_day(day: str) -> bool:
+    """Whether `day` (YYYY-MM-DD) is on the exchange's trading calendar."""
+    import pandas as pd
+
+    calendar = call_akshare("tool_trade_date_hist_sina")
+    return day in set(pd.to_datetime(calendar["trade_date"]).dt.strftime("%Y-%m-%d"))
+
+
+def _now():
+    """Current time on the exchange's clock; replaced by benchmarks replaying past sessions."""
+    import pandas as pd
+
+    return pd.Timestamp.now(tz="Asia/Shanghai")
+
+
+def snapshot_fund_flows(force: bool = False, snapshots: FlowSnapshots | None = None) -> dict:
+    """After the close: fetch today's market-wide fund flows in one call, rank them and save the snapshot.
+
+    The snapshot is always labelled today in Shanghai: the endpoint only serves the current day, so
+    there is no way to snapshot another date. Before MARKET_CLOSE it is refused unless `force` (the
+    day's flows are still moving). Nothing is written for a day that is not on the trading calendar,
+    since the endpoint then still serves the last session. Returns a summary dict, with "skipped"
+    (the reason) when nothing was written.
+    """
+    import pandas as pd
+
+    snapshots = snapshots or get_flow_snapshots()
+    start = time.perf_counter()
+    now = _now()
+    trade_date = now.strftime("%Y-%m-%d")
+    if not force and now.strftime("%H:%M") < MARKET_CLOSE:
+        return _skipped(trade_date, f"before the {MARKET_CLOSE} close; pass --force to override")
+    if not is_trading_day(trade_date):
+        return _skipped(trade_date, "not a trading day")
+    df = call_akshare("stock_individual_fund_flow_rank", indicator="今日")
+    frame = pd.DataFrame({"code": df["代码"].astype(str).str.zfill(6)})
+    for source, column in FLOW_COLUMNS.items():
+        frame[column] = pd.to_numeric(df[source], errors="coerce")
+    frame = frame.drop_duplicates("code").dropna(subset=["main_net"]).reset_index(drop=True)
+    industries = industry_map()
+    frame.insert(1, "industry", [industries.get(code, UNKNOWN_INDUSTRY) for code in frame["code"]])
+    frame, by_industry = rank_flows(frame)
+    path = snapshots.write(trade_date, frame, by_industry)
+    summary = {"date": trade_date, "stocks": len(frame), "industries": len(by_industry),
+               "bytes": os.path.getsize(path), "seconds": round(time.perf_counter() - start, 2)}
+    log_event("fund_flow_snapshot", **summary)
+    return summary
+
+
+def _skipped(trade_date: str, reason: str) -> dict:
+    log_event("fund_flow_snapshot_skipped", level="warning", date=trade_date, reason=reason)
+    return {"date": trade_date, "skipped": reason}
+
+
+@traced()
+def get_fund_flow_rank(stock: str) -> Dict[str, Any]:
+    """
+    获取个股主力资金净流入在全市场及所属行业中的排名上下文（最近几个交易日，来自每日全市场资金流快照）。
+
+    Args:
+        stock (str): 股票代码，例如 "000425"。
+
+    Returns:
+        Dict[str, Any]: {"stock", "industry", "days": {日期 (新到旧): {
+            "主力净流入-净额", "主力净流入-净占比" (%), "涨跌幅" (%), "market_count", "industry_count",
+            "net_market_rank" / "net_industry_rank" (1 = 净流入最大), "net_market_percentile" / "net_industry_percentile",
+            "net_market_zscore" / "net_industry_zscore", 以及按净占比计算的 "ratio_*" 同名字段,
+            "industry_net_total" (行业合计主力净流入), "industry_rank_among_industries", "industries"}}}。
+        快照尚未生成或不包含该股票时返回 {"status": "unavailable", "message": ...}。
+    """
+    try:
+        snapshots = get_flow_snapshots().latest(FUND_FLOW_LOOKUP_DAYS)
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+    days, industry = {}, None
+    for snapshot in snapshots:
+        found = snapshot.row(stock)
+        if found is not None:
+            industry = industry or found["industry"]
+            days[snapshot.date] = found["flows"]
+    if not days:
+        return {"status": "unavailable", "message": f"全市场资金流快照中没有 {stock}（快照未生成或该股票未交易）。"}
+    return {"stock": stock, "industry": industry, "days": days}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Save today's market-wide fund-flow snapshot.")
+    parser.add_argument("--force", action="store_true",
+                        help="snapshot before the close (the flows are still intraday)")
+    args = parser.parse_args()
+    print(snapshot_fund_flows(args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -85,6 +85,16 @@ Available Data Endpoints (via function tools):
      - 持股市值变化–5日 (5-day Delta Market Value)
      - 持股市值变化–10日 (10-day Delta Market Value)
 
+5. **get_fund_flow_rank**
+   • Description: 每日收盘后全市场个股资金流快照中的排名上下文
+   • Use to judge whether the stock's main force net inflow is large or small relative to the whole market and to its industry peers.
+   • Inputs:
+     - stock (e.g. "000425")
+   • Outputs (for each of the last few trading days, newest first):
+     - 主力净流入–净额 / 净占比 及其全市场、行业内排名（1 = 净流入最大）、百分位和 z 分数
+     - 所属行业合计主力净流入及其在各行业中的排名
+   • Returns {"status": "unavailable"} when no snapshot has been saved; then skip the ranking context.
+
 Inputs (from calling agent/environment) (use defaults if not specified, don't ask user for further input of unspecified optional parameters):
 * provided_ticker: (string, mandatory) The stock symbol (e.g., “600519”).
 * market: (string, optional, default: "sh") One of “sh”, “sz”, or “bj”.
@@ -94,7 +104,7 @@ Inputs (from calling agent/environment) (use defaults if not specified, don't as
 Mandatory Process - Data Retrieval:
 
 1. **Source Exclusivity**
-   - Use only the function tools tool to fetch data from the four endpoints above.
+   - Use only the function tools tool to fetch data from the endpoints above.
    - Do not reference any other data sources or external websites.
 
 2. **Fetch Required Series**
@@ -119,6 +129,7 @@ Mandatory Process - Data Retrieval:
        - 机构名称
        – 日度持股市值及其 1日/5日/10日变化
        – 持股数量占A股百分比
+   - From **get_fund_flow_rank**: retrieve the market and industry ranking context for provided_ticker.
 
 3. **Validate Completeness**
    - Ensure that each retrieved series covers the requested timeframe or quarters.
@@ -132,6 +143,7 @@ Mandatory Process - Synthesis & Analysis:
      • Compute cumulative net inflow per category.
    - **Main Force vs. Retail**:
      • Compare 主力净流入 % vs combined 小单净流入 % (proxy for retail).
+     • Place the latest 主力净流入 in context: its market and industry rank, percentile and z-score, and whether the industry as a whole is seeing inflows.
    - **Chip Distribution Analysis**:
      • Compare latest closing price to 平均成本 to determine if stock is trading above/below cost.
      • Identify whether 90%筹码集中区已被突破。
@@ -185,6 +197,7 @@ Expected Text Output Structure (Convert to Chinese and Markdown format):
 ### 1.2 流向趋势分析
 - 特大单加速期
 - 主力与散户流向对比
+- 全市场及行业内资金流排名
 - 关键流向结构洞察
 
 ## 2. 筋位分布分析（过去 90 个交易日）
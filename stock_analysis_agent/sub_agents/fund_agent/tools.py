@@ -1,7 +1,9 @@
-import akshare as ak
 from typing import Dict, Any
 from datetime import datetime
 
+from ...tracing import traced
+from ...upstream import call_akshare
+
 
 def get_last_quarter():
     now = datetime.now()
@@ -16,6 +18,7 @@ def get_last_quarter():
 
 
 
+@traced()
 def fetch_stock_individual_fund_flow(stock: str, market: str) -> Dict[str, Dict[str, str]] | Dict[str, Any]:
     """
     获取指定市场和股票的近 100 个交易日的资金流向数据。
@@ -60,7 +63,7 @@ def fetch_stock_individual_fund_flow(stock: str, market: str) -> Dict[str, Dict[
     """
     try:
         # 从 AkShare 获取 DataFrame
-        df = ak.stock_individual_fund_flow(stock=stock, market=market)
+        df = call_akshare("stock_individual_fund_flow", stock=stock, market=market)
         if df is None or df.empty:
             return {}
 
@@ -82,10 +85,8 @@ def fetch_stock_individual_fund_flow(stock: str, market: str) -> Dict[str, Dict[
 
 
 
-import akshare as ak
-from typing import Dict, Any
-
 
+@traced()
 def fetch_stock_chip_distribution(symbol: str, adjust: str = "") -> Dict[str, Dict[str, str]] | Dict[str, Any]:
     """
     获取指定股票的近 90 个交易日筹码分布数据。
@@ -126,7 +127,7 @@ def fetch_stock_chip_distribution(symbol: str, adjust: str = "") -> Dict[str, Di
     """
     try:
         # 从 AkShare 获取 DataFrame
-        df = ak.stock_cyq_em(symbol=symbol, adjust=adjust)
+        df = call_akshare("stock_cyq_em", symbol=symbol, adjust=adjust)
         if df is None or df.empty:
             return {}
 
@@ -148,10 +149,8 @@ def fetch_stock_chip_distribution(symbol: str, adjust: str = "") -> Dict[str, Di
 
 
 
-import akshare as ak
-from typing import Dict
-
 
+@traced()
 def fetch_stock_institute_hold_detail(stock: str, quarter: str) -> Dict[str, Dict[str, str]] | Dict[str, Any]:
     """
     获取指定股票在某季度的机构持股详情。
@@ -194,7 +193,7 @@ def fetch_stock_institute_hold_detail(stock: str, quarter: str) -> Dict[str, Dic
     """
     try:
         # 从 AkShare 获取 DataFrame
-        df = ak.stock_institute_hold_detail(stock=stock, quarter=quarter)
+        df = call_akshare("stock_institute_hold_detail", stock=stock, quarter=quarter)
         if df is None or df.empty:
             return {}
 
@@ -216,10 +215,8 @@ def fetch_stock_institute_hold_detail(stock: str, quarter: str) -> Dict[str, Dic
 
 
 
-import akshare as ak
-from typing import Dict
-
 
+@traced()
 def fetch_stock_hsgt_individual_detail(symbol: str, start_date: str, end_date: str) -> Dict[str, Dict[str, str]] | Dict[str, Any]:
     """
     获取指定股票在沪深港通持股期间（最近 90 个交易日内）的个股持股详情数据。
@@ -259,7 +256,7 @@ def fetch_stock_hsgt_individual_detail(symbol: str, start_date: str, end_date: s
     """
     try:
         # 从 AkShare 获取 DataFrame
-        df = ak.stock_hsgt_individual_detail_em(symbol=symbol, start_date=start_date, end_date=end_date)
+        df = call_akshare("stock_hsgt_individual_detail_em", symbol=symbol, start_date=start_date, end_date=end_date)
         if df is None or df.empty:
             return {}
 
@@ -1,18 +1,17 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from google.adk.models.lite_llm import LiteLlm
 
 from . import prompt
 from ...config import *
+from ...models import get_model
 from .tools import fetch_stock_financial_indicators
+from .peers import get_industry_percentiles
 from ...callbacks import *
+from ...payloads import enforce_tool_budget
 from ...tools import get_current_time
 
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
+model_in_use = get_model("fundamental_agent")
 
 
 fundamental_agent = LlmAgent(
@@ -23,8 +22,12 @@ fundamental_agent = LlmAgent(
     output_key="fundamental_agent_output",
     tools=[
         fetch_stock_financial_indicators,
+        get_industry_percentiles,
         get_current_time
     ],
     before_agent_callback=call_log,
-    after_agent_callback=save_agent_output
+    after_agent_callback=save_agent_output,
+    after_model_callback=record_token_usage,
+    before_tool_callback=profile_tool_start,
+    after_tool_callback=[profile_tool_end, enforce_tool_budget]
 )
\ No newline at end of file
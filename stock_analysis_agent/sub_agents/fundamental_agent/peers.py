@@ -0,0 +1,313 @@
+"""
+Industry peer percentiles of key financial ratios for every A-share.
+
+fetch_stock_financial_indicators 只给出单家公司的指标，无法判断 ROE、毛利率在同行中是高是低。这里维护一张全 A 股的
+基本面表（同一个 ak.stock_financial_analysis_indicator 接口，只保留 PEER_RATIOS），并按 (行业, 报告期) 预先计算
+每个比率的百分位排名（行业内与全市场）以及行业中位数和四分位数：
+
+- refresh_peer_table()：一次 ak.stock_yjbb_em（业绩报表，一次请求覆盖全市场）找出最近报告期有新披露的公司，
+  只重新拉取这些公司的指标；行业取自同一接口的“所处行业”。随后重算百分位，写入 PEER_TABLE_PATH
+- PeerTable：列式存储（NumPy .npz，每列一个数组，按 代码、报告期 排序），按代码二分查找，查询为微秒级
+- get_industry_percentiles：基本面 agent 的工具，直接返回公司的行业百分位，请求时不再拉取同行数据
+
+    python -m stock_analysis_agent.sub_agents.fundamental_agent.peers
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import Dict
+
+from ...config import (
+    PEER_FETCH_WORKERS, PEER_HISTORY_YEARS, PEER_OUTPUT_REPORTS, PEER_RATIOS, PEER_REPORT_PERIODS, PEER_TABLE_PATH,
+)
+from ...eventlog import log_event
+from ...tracing import traced
+from ...upstream import call_akshare
+
+UNKNOWN_INDUSTRY = "未知"
+
+
+def report_periods(today=None, count: int = PEER_REPORT_PERIODS) -> list[str]:
+    """The last `count` quarter ends before `today` (default: today in Shanghai) as YYYYMMDD, newest first."""
+    import pandas as pd
+
+    today = pd.Timestamp(today) if today is not None else pd.Timestamp.now(tz="Asia/Shanghai").tz_localize(None)
+    ends = pd.date_range(end=today.normalize() - pd.Timedelta(days=1), periods=count, freq="QE")
+    return [d.strftime("%Y%m%d") for d in reversed(ends)]
+
+
+def reported_companies(periods: list[str]) -> tuple[dict, dict]:
+    """(code -> latest of `periods` it has published, code -> 所处行业) from ak.stock_yjbb_em, one call per period."""
+    import numpy as np
+
+    latest, industries = {}, {}
+    for period in periods:                      # newest first
+        df = call_akshare("stock_yjbb_em", date=period)
+        if df is None or df.empty:
+            continue
+        day = np.datetime64(f"{period[:4]}-{period[4:6]}-{period[6:]}", "D")
+        for code, industry in zip(df["股票代码"].astype(str), df["所处行业"]):
+            latest.setdefault(code, day)
+            if isinstance(industry, str) and industry:
+                industries.setdefault(code, industry)
+    return latest, industries
+
+
+def company_ratios(code: str, start_year: str):
+    """PEER_RATIOS of `code` by report date (columns code, date, *PEER_RATIOS), or None without data."""
+    import numpy as np
+    import pandas as pd
+
+    df = call_akshare("stock_financial_analysis_indicator", symbol=code, start_year=start_year)
+    if df is None or df.empty:
+        return None
+    out = pd.DataFrame({"code": code, "date": pd.to_datetime(df["日期"], errors="coerce")})
+    for ratio in PEER_RATIOS:
+        out[ratio] = pd.to_numeric(df[ratio], errors="coerce") if ratio in df else np.nan
+    out = out.dropna(subset=["date"])
+    out["date"] = out["date"].to_numpy("datetime64[D]")
+    return out
+
+
+def rank_peers(frame):
+    """Percentiles per row and statistics per (industry, date) for `frame` (code, industry, date, *PEER_RATIOS).
+
+    Returns (frame + industry_pct{i} / market_pct{i} columns, groups: industry, date, n{i}, p25{i}, median{i}, p75{i}).
+    A percentile is the share of companies (with a value) at or below this one, in percent.
+    """
+    import pandas as pd
+
+    by_industry = frame.groupby(["industry", "date"], sort=True)
+    by_date = frame.groupby("date")
+    groups = by_industry.size().rename("companies").to_frame()
+    for i, ratio in enumerate(PEER_RATIOS):
+        frame[f"industry_pct{i}"] = by_industry[ratio].rank(pct=True, method="max") * 100
+        frame[f"market_pct{i}"] = by_date[ratio].rank(pct=True, method="max") * 100
+        quantiles = by_industry[ratio].quantile([0.25, 0.5, 0.75]).unstack()
+        groups[f"n{i}"] = by_industry[ratio].count()
+        groups[f"p25{i}"], groups[f"median{i}"], groups[f"p75{i}"] = (quantiles[q] for q in (0.25, 0.5, 0.75))
+    return frame, groups.reset_index()
+
+
+class PeerTable:
+    """Columnar peer table at `path`: one array per column, rows sorted by (code, date)."""
+
+    def __init__(self, path: str = PEER_TABLE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded: tuple[float, dict, dict] | None = None    # (mtime, columns, (industry, date) -> group row)
+
+    def save(self, frame, groups) -> None:
+        import numpy as np
+
+        frame = frame.sort_values(["code", "date"]).reset_index(drop=True)
+        columns = {
+            "ratios": np.array(PEER_RATIOS),
+            "code": frame["code"].to_numpy(str),
+            "industry": frame["industry"].to_numpy(str),
+            "date": frame["date"].to_numpy("datetime64[D]"),
+            "g_industry": groups["industry"].to_numpy(str),
+            "g_date": groups["date"].to_numpy("datetime64[D]"),
+            "g_companies": groups["companies"].to_numpy(np.int32),
+        }
+        for i, ratio in enumerate(PEER_RATIOS):
+            columns[f"value{i}"] = frame[ratio].to_numpy(np.float64)
+            columns[f"industry_pct{i}"] = frame[f"industry_pct{i}"].to_numpy(np.float32)
+            columns[f"market_pct{i}"] = frame[f"market_pct{i}"].to_numpy(np.float32)
+            for stat in ("n", "p25", "median", "p75"):
+                columns[f"g_{stat}{i}"] = groups[f"{stat}{i}"].to_numpy(np.int32 if stat == "n" else np.float64)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **columns)
+        os.replace(tmp, self.path)
+
+    def columns(self) -> tuple[dict, dict] | None:
+        """(column -> array, (industry, date) -> group row), reloaded when the file changes; None if not built."""
+        import numpy as np
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != mtime:
+                with np.load(self.path) as data:
+                    columns = {name: data[name] for name in data.files}
+                if tuple(columns["ratios"]) != tuple(PEER_RATIOS):
+                    return None     # built with another PEER_RATIOS; needs a rebuild
+                groups = {(industry, day): i for i, (industry, day) in
+                          enumerate(zip(columns["g_industry"].tolist(), columns["g_date"].tolist()))}
+                self._loaded = (mtime, columns, groups)
+            return self._loaded[1], self._loaded[2]
+
+    def frame(self):
+        """The stored rows as a DataFrame (code, industry, date, *PEER_RATIOS); empty if not built."""
+        import pandas as pd
+
+        loaded = self.columns()
+        if loaded is None:
+            return pd.DataFrame(columns=["code", "industry", "date", *PEER_RATIOS])
+        columns, _ = loaded
+        data = {"code": columns["code"], "industry": columns["industry"], "date": columns["date"]}
+        data.update({ratio: columns[f"value{i}"] for i, ratio in enumerate(PEER_RATIOS)})
+        return pd.DataFrame(data)
+
+    def industries(self) -> dict[str, str]:
+        """code -> 所处行业 of every company in the table (empty if not built)."""
+        loaded = self.columns()
+        if loaded is None:
+            return {}
+        columns, _ = loaded
+        return dict(zip(columns["code"].tolist(), columns["industry"].tolist()))   # rows of a code share one industry
+
+    def lookup(self, code: str, reports: int = PEER_OUTPUT_REPORTS) -> dict | None:
+        """Percentiles of `code` for its latest `reports` report dates, newest first; None if not in the table."""
+        import numpy as np
+
+        loaded = self.columns()
+        if loaded is None:
+            return None
+        columns, groups = loaded
+        codes = columns["code"]
+        lo, hi = np.searchsorted(codes, code, side="left"), np.searchsorted(codes, code, side="right")
+        if lo == hi:
+            return None
+        rows = range(hi - 1, max(lo, hi - reports) - 1, -1)
+        industry = str(columns["industry"][hi - 1])
+        reports_out = {}
+        for row in rows:
+            day = columns["date"][row]
+            group = groups.get((str(columns["industry"][row]), day.item()))
+            ratios = {}
+            for i, ratio in enumerate(PEER_RATIOS):
+                value = columns[f"value{i}"][row]
+                if np.isnan(value):
+                    continue
+                ratios[ratio] = {
+                    "value": round(float(value), 4),
+                    "industry_percentile": _round(columns[f"industry_pct{i}"][row]),
+                    "market_percentile": _round(columns[f"market_pct{i}"][row]),
+                    "industry_median": _round(columns[f"g_median{i}"][group]) if group is not None else None,
+                    "industry_p25": _round(columns[f"g_p25{i}"][group]) if group is not None else None,
+                    "industry_p75": _round(columns[f"g_p75{i}"][group]) if group is not None else None,
+                    "peers": int(columns[f"g_n{i}"][group]) if group is not None else 0,
+                }
+            reports_out[str(day)] = ratios
+        return {"industry": industry, "reports": reports_out}
+
+
+def _round(value) -> float | None:
+    value = float(value)
+    return None if value != value else round(value, 2)
+
+
+_table: PeerTable | None = None
+
+
+def get_peer_table() -> PeerTable:
+    """Process-wide table at PEER_TABLE_PATH."""
+    global _table
+    if _table is None:
+        _table = PeerTable()
+    return _table
+
+
+async def _fetch(codes: list[str], start_year: str, workers: int) -> tuple[list, list[str]]:
+    limit = asyncio.Semaphore(workers)
+    frames, failed = [], []
+
+    async def one(code: str) -> None:
+        async with limit:
+            try:
+                df = await asyncio.to_thread(company_ratios, code, start_year)
+            except Exception as e:
+                failed.append(code)
+                log_event("peer_fetch_failed", level="warning", code=code, error=str(e))
+                return
+        if df is not None and not df.empty:
+            frames.append(df)
+
+    await asyncio.gather(*(one(c) for c in codes))
+    return frames, failed
+
+
+def refresh_peer_table(codes: list[str] | None = None, today=None, table: PeerTable | None = None,
+                       workers: int = PEER_FETCH_WORKERS) -> dict:
+    """Re-fetch companies with a newly published report (or `codes`), re-rank and save. Returns a summary dict.
+
+    A company is re-fetched when ak.stock_yjbb_em lists it for one of the last PEER_REPORT_PERIODS quarter
+    ends and the table has no row of that report date for it yet.
+    """
+    import numpy as np
+    import pandas as pd
+
+    table = table or get_peer_table()
+    start = time.perf_counter()
+    stored = table.frame()
+    periods = report_periods(today)
+    latest, industries = reported_companies(periods)
+    if codes is None:
+        have = stored.groupby("code")["date"].max().to_dict() if not stored.empty else {}
+        codes = sorted(code for code, day in latest.items() if code not in have or have[code] < day)
+    start_year = str(int(periods[0][:4]) - PEER_HISTORY_YEARS)
+    frames, failed = asyncio.run(_fetch(codes, start_year, workers))
+
+    refreshed = set(pd.concat(frames)["code"]) if frames else set()
+    kept = stored[~stored["code"].isin(refreshed)].drop(columns="industry")
+    frame = pd.concat([kept, *frames], ignore_index=True)
+    frame = frame[frame["date"] >= np.datetime64(f"{start_year}-01-01", "D")].copy()
+    previous = dict(zip(stored["code"], stored["industry"]))
+    frame["industry"] = [industries.get(c) or previous.get(c) or UNKNOWN_INDUSTRY for c in frame["code"]]
+    frame = frame.astype({ratio: np.float64 for ratio in PEER_RATIOS})
+    frame["date"] = frame["date"].to_numpy("datetime64[D]")
+    frame, groups = rank_peers(frame)
+    table.save(frame, groups)
+    summary = {"periods": periods, "fetched": len(codes), "failed": len(failed),
+               "companies": int(frame["code"].nunique()), "rows": len(frame),
+               "seconds": round(time.perf_counter() - start, 2)}
+    log_event("peer_table_refreshed", **summary)
+    return summary
+
+
+@traced()
+def get_industry_percentiles(symbol: str) -> Dict:
+    """
+    Percentile ranks of a company's key financial ratios among its industry peers and the whole market.
+
+    Args:
+        symbol (str): Stock code (e.g., "600004").
+
+    Returns:
+        Dict: {"symbol", "industry", "reports": {report date ("YYYY-MM-DD", newest first): {ratio (e.g.
+              "净资产收益率(%)", "销售毛利率(%)"): {"value", "industry_percentile", "market_percentile",
+              "industry_median", "industry_p25", "industry_p75", "peers"}}}}.
+              A percentile is the share of companies at or below this value, in percent; "peers" is the number
+              of companies in the industry with a value for that report date (recent dates fill up as
+              companies publish). {"status": "unavailable", "message": ...} when the peer table has not
+              been built or does not cover the company.
+    """
+    try:
+        found = get_peer_table().lookup(symbol)
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+    if found is None:
+        return {"status": "unavailable", "message": f"同行业百分位数据中没有 {symbol}（数据表未构建或未覆盖该公司）。"}
+    return {"symbol": symbol, **found}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh the industry peer table of financial ratios.")
+    parser.add_argument("--codes", nargs="+", help="re-fetch these companies (default: newly reported ones)")
+    parser.add_argument("--all", action="store_true", help="re-fetch every A-share")
+    args = parser.parse_args()
+    codes = args.codes
+    if args.all:
+        codes = call_akshare("stock_info_a_code_name")["code"].astype(str).tolist()
+    print(refresh_peer_table(codes))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-import akshare as ak
 from typing import Dict
 
+from ...tracing import traced
+from ...upstream import call_akshare
+
+
+@traced()
 def fetch_stock_financial_indicators(symbol: str, start_year: str) -> Dict:
     """
     Fetch historical financial indicators for a given stock symbol starting from start_year using AkShare.
@@ -34,7 +38,7 @@ def fetch_stock_financial_indicators(symbol: str, start_year: str) -> Dict:
     """
     try:
         # Retrieve DataFrame from AkShare
-        df = ak.stock_financial_analysis_indicator(symbol=symbol, start_year=start_year)
+        df = call_akshare("stock_financial_analysis_indicator", symbol=symbol, start_year=start_year)
         
         if df is None or df.empty:
             return {}
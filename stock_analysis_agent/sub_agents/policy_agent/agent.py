@@ -1,22 +1,20 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
 from google.adk.tools.agent_tool import AgentTool
-from google.adk.models.lite_llm import LiteLlm
 
 from dotenv import load_dotenv
 import os
 
 from ...callbacks import *
+from ...payloads import enforce_tool_budget
 from . import prompt
 from ...config import *
+from ...models import get_model
 from ...tools import get_current_time
-from .tools import google_search_agent_for_policy
+from .tools import google_search_agent_for_policy, search_policy_batch, search_policy_evidence
 
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
+model_in_use = get_model("policy_agent")
 
 
 
@@ -49,8 +47,13 @@ policy_agent = LlmAgent(
         #     )
         # ),
         AgentTool(agent=google_search_agent_for_policy),
+        search_policy_batch,
+        search_policy_evidence,
         get_current_time
     ],
     before_agent_callback=call_log,
-    after_agent_callback=save_agent_output
+    after_agent_callback=save_agent_output,
+    after_model_callback=record_token_usage,
+    before_tool_callback=profile_tool_start,
+    after_tool_callback=[profile_tool_end, enforce_tool_budget]
 )
@@ -0,0 +1,81 @@
+"""
+Search backends used by the policy evidence tools.
+
+A backend turns one query into a list of result dicts
+{"title": str, "url": str, "snippet": str, "published_date": str | None}.
+AgentSearchBackend runs google_search_agent_for_policy directly and reads the
+Google Search grounding metadata; any object with an async `search` method can
+stand in for it (e.g. benchmarks/search_standin.py).
+"""
+import uuid
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from ...tracing import upstream_span
+
+
+class SearchBackend:
+    """Interface for policy search backends."""
+
+    async def search(self, query: str) -> list[dict]:
+        raise NotImplementedError
+
+
+class AgentSearchBackend(SearchBackend):
+    """Runs a Google-Search LlmAgent once per query, outside of the calling agent's turn."""
+
+    def __init__(self, agent, app_name: str = "policy_search"):
+        self.agent = agent
+        self.app_name = app_name
+        self.runner = InMemoryRunner(agent=agent, app_name=app_name)
+
+    async def search(self, query: str) -> list[dict]:
+        user_id = "policy_agent"
+        with upstream_span("google_search", "search", query=query) as span:
+            session = await self.runner.session_service.create_session(
+                app_name=self.app_name, user_id=user_id, session_id=uuid.uuid4().hex
+            )
+            texts: list[str] = []
+            grounding = None
+            async for event in self.runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=query)]),
+            ):
+                if event.content and event.content.parts:
+                    texts.extend(p.text for p in event.content.parts if p.text)
+                if event.grounding_metadata:
+                    grounding = event.grounding_metadata
+            await self.runner.session_service.delete_session(
+                app_name=self.app_name, user_id=user_id, session_id=session.id
+            )
+            results = _results_from_grounding(query, "".join(texts), grounding)
+            span.set_attribute("rows", len(results))
+        return results
+
+
+def _results_from_grounding(query: str, text: str, grounding) -> list[dict]:
+    """One result per cited web source, with the answer segments it supports as snippet."""
+    chunks = (grounding.grounding_chunks or []) if grounding else []
+    if not chunks:
+        return [{"title": query, "url": "", "snippet": text.strip(), "published_date": None}] if text.strip() else []
+
+    segments: dict[int, list[str]] = {}
+    for support in grounding.grounding_supports or []:
+        if not support.segment or not support.segment.text:
+            continue
+        for idx in support.grounding_chunk_indices or []:
+            segments.setdefault(idx, []).append(support.segment.text.strip())
+
+    results = []
+    for idx, chunk in enumerate(chunks):
+        if not chunk.web:
+            continue
+        results.append({
+            "title": chunk.web.title or chunk.web.domain or "",
+            "url": chunk.web.uri or "",
+            "snippet": " ".join(segments.get(idx, [])),
+            "published_date": None,
+        })
+    return results
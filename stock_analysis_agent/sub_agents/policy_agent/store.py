@@ -0,0 +1,142 @@
+"""
+Policy evidence store shared across tickers.
+
+同一行业的公司触发的政策检索几乎相同，因此检索结果按 (行业, 政策维度, 日期) 建索引并落盘到 SQLite，
+以 URL 或内容哈希去重；在新鲜度窗口 (POLICY_EVIDENCE_MAX_AGE_DAYS) 内的结果可直接复用，无需再次搜索。
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from ...config import POLICY_STORE_PATH, POLICY_EVIDENCE_MAX_AGE_DAYS, POLICY_LOOKBACK_DAYS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    id             INTEGER PRIMARY KEY,
+    industry       TEXT NOT NULL,
+    topic          TEXT NOT NULL,
+    query          TEXT NOT NULL DEFAULT '',
+    title          TEXT NOT NULL DEFAULT '',
+    url            TEXT,
+    snippet        TEXT NOT NULL DEFAULT '',
+    content_hash   TEXT NOT NULL,
+    published_date TEXT,
+    fetched_at     REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_evidence_url ON evidence (industry, topic, url);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_evidence_hash ON evidence (industry, topic, content_hash);
+CREATE INDEX IF NOT EXISTS ix_evidence_lookup ON evidence (industry, topic, fetched_at);
+"""
+
+
+def normalize_key(value: str) -> str:
+    """Normalize an industry/topic label so that trivially different spellings share entries."""
+    return re.sub(r"\s+", "", value or "").lower()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(re.sub(r"\s+", " ", text or "").strip().encode("utf-8")).hexdigest()
+
+
+class PolicyEvidenceStore:
+    """SQLite-backed store of policy search results, indexed by industry, topic and date."""
+
+    def __init__(self, path: str = POLICY_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def lookup(self, industry: str, topic: str,
+               max_age_days: float = POLICY_EVIDENCE_MAX_AGE_DAYS,
+               lookback_days: int = POLICY_LOOKBACK_DAYS) -> list[dict]:
+        """Return fresh evidence for (industry, topic), newest publication first.
+
+        Entries fetched more than `max_age_days` ago, or published before the
+        `lookback_days` window, are not returned.
+        """
+        fetched_after = time.time() - max_age_days * 86400
+        published_after = (date.today() - timedelta(days=lookback_days)).isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT title, url, snippet, published_date, query, fetched_at FROM evidence
+                WHERE industry = ? AND topic = ? AND fetched_at >= ?
+                  AND (published_date IS NULL OR published_date >= ?)
+                ORDER BY published_date DESC, fetched_at DESC
+                """,
+                (normalize_key(industry), normalize_key(topic), fetched_after, published_after),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add(self, industry: str, topic: str, results: list[dict], query: str = "") -> int:
+        """Store search results; duplicates by URL or content hash are only re-dated.
+
+        Each result is a dict with "snippet" and optionally "title", "url" and
+        "published_date" ("YYYY-MM-DD"). Returns the number of new entries.
+        """
+        now = time.time()
+        rows = [
+            (
+                normalize_key(industry),
+                normalize_key(topic),
+                query,
+                r.get("title") or "",
+                r.get("url") or None,
+                r.get("snippet") or "",
+                content_hash(r.get("snippet") or r.get("title") or r.get("url") or ""),
+                r.get("published_date") or None,
+                now,
+            )
+            for r in results
+        ]
+        with self._lock, self._conn:
+            # 已存在的条目只刷新抓取时间，使其重新进入新鲜度窗口
+            self._conn.executemany(
+                """
+                UPDATE evidence SET fetched_at = ?
+                WHERE industry = ? AND topic = ? AND (url = ? OR content_hash = ?)
+                """,
+                [(row[8], row[0], row[1], row[4], row[6]) for row in rows],
+            )
+            before = self._conn.total_changes
+            self._conn.executemany(
+                """
+                INSERT OR IGNORE INTO evidence
+                    (industry, topic, query, title, url, snippet, content_hash, published_date, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def purge(self, older_than_days: float) -> int:
+        """Delete entries fetched more than `older_than_days` ago."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM evidence WHERE fetched_at < ?", (time.time() - older_than_days * 86400,)
+            )
+            return cur.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_store: PolicyEvidenceStore | None = None
+
+
+def get_policy_store() -> PolicyEvidenceStore:
+    """Process-wide store at POLICY_STORE_PATH, opened on first use."""
+    global _store
+    if _store is None:
+        _store = PolicyEvidenceStore()
+    return _store
@@ -1,13 +1,18 @@
+import asyncio
+import re
+
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
-from google.adk.models.lite_llm import LiteLlm
 
 from ...config import *
+from ...callbacks import record_token_usage
+from ...models import get_model
+from ...metrics import record_cache
+from ...tracing import annotate, traced
+from .search import SearchBackend, AgentSearchBackend
+from .store import get_policy_store, content_hash, normalize_key
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
+model_in_use = get_model("google_search_agent_for_policy")
 
 google_search_agent_for_policy = LlmAgent(
     model=model_in_use,
@@ -15,5 +20,163 @@ google_search_agent_for_policy = LlmAgent(
     instruction="""
     You're a spealist in Google Search who take a search query and return the results.
     """,
-    tools=[google_search]
-)
\ No newline at end of file
+    tools=[google_search],
+    after_model_callback=record_token_usage
+)
+
+
+_search_backend: SearchBackend | None = None
+
+
+def get_search_backend() -> SearchBackend:
+    global _search_backend
+    if _search_backend is None:
+        _search_backend = AgentSearchBackend(google_search_agent_for_policy)
+    return _search_backend
+
+
+def set_search_backend(backend: SearchBackend | None) -> None:
+    """Replace the search backend, e.g. with a local stand-in for tests and benchmarks."""
+    global _search_backend
+    _search_backend = backend
+
+
+@traced()
+async def search_policy_evidence(industry: str, topic: str, query: str) -> dict:
+    """
+    Search policy evidence for an industry and policy aspect, reusing results already
+    collected for other companies in the same industry.
+
+    Cached findings younger than the freshness window are returned without searching;
+    otherwise the query is run through Google Search and the results are stored under
+    (industry, topic) for later tickers.
+
+    Args:
+        industry (str): Industry name of the company, e.g. "新能源汽车整车制造".
+        topic (str): Policy aspect being researched, e.g. "宏观经济政策" or "行业监管政策".
+        query (str): Search query to run when no fresh cached evidence exists.
+
+    Returns:
+        dict: {"status": "success", "source": "cache" | "search", "industry": str, "topic": str,
+               "results": [{"title": str, "url": str, "snippet": str, "published_date": str | None}, ...]}
+              or {"status": "error", "error_message": str}
+    """
+    try:
+        source, results = await _evidence_for(industry, topic, [query])
+        annotate(cache_hit=source == "cache")
+        return {"status": "success", "source": source, "industry": industry, "topic": topic,
+                "results": [_public(r) for r in results]}
+    except Exception as e:
+        return {"status": "error", "error_message": f"Policy evidence search failed: {str(e)}"}
+
+
+@traced()
+async def search_policy_batch(industry: str, topics: list[str], queries: list[str]) -> dict:
+    """
+    Run several policy searches for one industry concurrently and return merged,
+    deduplicated and compacted results in a single response.
+
+    Use this instead of calling google_search_agent_for_policy once per policy aspect.
+    topics[i] is the policy aspect that queries[i] researches; several queries may share
+    a topic. Aspects with fresh cached evidence for the industry are served without searching.
+
+    Args:
+        industry (str): Industry name of the company, e.g. "新能源汽车整车制造".
+        topics (list[str]): Policy aspect for each query, e.g. ["宏观经济政策", "行业监管政策"].
+        queries (list[str]): Search queries, same length as topics.
+
+    Returns:
+        dict: {"status": "success", "industry": str,
+               "topics": {topic: {"source": "cache" | "search" | "error",
+                                  "results": [{"title": str, "url": str, "snippet": str, "published_date": str | None}, ...]}},
+               "stats": {"queries": int, "searched": int, "cache_hits": int, "duplicates_removed": int}}
+              or {"status": "error", "error_message": str}
+    """
+    if len(topics) != len(queries):
+        return {"status": "error", "error_message": "topics and queries must have the same length"}
+
+    grouped: dict[str, list[str]] = {}
+    for topic, query in zip(topics, queries):
+        grouped.setdefault(topic, []).append(query)
+
+    semaphore = asyncio.Semaphore(POLICY_SEARCH_CONCURRENCY)
+    outcomes = await asyncio.gather(
+        *(_evidence_for(industry, topic, qs, semaphore) for topic, qs in grouped.items()),
+        return_exceptions=True,
+    )
+
+    # 跨维度合并去重：同一 URL / 内容只保留第一次出现
+    seen: set[str] = set()
+    merged: dict[str, dict] = {}
+    stats = {"queries": len(queries), "searched": 0, "cache_hits": 0, "duplicates_removed": 0}
+    for (topic, qs), outcome in zip(grouped.items(), outcomes):
+        if isinstance(outcome, Exception):
+            merged[topic] = {"source": "error", "error_message": str(outcome), "results": []}
+            continue
+        source, results = outcome
+        if source == "cache":
+            stats["cache_hits"] += 1
+        else:
+            stats["searched"] += len(qs)
+        kept = []
+        for r in results:
+            key = r.get("url") or content_hash(r.get("snippet") or r.get("title") or "")
+            if key in seen:
+                stats["duplicates_removed"] += 1
+                continue
+            seen.add(key)
+            if len(kept) < POLICY_RESULTS_PER_TOPIC:
+                kept.append(_compact(r))
+        merged[topic] = {"source": source, "results": kept}
+
+    annotate(**{f"policy.{k}": v for k, v in stats.items()})
+    return {"status": "success", "industry": industry, "topics": merged, "stats": stats}
+
+
+# (event loop, industry, topic) -> search in progress, shared by concurrent requests for the same evidence
+_in_flight: dict[tuple, asyncio.Future] = {}
+
+
+async def _evidence_for(industry: str, topic: str, queries: list[str],
+                        semaphore: asyncio.Semaphore | None = None) -> tuple[str, list[dict]]:
+    """Fresh cached evidence for (industry, topic), or the results of searching `queries`."""
+    store = get_policy_store()
+    cached = store.lookup(industry, topic)
+    record_cache("policy_evidence", bool(cached))
+    if cached:
+        return "cache", cached
+
+    # 同行业的另一份报告（如批量运行中并发的同行业股票）正在检索同一维度时，等待其结果而不重复搜索
+    key = (asyncio.get_running_loop(), normalize_key(industry), normalize_key(topic))
+    pending = _in_flight.get(key)
+    if pending is not None:
+        return "cache", await asyncio.shield(pending)
+
+    async def run(query: str) -> list[dict]:
+        if semaphore is None:
+            return await get_search_backend().search(query)
+        async with semaphore:
+            return await get_search_backend().search(query)
+
+    async def search() -> list[dict]:
+        batches = await asyncio.gather(*(run(q) for q in queries))
+        results = []
+        for query, batch in zip(queries, batches):
+            store.add(industry, topic, batch, query=query)
+            results.extend(batch)
+        return results
+
+    task = _in_flight[key] = asyncio.ensure_future(search())
+    task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return "search", await asyncio.shield(task)
+
+
+def _compact(result: dict) -> dict:
+    snippet = re.sub(r"\s+", " ", result.get("snippet") or "").strip()
+    if len(snippet) > POLICY_SNIPPET_MAX_CHARS:
+        snippet = snippet[:POLICY_SNIPPET_MAX_CHARS] + "…"
+    return {**_public(result), "snippet": snippet}
+
+
+def _public(result: dict) -> dict:
+    return {k: result.get(k) for k in ("title", "url", "snippet", "published_date")}
@@ -1,19 +1,21 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from google.adk.models.lite_llm import LiteLlm
 
 
 from ...callbacks import *
+from ...payloads import enforce_tool_budget
 from . import prompt
 from ...config import *
+from ...models import get_model
 from .tools import calculate_technical_indicators
+from .intraday import get_intraday_indicators
+from .events import get_market_technical_context
+from .backtest import backtest_technical_signals
+from .timeframes import calculate_multi_timeframe_indicators
 from ...tools import get_current_time
 
 
-if MODEL in GEMINI_LIST:
-    model_in_use = MODEL
-else:
-    model_in_use = LiteLlm(model=MODEL)
+model_in_use = get_model("technical_agent")
 
 
 technical_agent = LlmAgent(
@@ -23,7 +25,14 @@ technical_agent = LlmAgent(
     instruction=prompt.TECHNICAL_AGENT_PROMPT,
     output_key="technical_agent_output",
     tools=[calculate_technical_indicators,
+           calculate_multi_timeframe_indicators,
+           get_intraday_indicators,
+           get_market_technical_context,
+           backtest_technical_signals,
            get_current_time],
     before_agent_callback=call_log,
-    after_agent_callback=save_agent_output
+    after_agent_callback=save_agent_output,
+    after_model_callback=record_token_usage,
+    before_tool_callback=profile_tool_start,
+    after_tool_callback=[profile_tool_end, enforce_tool_budget]
 )
\ No newline at end of file
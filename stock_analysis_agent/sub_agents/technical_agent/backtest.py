@@ -0,0 +1,233 @@
+"""
+Historical reliability of technical events: forward returns after each event.
+
+“突破布林带上轨”“突破60日均线”这类信号历史上灵不灵，不再交给 LLM 猜：对 events.event_flags() 给出的每个事件
+（与 calculate_technical_indicators 同一套定义），统计事件当日收盘买入后 1/5/20 个交易日（BACKTEST_HORIZONS）的
+前向收益分布（均值、中位数、10% / 90% 分位）与胜率（收益 > 0 的比例），并与同期全部交易日的基准比较。
+
+全部用 NumPy 数组运算：前向收益是收盘价序列的错位相除，事件样本是布尔掩码取行，没有逐笔交易的 Python 循环。
+连续类事件在达到 N 天的那一天计一次（如 "量价齐升>=3"），避免同一段连涨被重复计数。
+
+- signal_statistics()：一只股票的完整日线（daily_bars，即价格库或前复权下载）
+- universe_statistics()：价格库中的全部股票，逐只读取后合并样本；结果由命令行写入 BACKTEST_UNIVERSE_PATH
+- backtest_technical_signals：技术分析 agent 的工具，返回个股统计，并附上全市场统计（若已生成）
+
+    python -m stock_analysis_agent.sub_agents.technical_agent.backtest --ticker 600519 --signals 突破布林带上轨
+    python -m stock_analysis_agent.sub_agents.technical_agent.backtest --universe
+"""
+import argparse
+import json
+import os
+import time
+
+from ...config import BACKTEST_HORIZONS, BACKTEST_MIN_OCCURRENCES, BACKTEST_UNIVERSE_PATH
+from ...eventlog import log_event
+from ...tracing import traced
+from .bars import daily_bars
+from .events import CROSS_EVENTS, HIGH_LOW_EVENTS, STREAK_EVENTS, event_flags, parse_condition
+from .store import get_price_store
+
+DEFAULT_SIGNALS = HIGH_LOW_EVENTS + CROSS_EVENTS + tuple(f"{event}>=3" for event in STREAK_EVENTS)
+
+
+def forward_returns(close, horizons=BACKTEST_HORIZONS):
+    """(bars, horizons) array of close[i + h] / close[i] - 1; NaN where i + h is past the last bar."""
+    import numpy as np
+
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    returns = np.full((n, len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        if h < n:
+            returns[:n - h, j] = close[h:] / close[:-h] - 1
+    return returns
+
+
+def signal_masks(flags: dict, signals) -> dict:
+    """signal -> bool mask of the days it fires; a streak signal ("量价齐升>=3") fires on the day it reaches N."""
+    masks = {}
+    for signal in signals:
+        event, days = parse_condition(signal)
+        values = flags[event]
+        masks[signal] = values == days if event in STREAK_EVENTS else values.astype(bool)
+    return masks
+
+
+class _Samples:
+    """Forward returns after each signal plus running baseline totals, merged across tickers."""
+
+    def __init__(self, signals, horizons):
+        import numpy as np
+
+        self.signals, self.horizons = tuple(signals), tuple(horizons)
+        self.returns: dict[str, list] = {signal: [] for signal in self.signals}
+        self.last_date: dict[str, str] = {}
+        self.count = np.zeros(len(self.horizons))
+        self.total = np.zeros(len(self.horizons))
+        self.hits = np.zeros(len(self.horizons))
+        self.bars = 0
+
+    def add(self, df) -> None:
+        import numpy as np
+
+        returns = forward_returns(df["收盘"].to_numpy(), self.horizons)
+        valid = ~np.isnan(returns)
+        self.count += valid.sum(axis=0)
+        self.total += np.where(valid, returns, 0.0).sum(axis=0)
+        self.hits += (returns > 0).sum(axis=0)
+        self.bars += len(df)
+        dates = df["日期"].to_numpy()
+        for signal, mask in signal_masks(event_flags(df), self.signals).items():
+            if mask.any():
+                self.returns[signal].append(returns[mask])
+                last = str(dates[np.flatnonzero(mask)[-1]])
+                self.last_date[signal] = max(self.last_date.get(signal, last), last)
+
+    def baseline(self) -> dict:
+        """Mean forward return and hit rate over every bar, per horizon."""
+        return {
+            f"{h}d": {"count": int(self.count[j]),
+                      "mean_pct": _pct(self.total[j] / self.count[j]) if self.count[j] else None,
+                      "hit_rate": round(float(self.hits[j] / self.count[j]), 3) if self.count[j] else None}
+            for j, h in enumerate(self.horizons)
+        }
+
+    def summary(self, min_occurrences: int = 0) -> dict:
+        import numpy as np
+
+        baseline = self.baseline()
+        events = {}
+        for signal in self.signals:
+            if not self.returns[signal]:
+                continue
+            returns = np.concatenate(self.returns[signal])
+            if len(returns) < min_occurrences:
+                continue
+            stats = {"occurrences": len(returns), "last_date": self.last_date[signal]}
+            for j, h in enumerate(self.horizons):
+                column = returns[:, j]
+                column = column[~np.isnan(column)]
+                if not len(column):
+                    stats[f"{h}d"] = {"count": 0}
+                    continue
+                p10, median, p90 = np.percentile(column, [10, 50, 90])
+                mean = float(column.mean())
+                base = baseline[f"{h}d"]["mean_pct"]
+                stats[f"{h}d"] = {
+                    "count": len(column),
+                    "mean_pct": _pct(mean),
+                    "median_pct": _pct(median),
+                    "p10_pct": _pct(p10),
+                    "p90_pct": _pct(p90),
+                    "hit_rate": round(float((column > 0).mean()), 3),
+                    "excess_mean_pct": None if base is None else round(_pct(mean) - base, 2),
+                }
+            events[signal] = stats
+        return {"horizons": list(self.horizons), "bars": self.bars, "baseline": baseline, "events": events}
+
+
+def _pct(value) -> float:
+    return round(float(value) * 100, 2)
+
+
+def signal_statistics(df, signals=None, horizons=BACKTEST_HORIZONS) -> dict:
+    """Forward-return statistics after each of `signals` (default: every event) in one daily history."""
+    samples = _Samples(signals or DEFAULT_SIGNALS, horizons)
+    samples.add(df)
+    return samples.summary(0 if signals else BACKTEST_MIN_OCCURRENCES)
+
+
+def universe_statistics(tickers=None, signals=None, horizons=BACKTEST_HORIZONS, store=None) -> dict:
+    """signal_statistics over every ticker of the price store (or `tickers`), samples pooled across tickers."""
+    store = store or get_price_store()
+    tickers = tickers if tickers is not None else store.tickers()
+    samples = _Samples(signals or DEFAULT_SIGNALS, horizons)
+    start = time.perf_counter()
+    for ticker in tickers:
+        df = store.adjusted(ticker, "qfq")
+        if not df.empty:
+            samples.add(df)
+    stats = samples.summary(0 if signals else BACKTEST_MIN_OCCURRENCES)
+    stats["tickers"] = len(tickers)
+    log_event("signal_backtest_universe", tickers=len(tickers), bars=samples.bars,
+              seconds=round(time.perf_counter() - start, 2))
+    return stats
+
+
+def load_universe_statistics(path: str = BACKTEST_UNIVERSE_PATH) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@traced()
+def backtest_technical_signals(provided_ticker: str, signals: str = "") -> dict:
+    """
+    Historical forward returns after technical events of the specified stock (how reliable each signal has been).
+
+    Parameters:
+      provided_ticker (str): Stock code, e.g., "600519"
+      signals (str): Comma-separated events, e.g. "突破布林带上轨,突破60日均线,量价齐升>=3" (a streak event
+        with ">=N" counts the day the streak reaches N days). Empty: every event seen at least
+        BACKTEST_MIN_OCCURRENCES times.
+
+    Returns (dict):
+        {"ticker", "period": {"start", "end"}, "horizons" (trading days), "bars",
+         "baseline": {"1d" | "5d" | "20d": {"count", "mean_pct", "hit_rate"}} over every trading day,
+         "events": {signal: {"occurrences", "last_date",
+                             "1d" | "5d" | "20d": {"count", "mean_pct", "median_pct", "p10_pct", "p90_pct",
+                                                   "hit_rate", "excess_mean_pct" (vs. baseline)}}},
+         "market": the same statistics pooled over the whole market, when they have been computed}.
+        On failure: {"status": "error", "error_message": ...}.
+    """
+    try:
+        wanted = [s.strip() for s in signals.replace("，", ",").split(",") if s.strip()]
+        for signal in wanted:
+            parse_condition(signal)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+    try:
+        df = daily_bars(provided_ticker)
+        if df is None or df.empty:
+            return {"status": "error", "error_message": f"未能获取 {provided_ticker} 的历史日线数据。"}
+        result = {"ticker": provided_ticker,
+                  "period": {"start": str(df["日期"].iloc[0]), "end": str(df["日期"].iloc[-1])}}
+        result.update(signal_statistics(df, wanted or None))
+        market = load_universe_statistics()
+        if market is not None:
+            result["market"] = {
+                "tickers": market.get("tickers"),
+                "baseline": market["baseline"],
+                "events": {s: market["events"][s] for s in result["events"] if s in market["events"]},
+            }
+        return result
+    except Exception as e:
+        return {
+            "error": f"An exception occurred during calculation: {str(e)}"
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Forward-return statistics after technical events.")
+    parser.add_argument("--ticker", help="one stock (daily_bars); omit with --universe")
+    parser.add_argument("--universe", action="store_true", help=f"every ticker of the price store -> {BACKTEST_UNIVERSE_PATH}")
+    parser.add_argument("--signals", nargs="+", help='e.g. 突破布林带上轨 "量价齐升>=3" (default: every event)')
+    args = parser.parse_args()
+    if args.universe:
+        stats = universe_statistics(signals=args.signals)
+        os.makedirs(os.path.dirname(BACKTEST_UNIVERSE_PATH) or ".", exist_ok=True)
+        tmp = f"{BACKTEST_UNIVERSE_PATH}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, BACKTEST_UNIVERSE_PATH)
+        print(f"{stats['tickers']} tickers, {stats['bars']} bars -> {BACKTEST_UNIVERSE_PATH}")
+    elif args.ticker:
+        print(json.dumps(backtest_technical_signals(args.ticker, ",".join(args.signals or [])),
+                         ensure_ascii=False, indent=1))
+    else:
+        parser.error("--ticker or --universe is required")
+
+
+if __name__ == "__main__":
+    main()
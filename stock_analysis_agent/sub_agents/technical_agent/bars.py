@@ -0,0 +1,160 @@
+"""
+Daily price history shared by the technical tools.
+
+calculate_technical_indicators 与 calculate_multi_timeframe_indicators 都基于同一份前复权日线：
+daily_bars() 每个交易日每只股票只请求一次 ak.stock_zh_a_hist，结果按 (ticker, 日期) 缓存在进程内
+（最多 DAILY_BARS_CACHE_SIZE 只股票），周线 / 月线由它重采样得到，不再单独请求 period="weekly"/"monthly"。
+收盘（MARKET_CLOSE）前缓存的当日结果只保留 DAILY_BARS_INTRADAY_TTL_SECONDS 秒，盘中重跑时最后一根 K 线不会过期。
+
+PRICE_SOURCE="store" 时不再整段下载前复权历史：sync_price_store() 只补拉价格库（store.py）中缺少的不复权日线
+与后复权因子序列，前复权价格在读取时由因子换算。新日线的涨跌幅与 收盘/前一日收盘 不符即说明中间有除权除息，
+此时不等因子缓存过期（PRICE_FACTOR_MAX_AGE_HOURS）立即重新拉取因子；新浪的因子序列若还没有这一天，
+记为待补的除权日（factor_pending），之后每次同步都重新拉取，直到因子序列覆盖它。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from ...config import (
+    DAILY_BARS_CACHE_SIZE, DAILY_BARS_INTRADAY_TTL_SECONDS, MARKET_CLOSE, PRICE_SOURCE, PRICE_FACTOR_MAX_AGE_HOURS,
+)
+from ...eventlog import log_event
+from ...metrics import record_cache
+from ...upstream import call_akshare
+from .store import PriceStore, get_price_store
+
+HISTORY_START_DATE = "19910101"
+PCT_CHANGE_TOLERANCE = 0.01         # percentage points; 涨跌幅 is reported to 2 decimals
+
+# (ticker, end_date) -> (daily frame sorted by date, expiry time or None); frames are never mutated once cached
+_daily: "OrderedDict[tuple[str, str], tuple[object, float | None]]" = OrderedDict()
+_daily_lock = threading.Lock()
+
+
+def today_shanghai():
+    """Today's date (normalized Timestamp) in the Asia/Shanghai timezone."""
+    import pandas as pd
+
+    return pd.Timestamp.now(tz="Asia/Shanghai").normalize()
+
+
+def before_close(end_date: str) -> bool:
+    """Whether `end_date` (YYYYMMDD) is today in Shanghai and the session has not closed yet."""
+    import pandas as pd
+
+    now = pd.Timestamp.now(tz="Asia/Shanghai")
+    return end_date == now.strftime("%Y%m%d") and now.strftime("%H:%M") < MARKET_CLOSE
+
+
+def daily_bars(ticker: str, end_date: str | None = None):
+    """Full qfq daily history of `ticker` up to `end_date` (YYYYMMDD, default today in Shanghai).
+
+    Returns a DataFrame sorted by 日期 with a fresh RangeIndex, or None / an empty frame when
+    AkShare has no data. Callers must treat it as read-only (copy before adding columns).
+    """
+    end_date = end_date or today_shanghai().strftime("%Y%m%d")
+    key = (ticker, end_date)
+    with _daily_lock:
+        df, expires = _daily.get(key, (None, None))
+        if expires is not None and time.time() > expires:
+            del _daily[key]
+            df = None
+        if df is not None:
+            _daily.move_to_end(key)
+    record_cache("daily_bars", df is not None)
+    if df is not None:
+        return df
+
+    if PRICE_SOURCE == "store":
+        store = sync_price_store(ticker, end_date)
+        df = store.adjusted(ticker, "qfq", f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}")
+    else:
+        df = call_akshare(
+            "stock_zh_a_hist",
+            symbol=ticker,
+            period="daily",
+            start_date=HISTORY_START_DATE,
+            end_date=end_date,
+            adjust="qfq"
+        )
+    if df is None or df.empty:
+        return df
+    df = df.sort_values("日期").reset_index(drop=True)
+    expires = time.time() + DAILY_BARS_INTRADAY_TTL_SECONDS if before_close(end_date) else None
+    with _daily_lock:
+        _daily[key] = (df, expires)
+        while len(_daily) > DAILY_BARS_CACHE_SIZE:
+            _daily.popitem(last=False)
+    return df
+
+
+def market_symbol(ticker: str) -> str:
+    """Sina-style symbol with the exchange prefix, e.g. "sh600519"."""
+    if ticker.startswith(("6", "9")):
+        return f"sh{ticker}"
+    if ticker.startswith(("4", "8")):
+        return f"bj{ticker}"
+    return f"sz{ticker}"
+
+
+def sync_price_store(ticker: str, end_date: str, store: PriceStore | None = None) -> PriceStore:
+    """Bring `ticker` in the price store up to `end_date` (YYYYMMDD).
+
+    Fetches the unadjusted bars from the last stored day on (that day again, in case it was
+    stored mid-session) and the hfq factor series when it is older than PRICE_FACTOR_MAX_AGE_HOURS
+    or the new bars cross an ex-date (see ex_dates). A dividend or split therefore costs one small
+    factor download, not the whole history. An ex-date the fetched series does not reach yet (the
+    factors can be published a day late) stays pending and is re-fetched on every sync until covered.
+    """
+    store = store or get_price_store()
+    last = store.last_date(ticker)
+    bars = call_akshare(
+        "stock_zh_a_hist",
+        symbol=ticker,
+        period="daily",
+        start_date=last.replace("-", "") if last else HISTORY_START_DATE,
+        end_date=end_date,
+        adjust=""
+    )
+    added = store.add_bars(ticker, bars)
+
+    _, fetched_at = store.factors(ticker)
+    stale = fetched_at is None or time.time() - fetched_at > PRICE_FACTOR_MAX_AGE_HOURS * 3600
+    crossed = ex_dates(bars) if last else []
+    pending = store.pending_ex_date(ticker)
+    awaited = max(crossed + ([pending] if pending else []), default=None)
+    if stale or awaited:
+        factors = call_akshare("stock_zh_a_daily", symbol=market_symbol(ticker), adjust="hfq-factor")
+        fetched = factors is not None and not factors.empty
+        if fetched and store.set_factors(ticker, factors):
+            log_event("price_factors_updated", ticker=ticker, factors=len(factors), ex_dates=crossed)
+        if awaited:
+            covered = fetched and factors["date"].astype(str).str[:10].max() >= awaited
+            store.set_pending_ex_date(ticker, None if covered else awaited)
+            if not covered:
+                log_event("price_factors_missing_ex_date", level="warning", ticker=ticker, ex_date=awaited)
+    log_event("price_store_synced", level="debug", ticker=ticker, bars=added)
+    return store
+
+
+def ex_dates(bars) -> list[str]:
+    """Dates (YYYY-MM-DD) in unadjusted `bars` whose 涨跌幅 disagrees with close / previous close.
+
+    涨跌幅 is relative to the exchange's ex-rights previous close, so the two differ exactly on
+    ex-dividend / ex-rights days.
+    """
+    import pandas as pd
+
+    if bars is None or len(bars) < 2 or "涨跌幅" not in bars:
+        return []
+    frame = bars.sort_values("日期")
+    implied = (frame["收盘"].astype(float).pct_change() * 100).iloc[1:]
+    reported = pd.to_numeric(frame["涨跌幅"], errors="coerce").iloc[1:]
+    differs = (implied - reported).abs() > PCT_CHANGE_TOLERANCE + 1e-9
+    return [str(day)[:10] for day in frame["日期"].iloc[1:][differs]]
+
+
+def clear_daily_bars() -> None:
+    """Drop every cached daily history (e.g. after the replayed fixtures change)."""
+    with _daily_lock:
+        _daily.clear()
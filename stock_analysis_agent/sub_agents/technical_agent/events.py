@@ -0,0 +1,368 @@
+"""
+Market-wide inverted index of technical events.
+
+calculate_technical_indicators 为单只股票算出的技术事件（新高 / 新低、突破 / 跌破均线与布林带、连续上涨、量价齐升等）
+在这里按全市场每晚计算一次，存成倒排索引：(交易日, 事件) -> 排好序的股票代码数组（6 位代码直接作 uint32），
+连续类事件同时保存天数（uint16），可以按 “≥ N 天” 筛选。
+
+- event_flags()：与 tools.py 第 9 节相同定义的向量化实现，对整段历史一次算出每个事件
+- build_event_index()：夜间任务，对全市场（或给定股票）计算最近几个交易日的事件并写入 EVENT_INDEX_PATH
+- EventIndex.screen()：如 ["一年新高", "量价齐升>=3"] 的条件取交集，毫秒级返回
+- get_market_technical_context：技术分析 agent 的工具，返回个股事件在全市场中的占比与市场宽度
+
+    python -m stock_analysis_agent.sub_agents.technical_agent.events --days 1
+    python -m stock_analysis_agent.sub_agents.technical_agent.events --screen 一年新高 "量价齐升>=3"
+"""
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ...config import EVENT_INDEX_PATH, EVENT_INDEX_WORKERS
+from ...eventlog import log_event
+from ...tracing import traced
+from ...upstream import call_akshare
+from .bars import daily_bars
+from .tools import _MA_WINDOWS, _run_lengths
+
+HIGH_LOW_EVENTS = ("创月新高", "创月新低", "半年新高", "半年新低", "一年新高", "一年新低", "历史新高", "历史新低")
+CROSS_EVENTS = (
+    *(f"突破{w}日均线" for w in _MA_WINDOWS),
+    *(f"跌破{w}日均线" for w in _MA_WINDOWS),
+    "突破布林带上轨",
+    "跌破布林带下轨",
+)
+# value = consecutive days (tools.py: 连续上涨天数, 持续放量天数, 量价齐升天数, ...)
+STREAK_EVENTS = ("连续上涨", "连续下跌", "持续放量", "持续缩量", "量价齐升", "量价齐跌")
+EVENTS = HIGH_LOW_EVENTS + CROSS_EVENTS + STREAK_EVENTS
+
+_CONDITION_RE = re.compile(r"^\s*(.+?)\s*(?:(?:>=|≥)\s*(\d+))?\s*$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_days (
+    date     TEXT PRIMARY KEY,
+    tickers  INTEGER NOT NULL,
+    built_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    date    TEXT NOT NULL,
+    event   TEXT NOT NULL,
+    tickers BLOB NOT NULL,
+    days    BLOB,
+    PRIMARY KEY (date, event)
+) WITHOUT ROWID;
+"""
+
+
+def event_flags(df) -> dict:
+    """Every event of EVENTS over the whole history of `df` (a daily_bars frame), vectorized.
+
+    Returns event -> array aligned with the rows of `df`: bool for new highs / lows and crossings,
+    the number of consecutive days (0 when absent) for STREAK_EVENTS. Definitions are those of
+    calculate_technical_indicators, including the comparison against the rounded Bollinger bands.
+    """
+    import numpy as np
+    import pandas as pd
+
+    close = df["收盘"].to_numpy(np.float64)
+    volume = df["成交量"].to_numpy()
+    s = pd.Series(close)
+    flags = {}
+
+    for high, low, window in (("创月新高", "创月新低", 20), ("半年新高", "半年新低", 126), ("一年新高", "一年新低", 252)):
+        rolling_max = s.rolling(window=window).max().to_numpy()
+        rolling_min = s.rolling(window=window).min().to_numpy()
+        flags[high] = ~np.isnan(rolling_max) & (close >= rolling_max)
+        flags[low] = ~np.isnan(rolling_min) & (close <= rolling_min)
+    flags["历史新高"] = close >= np.maximum.accumulate(close)
+    flags["历史新低"] = close <= np.minimum.accumulate(close)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+
+    def crossings(line):
+        prev = np.concatenate(([np.nan], line[:-1]))
+        valid = ~np.isnan(line) & ~np.isnan(prev)
+        return valid & (prev_close < prev) & (close >= line), valid & (prev_close > prev) & (close <= line)
+
+    for window in _MA_WINDOWS:
+        flags[f"突破{window}日均线"], flags[f"跌破{window}日均线"] = crossings(s.rolling(window=window).mean().to_numpy())
+    bb_mid, bb_std = s.rolling(window=20).mean(), s.rolling(window=20).std()
+    flags["突破布林带上轨"] = crossings((bb_mid + 2 * bb_std).round(2).to_numpy())[0]
+    flags["跌破布林带下轨"] = crossings((bb_mid - 2 * bb_std).round(2).to_numpy())[1]
+
+    price_up = np.concatenate(([False], close[1:] > close[:-1]))
+    price_down = np.concatenate(([False], close[1:] < close[:-1]))
+    volume_up = np.concatenate(([False], volume[1:] > volume[:-1]))
+    volume_down = np.concatenate(([False], volume[1:] < volume[:-1]))
+    for name, mask in (("连续上涨", price_up), ("连续下跌", price_down), ("持续放量", volume_up),
+                       ("持续缩量", volume_down), ("量价齐升", price_up & volume_up),
+                       ("量价齐跌", price_down & volume_down)):
+        flags[name] = _run_lengths(mask)
+    return flags
+
+
+def parse_condition(condition: str) -> tuple[str, int]:
+    """"量价齐升>=3" -> ("量价齐升", 3); a bare event name needs at least one day / occurrence."""
+    match = _CONDITION_RE.match(condition)
+    event, days = match.group(1), int(match.group(2) or 1)
+    if event not in EVENTS:
+        raise ValueError(f"unknown technical event {event!r}; expected one of {', '.join(EVENTS)}")
+    if match.group(2) and event not in STREAK_EVENTS:
+        raise ValueError(f"{event} is not a streak event; '>= N' only applies to {', '.join(STREAK_EVENTS)}")
+    return event, days
+
+
+class EventIndex:
+    """SQLite-backed (date, event) -> sorted ticker array index; decoded days are kept in memory."""
+
+    def __init__(self, path: str = EVENT_INDEX_PATH, cached_days: int = 8):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._cached_days = cached_days
+        self._days: "OrderedDict[str, tuple[int, dict]]" = OrderedDict()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def write_day(self, date: str, postings: dict, tickers: int) -> None:
+        """Replace the postings of `date` (YYYY-MM-DD): event -> (sorted uint32 codes, uint16 days or None)."""
+        rows = [(date, event, codes.tobytes(), None if days is None else days.tobytes())
+                for event, (codes, days) in postings.items() if len(codes)]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings WHERE date = ?", (date,))
+            self._conn.executemany("INSERT INTO postings (date, event, tickers, days) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO indexed_days (date, tickers, built_at) VALUES (?, ?, ?)",
+                               (date, tickers, time.time()))
+            self._days.pop(date, None)
+
+    def dates(self) -> list[str]:
+        """Indexed trading days, oldest first."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT date FROM indexed_days ORDER BY date")]
+
+    def latest_date(self) -> str | None:
+        with self._lock:
+            return self._conn.execute("SELECT MAX(date) FROM indexed_days").fetchone()[0]
+
+    def _day(self, date: str | None) -> tuple[str, int, dict]:
+        """(date, tickers indexed that day, event -> (codes, days or None)) for `date` (default: latest)."""
+        import numpy as np
+
+        date = date or self.latest_date()
+        if date is None:
+            raise LookupError("the technical event index is empty; run build_event_index() first")
+        with self._lock:
+            cached = self._days.get(date)
+            if cached is not None:
+                self._days.move_to_end(date)
+                return (date, *cached)
+            row = self._conn.execute("SELECT tickers FROM indexed_days WHERE date = ?", (date,)).fetchone()
+            if row is None:
+                raise LookupError(f"{date} is not in the technical event index")
+            postings = {
+                event: (np.frombuffer(codes, dtype=np.uint32),
+                        None if days is None else np.frombuffer(days, dtype=np.uint16))
+                for event, codes, days in self._conn.execute(
+                    "SELECT event, tickers, days FROM postings WHERE date = ?", (date,))
+            }
+            self._days[date] = (row[0], postings)
+            while len(self._days) > self._cached_days:
+                self._days.popitem(last=False)
+        return date, row[0], postings
+
+    def screen(self, conditions, date: str | None = None) -> list[str]:
+        """Tickers matching every condition (e.g. ["一年新高", "量价齐升>=3"]) on `date` (default: latest)."""
+        import numpy as np
+
+        _, _, postings = self._day(date)
+        matches = []
+        for event, min_days in map(parse_condition, conditions):
+            codes, days = postings.get(event, (np.empty(0, np.uint32), None))
+            matches.append(codes if days is None or min_days <= 1 else codes[days >= min_days])
+        if not matches:
+            return []
+        matches.sort(key=len)
+        result = matches[0]
+        for codes in matches[1:]:
+            result = np.intersect1d(result, codes, assume_unique=True)
+        return [f"{code:06d}" for code in result]
+
+    def events_of(self, ticker: str, date: str | None = None) -> dict:
+        """Events of `ticker` on `date` (default: latest): event -> True, or the number of days for streaks."""
+        import numpy as np
+
+        _, _, postings = self._day(date)
+        code = np.uint32(int(ticker))
+        found = {}
+        for event in EVENTS:
+            if event not in postings:
+                continue
+            codes, days = postings[event]
+            i = np.searchsorted(codes, code)
+            if i < len(codes) and codes[i] == code:
+                found[event] = True if days is None else int(days[i])
+        return found
+
+    def breadth(self, date: str | None = None) -> tuple[str, int, dict]:
+        """(date, tickers indexed, event -> number of tickers with it) on `date` (default: latest)."""
+        date, tickers, postings = self._day(date)
+        return date, tickers, {event: len(postings[event][0]) for event in EVENTS if event in postings}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_index: EventIndex | None = None
+
+
+def get_event_index() -> EventIndex:
+    """Process-wide index at EVENT_INDEX_PATH, opened on first use."""
+    global _index
+    if _index is None:
+        _index = EventIndex()
+    return _index
+
+
+def _ticker_events(ticker: str, end_date: str | None, days: int) -> list[tuple[str, dict]]:
+    """[(date, event -> True / streak days)] for the last `days` bars of `ticker`."""
+    import numpy as np
+
+    df = daily_bars(ticker, end_date)
+    if df is None or df.empty:
+        return []
+    flags = event_flags(df)
+    rows = []
+    for i in range(max(0, len(df) - days), len(df)):
+        events = {}
+        for event, values in flags.items():
+            value = values[i]
+            if value:
+                events[event] = True if values.dtype == np.bool_ else int(value)
+        rows.append((str(df["日期"].iloc[i]), events))
+    return rows
+
+
+async def _collect(tickers: list[str], end_date: str | None, days: int, workers: int) -> tuple[dict, list[str]]:
+    limit = asyncio.Semaphore(workers)
+    by_date: dict[str, dict[str, list]] = {}   # date -> ticker -> events (filled as results arrive)
+    failed = []
+
+    async def one(ticker: str) -> None:
+        async with limit:
+            try:
+                rows = await asyncio.to_thread(_ticker_events, ticker, end_date, days)
+            except Exception as e:
+                failed.append(ticker)
+                log_event("event_index_ticker_failed", level="warning", ticker=ticker, error=str(e))
+                return
+        for date, events in rows:
+            by_date.setdefault(date, {})[ticker] = events
+
+    await asyncio.gather(*(one(t) for t in tickers))
+    return by_date, failed
+
+
+def _postings(events_by_ticker: dict[str, dict]) -> dict:
+    """ticker -> events of one day, inverted to event -> (sorted uint32 codes, uint16 days or None)."""
+    import numpy as np
+
+    lists: dict[str, list] = {}
+    for ticker, events in events_by_ticker.items():
+        for event, value in events.items():
+            lists.setdefault(event, []).append((int(ticker), value))
+    postings = {}
+    for event, entries in lists.items():
+        entries.sort()
+        codes = np.array([code for code, _ in entries], dtype=np.uint32)
+        days = None if event not in STREAK_EVENTS else np.array(
+            [min(value, 65535) for _, value in entries], dtype=np.uint16)
+        postings[event] = (codes, days)
+    return postings
+
+
+def build_event_index(end_date: str | None = None, tickers: list[str] | None = None, days: int = 1,
+                      index: EventIndex | None = None, workers: int = EVENT_INDEX_WORKERS) -> dict:
+    """Nightly job: index the events of the last `days` trading days up to `end_date` (YYYYMMDD).
+
+    `tickers` defaults to every A-share (stock_info_a_code_name). Daily bars come from
+    daily_bars(), so PRICE_SOURCE="store" makes re-runs incremental. Returns a summary dict.
+    """
+    index = index or get_event_index()
+    if tickers is None:
+        tickers = call_akshare("stock_info_a_code_name")["code"].astype(str).tolist()
+    start = time.perf_counter()
+    by_date, failed = asyncio.run(_collect(tickers, end_date, days, workers))
+    # a ticker suspended on the latest day contributes older bars; keep only the most recent `days` dates
+    dates = sorted(by_date)[-days:]
+    for date in dates:
+        index.write_day(date, _postings(by_date[date]), len(by_date[date]))
+    summary = {"dates": dates, "tickers": len(tickers), "failed": len(failed),
+               "seconds": round(time.perf_counter() - start, 2)}
+    log_event("event_index_built", **summary)
+    return summary
+
+
+@traced()
+def get_market_technical_context(provided_ticker: str) -> dict:
+    """
+    Market-wide context for the technical events of the specified stock, from the nightly event index.
+
+    Parameters:
+      provided_ticker (str): Stock code, e.g., "600519"
+
+    Returns (dict):
+        {"date" (trading day of the index), "tickers_indexed",
+         "ticker_events": {event: {"value" (true, or consecutive days for 连续上涨 / 量价齐升 / ...),
+                                   "market_count" (stocks with the same event that day), "market_pct"}},
+         "market_breadth": {event: {"count", "pct"}} for every event that occurred that day}.
+        When the index has not been built: {"status": "unavailable", "message": ...}.
+        For a malformed ticker or an unreadable index: {"status": "error", "error_message": ...}.
+    """
+    if not isinstance(provided_ticker, str) or not re.fullmatch(r"\d{6}", provided_ticker):
+        return {"status": "error", "error_message": f"provided_ticker 应为 6 位 A 股代码，收到 {provided_ticker!r}"}
+    try:
+        index = get_event_index()
+        date, tickers, counts = index.breadth()
+        events = index.events_of(provided_ticker, date)
+    except LookupError as e:
+        return {"status": "unavailable", "message": f"全市场技术事件索引不可用：{e}"}
+    except Exception as e:      # e.g. sqlite3.Error from a locked or corrupt index file
+        return {"status": "error", "error_message": f"读取全市场技术事件索引失败：{type(e).__name__}: {e}"}
+
+    def pct(count: int) -> float:
+        return round(count / tickers * 100, 2) if tickers else 0.0
+
+    return {
+        "date": date,
+        "tickers_indexed": tickers,
+        "ticker_events": {event: {"value": value, "market_count": counts.get(event, 0),
+                                  "market_pct": pct(counts.get(event, 0))} for event, value in events.items()},
+        "market_breadth": {event: {"count": count, "pct": pct(count)} for event, count in counts.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the technical event index.")
+    parser.add_argument("--date", help="last trading day to index, YYYYMMDD (default: today)")
+    parser.add_argument("--days", type=int, default=1, help="trading days to (re)index")
+    parser.add_argument("--tickers", nargs="+", help="default: every A-share")
+    parser.add_argument("--screen", nargs="+", metavar="CONDITION", help='query instead, e.g. 一年新高 "量价齐升>=3"')
+    args = parser.parse_args()
+    if args.screen:
+        index = get_event_index()
+        date = f"{args.date[:4]}-{args.date[4:6]}-{args.date[6:]}" if args.date else None
+        start = time.perf_counter()
+        found = index.screen(args.screen, date)
+        print(f"{len(found)} tickers ({(time.perf_counter() - start) * 1e3:.2f} ms): {' '.join(found)}")
+    else:
+        print(build_event_index(args.date, args.tickers, args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Streaming intraday indicators from minute bars.
+
+盘中按 INTRADAY_TIMEFRAMES（1/5/15 分钟）计算 RSI(14)、MACD(12, 26, 9) 与成交量放大倍数（÷ 最近 20 根均量），
+以及当日 VWAP（典型价 (高+低+收)/3 按成交量加权，每个交易日重置）。分钟线逐根到达时更新状态，每根只做常数次运算：
+滑动窗口用定长 deque + 累加和，EMA 递推，5/15 分钟 K 线由 1 分钟线在线聚合（按 A 股交易时段，9:30 集合竞价并入首根）。
+
+- IntradayEngine.update() / consume() / consume_async()：接收单根、可迭代或异步的分钟线流
+- IntradayEngine.snapshot()：某只股票的最新指标快照；get_intraday_indicators 工具按需返回它
+- replay_minute_bars()：把录制的分钟线（upstream 的 stock_zh_a_hist_min_em fixture 或 DataFrame）按时间顺序合并回放
+- MinuteBarPoller：进程内行情任务，交易时段内每 INTRADAY_POLL_SECONDS 秒用 load_minute_bars 拉取活跃股票
+  （最近 INTRADAY_ACTIVE_MINUTES 分钟内被 get_intraday_indicators 查询过的）的当日分钟线，只把新的、已走完的分钟线喂给引擎
+
+引擎本身不拉取行情：get_intraday_indicators 在交易时段内把股票登记到 get_minute_bar_poller()（首次登记时同步补齐当日分钟线），
+回放则直接把分钟线喂给 get_intraday_engine()。快照的 as_of 不是上海当日时，工具按不可用处理，不返回前一交易日的数据。
+"""
+import asyncio
+import heapq
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+from ...config import (
+    INTRADAY_ACTIVE_MINUTES, INTRADAY_POLL_SECONDS, INTRADAY_TIMEFRAMES, INTRADAY_RSI_WINDOW, INTRADAY_VOLUME_WINDOW,
+)
+from ...eventlog import log_event
+from ...tracing import traced
+from ...upstream import call_akshare
+
+_OPEN_MINUTE = 9 * 60 + 30          # 09:30, the opening call auction
+_CLOSE_MINUTE = 15 * 60
+_SHANGHAI = ZoneInfo("Asia/Shanghai")
+
+
+def now_shanghai() -> datetime:
+    """Current exchange time as a naive datetime, comparable with MinuteBar.time."""
+    return datetime.now(_SHANGHAI).replace(tzinfo=None)
+
+
+def in_session(now: datetime | None = None) -> bool:
+    """Whether `now` (default: the current exchange time) is a weekday between the 09:30 auction and the close."""
+    now = now or now_shanghai()
+    return now.weekday() < 5 and _OPEN_MINUTE <= now.hour * 60 + now.minute <= _CLOSE_MINUTE
+
+
+@dataclass(frozen=True, slots=True)
+class MinuteBar:
+    ticker: str
+    time: datetime                  # end of the minute, exchange (Asia/Shanghai) time
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    amount: float = 0.0
+
+
+class _RollingSum:
+    """Sum of the last `window` values, O(1) per push."""
+    __slots__ = ("window", "values", "total")
+
+    def __init__(self, window: int):
+        self.window, self.values, self.total = window, deque(), 0.0
+
+    def push(self, value: float) -> None:
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+
+class _Ema:
+    """EMA with adjust=False semantics (seeded with the first value), as pandas ewm(adjust=False)."""
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span: int):
+        self.alpha, self.value = 2 / (span + 1), None
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class TimeframeState:
+    """Bar aggregation and indicator state of one ticker on one timeframe (minutes per bar)."""
+    __slots__ = ("minutes", "gains", "losses", "volumes", "ema_fast", "ema_slow", "ema_signal",
+                 "prev_close", "bars", "bucket", "forming", "last")
+
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+        self.gains = _RollingSum(INTRADAY_RSI_WINDOW)
+        self.losses = _RollingSum(INTRADAY_RSI_WINDOW)
+        self.volumes = _RollingSum(INTRADAY_VOLUME_WINDOW)
+        self.ema_fast, self.ema_slow, self.ema_signal = _Ema(12), _Ema(26), _Ema(9)
+        self.prev_close: float | None = None
+        self.bars = 0
+        self.bucket: tuple | None = None     # (date, end minute) of the forming bar
+        self.forming: list | None = None     # [end time, open, high, low, close, volume]
+        self.last: tuple | None = None       # (end time, close, volume, RSI, MACD diff, signal, amplification)
+
+    def bucket_end(self, minute_of_day: int) -> int:
+        if self.minutes == 1:
+            return minute_of_day
+        end = -(-minute_of_day // self.minutes) * self.minutes
+        return max(end, _OPEN_MINUTE + self.minutes)   # the 09:30 auction bar joins the first bar
+
+    def add(self, bar: MinuteBar) -> None:
+        minute = bar.time.hour * 60 + bar.time.minute
+        end = self.bucket_end(minute)
+        bucket = (bar.time.date(), end)
+        if bucket != self.bucket:
+            if self.forming is not None:     # a gap: the previous bar never reached its last minute
+                self._close()
+            self.bucket = bucket
+            self.forming = [bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume]
+        else:
+            f = self.forming
+            f[0] = bar.time
+            f[2] = max(f[2], bar.high)
+            f[3] = min(f[3], bar.low)
+            f[4] = bar.close
+            f[5] += bar.volume
+        if minute >= end:
+            self._close()
+
+    def _close(self) -> None:
+        time, _, _, _, close, volume = self.forming
+        self.forming = None
+        self.bars += 1
+
+        rsi = None
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gains.push(change if change > 0 else 0.0)
+            self.losses.push(-change if change < 0 else 0.0)
+            if self.gains.full:
+                avg_gain, avg_loss = self.gains.total / self.gains.window, self.losses.total / self.losses.window
+                rsi = 100.0 if avg_loss <= 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+        self.prev_close = close
+
+        diff = self.ema_fast.update(close) - self.ema_slow.update(close)
+        signal = self.ema_signal.update(diff)
+
+        self.volumes.push(volume)
+        mean_volume = self.volumes.total / self.volumes.window
+        amplification = volume / mean_volume if self.volumes.full and mean_volume > 0 else None
+
+        self.last = (time, close, volume, rsi, diff, signal, amplification)
+
+    def snapshot(self) -> dict | None:
+        """Indicators as of the last completed bar, formatted on demand (not on every update)."""
+        if self.last is None:
+            return None
+        time, close, volume, rsi, diff, signal, amplification = self.last
+        return {
+            "bar_end": time.strftime("%Y-%m-%d %H:%M"),
+            "close": close,
+            "volume": volume,
+            "RSI": None if rsi is None else round(rsi, 2),
+            "MACD_diff": round(diff, 4),
+            "MACD_signal": round(signal, 4),
+            "MACD_hist": round(diff - signal, 4),
+            "volume_amplification": None if amplification is None else round(amplification, 2),
+            "bars": self.bars,
+        }
+
+
+class TickerState:
+    """Session VWAP and the per-timeframe states of one ticker."""
+    __slots__ = ("ticker", "session", "pv", "volume", "last_bar", "timeframes")
+
+    def __init__(self, ticker: str, timeframes: Iterable[int]):
+        self.ticker = ticker
+        self.session = None
+        self.pv = self.volume = 0.0
+        self.last_bar: MinuteBar | None = None
+        self.timeframes = {minutes: TimeframeState(minutes) for minutes in timeframes}
+
+    def add(self, bar: MinuteBar) -> None:
+        day = bar.time.date()
+        if day != self.session:
+            self.session, self.pv, self.volume = day, 0.0, 0.0
+        self.pv += (bar.high + bar.low + bar.close) / 3 * bar.volume
+        self.volume += bar.volume
+        self.last_bar = bar
+        for state in self.timeframes.values():
+            state.add(bar)
+
+    def snapshot(self) -> dict:
+        bar = self.last_bar
+        vwap = self.pv / self.volume if self.volume > 0 else None
+        return {
+            "ticker": self.ticker,
+            "as_of": bar.time.strftime("%Y-%m-%d %H:%M"),
+            "price": bar.close,
+            "VWAP": None if vwap is None else round(vwap, 4),
+            "price_vs_vwap_pct": None if not vwap else round((bar.close / vwap - 1) * 100, 2),
+            "timeframes": {f"{minutes}m": state.snapshot() for minutes, state in self.timeframes.items()},
+        }
+
+
+class IntradayEngine:
+    """Intraday indicator state for every ticker seen on the minute-bar stream."""
+
+    def __init__(self, timeframes: Iterable[int] = INTRADAY_TIMEFRAMES):
+        self.timeframes = tuple(timeframes)
+        self._tickers: dict[str, TickerState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, bar: MinuteBar) -> None:
+        """Apply one minute bar (bars of one ticker must arrive in time order)."""
+        with self._lock:
+            state = self._tickers.get(bar.ticker)
+            if state is None:
+                state = self._tickers[bar.ticker] = TickerState(bar.ticker, self.timeframes)
+            state.add(bar)
+
+    def consume(self, bars: Iterable[MinuteBar]) -> int:
+        """Apply every bar of `bars`; returns how many were applied."""
+        count = 0
+        for bar in bars:
+            self.update(bar)
+            count += 1
+        return count
+
+    async def consume_async(self, bars: AsyncIterable[MinuteBar]) -> int:
+        count = 0
+        async for bar in bars:
+            self.update(bar)
+            count += 1
+        return count
+
+    def snapshot(self, ticker: str) -> dict | None:
+        """Latest indicators of `ticker`, or None if no bar of it has been received."""
+        with self._lock:
+            state = self._tickers.get(ticker)
+            return state.snapshot() if state is not None else None
+
+    def tickers(self) -> list[str]:
+        with self._lock:
+            return list(self._tickers)
+
+
+def minute_bars_from_frame(ticker: str, df) -> list[MinuteBar]:
+    """MinuteBars from an ak.stock_zh_a_hist_min_em-shaped frame (时间, 开盘, 收盘, 最高, 最低, 成交量, 成交额)."""
+    import pandas as pd
+
+    times = pd.to_datetime(df["时间"]).to_numpy("datetime64[us]").tolist()   # naive datetimes
+    amounts = df["成交额"] if "成交额" in df else [0.0] * len(df)
+    return [MinuteBar(ticker, t, float(o), float(h), float(l), float(c), float(v), float(a))
+            for t, o, h, l, c, v, a in zip(times, df["开盘"], df["最高"], df["最低"], df["收盘"],
+                                              df["成交量"], amounts)]
+
+
+def load_minute_bars(ticker: str, trade_date: str) -> list[MinuteBar]:
+    """1-minute bars of `ticker` on `trade_date` (YYYY-MM-DD) via AkShare (recorded / replayed per AKSHARE_MODE)."""
+    df = call_akshare(
+        "stock_zh_a_hist_min_em",
+        symbol=ticker,
+        period="1",
+        start_date=f"{trade_date} 09:30:00",
+        end_date=f"{trade_date} 15:00:00",
+        adjust="",
+    )
+    return [] if df is None or df.empty else minute_bars_from_frame(ticker, df)
+
+
+def replay_minute_bars(feeds: dict[str, list[MinuteBar]]) -> Iterator[MinuteBar]:
+    """The bars of all tickers merged into one stream in time order."""
+    return heapq.merge(*feeds.values(), key=lambda bar: bar.time)
+
+
+async def replay_minute_bars_async(feeds: dict[str, list[MinuteBar]],
+                                   seconds_per_minute: float = 0.0) -> AsyncIterator[MinuteBar]:
+    """replay_minute_bars as an async stream, sleeping `seconds_per_minute` whenever the clock advances."""
+    current = None
+    for bar in replay_minute_bars(feeds):
+        if bar.time != current:
+            current = bar.time
+            await asyncio.sleep(seconds_per_minute)
+        yield bar
+
+
+class MinuteBarPoller:
+    """Feeds `engine` today's completed minute bars of the active tickers, polled every `interval` seconds."""
+
+    def __init__(self, engine: IntradayEngine, interval: float = INTRADAY_POLL_SECONDS,
+                 active_minutes: float = INTRADAY_ACTIVE_MINUTES):
+        self.engine = engine
+        self.interval = interval
+        self.active_seconds = active_minutes * 60
+        self._requested: dict[str, float] = {}      # ticker -> time.time() of the last watch()
+        self._fed: dict[str, datetime] = {}         # ticker -> time of the last bar fed to the engine
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(self, ticker: str) -> None:
+        """Mark `ticker` active; the first watch polls it right away so the caller sees today's bars."""
+        with self._lock:
+            new = ticker not in self._requested
+            self._requested[ticker] = time.time()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="intraday-poller", daemon=True)
+                self._thread.start()
+        if new:
+            self.poll(ticker)
+
+    def poll(self, ticker: str, now: datetime | None = None) -> int:
+        """Fetch `ticker`'s bars of today and feed the completed ones not fed yet; returns how many were fed."""
+        now = now or now_shanghai()
+        bars = load_minute_bars(ticker, now.strftime("%Y-%m-%d"))
+        with self._lock:                            # the tool's first poll and the thread may overlap
+            last = self._fed.get(ticker)
+            new = [bar for bar in bars if bar.time <= now and (last is None or bar.time > last)]
+            if new:
+                self.engine.consume(new)
+                self._fed[ticker] = new[-1].time
+        return len(new)
+
+    def active(self) -> list[str]:
+        """Tickers watched within the last `active_minutes`; older ones are dropped."""
+        cutoff = time.time() - self.active_seconds
+        with self._lock:
+            for ticker in [t for t, at in self._requested.items() if at < cutoff]:
+                del self._requested[ticker]
+            return list(self._requested)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not in_session():
+                continue
+            for ticker in self.active():
+                try:
+                    self.poll(ticker)
+                except Exception as e:
+                    log_event("intraday_poll_failed", level="warning", ticker=ticker, error=str(e))
+
+
+_engine: IntradayEngine | None = None
+_poller: MinuteBarPoller | None = None
+
+
+def get_intraday_engine() -> IntradayEngine:
+    """Process-wide engine that minute-bar feeds update and the technical tool reads."""
+    global _engine
+    if _engine is None:
+        _engine = IntradayEngine()
+    return _engine
+
+
+def get_minute_bar_poller() -> MinuteBarPoller:
+    """Process-wide poller feeding get_intraday_engine(); its thread starts on the first watch()."""
+    global _poller
+    if _poller is None:
+        _poller = MinuteBarPoller(get_intraday_engine())
+    return _poller
+
+
+@traced()
+def get_intraday_indicators(provided_ticker: str) -> dict:
+    """
+    Latest intraday indicators of the specified stock from the streaming minute-bar engine.
+
+    Parameters:
+      provided_ticker (str): Stock code, e.g., "600519"
+
+    Returns (dict):
+        {"ticker", "as_of" (time of the latest minute bar), "price", "VWAP" (session volume-weighted
+        average price), "price_vs_vwap_pct", "timeframes": {"1m" | "5m" | "15m": {"bar_end", "close",
+        "volume", "RSI", "MACD_diff", "MACD_signal", "MACD_hist", "volume_amplification", "bars"}}},
+        indicators as of each timeframe's last completed bar.
+        When there are no minute bars of the stock from today (e.g. outside trading hours):
+        {"status": "unavailable", "message": ...}.
+    """
+    now = now_shanghai()
+    if in_session(now):
+        try:
+            get_minute_bar_poller().watch(provided_ticker)
+        except Exception as e:      # fall back to what the engine already has
+            log_event("intraday_poll_failed", level="warning", ticker=provided_ticker, error=str(e))
+    snapshot = get_intraday_engine().snapshot(provided_ticker)
+    if snapshot is None:
+        return {"status": "unavailable", "message": f"没有 {provided_ticker} 的盘中分钟线数据（非交易时段或未接入行情）。"}
+    if not snapshot["as_of"].startswith(now.strftime("%Y-%m-%d")):
+        return {"status": "unavailable",
+                "message": f"{provided_ticker} 最新的分钟线来自 {snapshot['as_of']}，不是今日盘中数据。"}
+    return snapshot
@@ -0,0 +1,194 @@
+"""
+Unadjusted daily bars plus cumulative adjustment factors, per ticker.
+
+前复权 / 后复权历史在每次分红送转后整体改变，按复权方式整段下载就意味着每次都要重新拉取几十年的日线。
+这里只保存不复权日线（只追加，从不改写历史）与新浪的后复权因子序列（每次除权除息新增一行），
+读取时按日期取对应因子，一次向量化乘法得到复权价格：
+
+- 后复权 hfq：价格 × 该日因子
+- 前复权 qfq：价格 × 该日因子 ÷ 最新因子（最新一日与不复权价格相同）
+
+涨跌幅、振幅本身是相对交易所前收盘价（已除权）的比例，无需调整；涨跌额随价格一起缩放。
+落盘到 SQLite（PRICE_STORE_PATH）；拉取逻辑在 bars.py。
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from ...config import PRICE_STORE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_bars (
+    ticker     TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    open       REAL,
+    close      REAL,
+    high       REAL,
+    low        REAL,
+    volume     INTEGER,
+    amount     REAL,
+    amplitude  REAL,
+    pct_change REAL,
+    change     REAL,
+    turnover   REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS adj_factors (
+    ticker     TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    hfq_factor REAL NOT NULL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS factor_sync (
+    ticker     TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS factor_pending (
+    ticker     TEXT PRIMARY KEY,
+    ex_date    TEXT NOT NULL
+);
+"""
+
+# AkShare column -> daily_bars column
+BAR_COLUMNS = {
+    "日期": "date", "开盘": "open", "收盘": "close", "最高": "high", "最低": "low", "成交量": "volume",
+    "成交额": "amount", "振幅": "amplitude", "涨跌幅": "pct_change", "涨跌额": "change", "换手率": "turnover",
+}
+PRICE_COLUMNS = ("开盘", "收盘", "最高", "最低", "涨跌额")   # scaled by the adjustment factor
+
+
+def adjust_prices(raw, factors, adjust: str):
+    """`raw` AkShare-shaped daily bars with prices adjusted by `factors` (date, hfq_factor).
+
+    adjust: "" (unadjusted, returned as is), "qfq" or "hfq". Each bar takes the factor of the
+    latest factor date on or before it (bars before the first factor date take the first one).
+    """
+    import numpy as np
+
+    if not adjust or raw.empty or factors is None or factors.empty:
+        return raw
+    factors = factors.sort_values("date")
+    factor_dates = factors["date"].astype(str).to_numpy()
+    values = factors["hfq_factor"].to_numpy(np.float64)
+    index = np.searchsorted(factor_dates, raw["日期"].astype(str).to_numpy(), side="right") - 1
+    scale = values[np.clip(index, 0, len(values) - 1)]
+    if adjust == "qfq":
+        scale = scale / values[-1]
+    elif adjust != "hfq":
+        raise ValueError(f"adjust must be '', 'qfq' or 'hfq', not {adjust!r}")
+    adjusted = raw.copy()
+    for column in PRICE_COLUMNS:
+        adjusted[column] = raw[column].to_numpy(np.float64) * scale
+    return adjusted
+
+
+class PriceStore:
+    """SQLite-backed store of unadjusted daily bars and hfq adjustment factors."""
+
+    def __init__(self, path: str = PRICE_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def last_date(self, ticker: str) -> str | None:
+        """Date (YYYY-MM-DD) of the latest stored bar of `ticker`."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(date) FROM daily_bars WHERE ticker = ?", (ticker,)).fetchone()
+        return row[0]
+
+    def tickers(self) -> list[str]:
+        """Tickers with stored bars, sorted."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT ticker FROM daily_bars ORDER BY ticker")]
+
+    def add_bars(self, ticker: str, df) -> int:
+        """Insert or replace unadjusted bars (an ak.stock_zh_a_hist(adjust="") frame); returns rows written."""
+        if df is None or df.empty:
+            return 0
+        frame = df[[c for c in BAR_COLUMNS if c in df]].rename(columns=BAR_COLUMNS)
+        frame["date"] = frame["date"].astype(str)
+        columns = list(frame.columns)
+        rows = [(ticker, *row) for row in frame.itertuples(index=False, name=None)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO daily_bars (ticker, {', '.join(columns)}) "
+                f"VALUES (?, {', '.join('?' * len(columns))})",
+                rows,
+            )
+        return len(rows)
+
+    def bars(self, ticker: str, end_date: str | None = None):
+        """Unadjusted bars of `ticker` up to `end_date` (YYYY-MM-DD), AkShare-shaped and sorted by date."""
+        import pandas as pd
+
+        query = f"SELECT date, {', '.join(BAR_COLUMNS[c] for c in list(BAR_COLUMNS)[1:])} FROM daily_bars " \
+                "WHERE ticker = ? AND date <= ? ORDER BY date"
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=(ticker, end_date or "9999-12-31"))
+        df = df.rename(columns={v: k for k, v in BAR_COLUMNS.items()})
+        df["日期"] = pd.to_datetime(df["日期"]).dt.date
+        df.insert(1, "股票代码", ticker)
+        return df
+
+    def factors(self, ticker: str):
+        """(frame of date, hfq_factor sorted by date, unix time the factors were last fetched or None)."""
+        import pandas as pd
+
+        with self._lock:
+            df = pd.read_sql_query("SELECT date, hfq_factor FROM adj_factors WHERE ticker = ? ORDER BY date",
+                                   self._conn, params=(ticker,))
+            row = self._conn.execute("SELECT fetched_at FROM factor_sync WHERE ticker = ?", (ticker,)).fetchone()
+        return df, (row[0] if row else None)
+
+    def set_factors(self, ticker: str, df) -> bool:
+        """Replace the factor series of `ticker` (columns date, hfq_factor); True if it changed."""
+        rows = sorted((str(d)[:10], float(f)) for d, f in zip(df["date"], df["hfq_factor"]))
+        current, _ = self.factors(ticker)
+        changed = rows != list(zip(current["date"], current["hfq_factor"]))
+        with self._lock, self._conn:
+            if changed:
+                self._conn.execute("DELETE FROM adj_factors WHERE ticker = ?", (ticker,))
+                self._conn.executemany("INSERT INTO adj_factors (ticker, date, hfq_factor) VALUES (?, ?, ?)",
+                                       [(ticker, *row) for row in rows])
+            self._conn.execute("INSERT OR REPLACE INTO factor_sync (ticker, fetched_at) VALUES (?, ?)",
+                               (ticker, time.time()))
+        return changed
+
+    def pending_ex_date(self, ticker: str) -> str | None:
+        """Latest ex-date (YYYY-MM-DD) seen in the bars of `ticker` that its factor series does not cover yet."""
+        with self._lock:
+            row = self._conn.execute("SELECT ex_date FROM factor_pending WHERE ticker = ?", (ticker,)).fetchone()
+        return row[0] if row else None
+
+    def set_pending_ex_date(self, ticker: str, ex_date: str | None) -> None:
+        """Record (or with None, clear) the ex-date the factor series of `ticker` is still missing."""
+        with self._lock, self._conn:
+            if ex_date is None:
+                self._conn.execute("DELETE FROM factor_pending WHERE ticker = ?", (ticker,))
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO factor_pending (ticker, ex_date) VALUES (?, ?)",
+                                   (ticker, ex_date))
+
+    def adjusted(self, ticker: str, adjust: str = "qfq", end_date: str | None = None):
+        """Stored bars of `ticker` with `adjust` ("", "qfq" or "hfq") applied at read time."""
+        factors, _ = self.factors(ticker)
+        return adjust_prices(self.bars(ticker, end_date), factors, adjust)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_store: PriceStore | None = None
+
+
+def get_price_store() -> PriceStore:
+    """Process-wide store at PRICE_STORE_PATH, opened on first use."""
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
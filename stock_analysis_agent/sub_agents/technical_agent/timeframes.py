@@ -0,0 +1,164 @@
+"""
+Weekly and monthly indicators resampled from the cached daily series.
+
+周线 / 月线 K 线由 bars.daily_bars() 的前复权日线一次向量化聚合（numpy reduceat）得到，不另外请求 AkShare。
+周期边界按 A 股交易日历：只有出现在日线中的交易日参与聚合，一根周线覆盖同一自然周（周一至周日）内的交易日，
+月线覆盖同一自然月内的交易日，K 线日期为该周期最后一个交易日（与 ak.stock_zh_a_hist(period="weekly") 一致）。
+
+每次调用都对整段日线重新聚合：一次 reduceat 比缓存后只重算最后一根 K 线更快（指标本身要在整段序列上重算），
+除权导致前复权价格整体调整时也无需另行处理。
+最后一根 K 线只在所属周 / 月仍可能有新的交易日（今日尚未收盘（MARKET_CLOSE）或之后还有工作日）时标为 未完成。
+每个周期上计算 MACD(12, 26, 9)、KDJ(9) 与布林带(20, 2σ)，口径与日线指标相同。
+"""
+from ...config import MARKET_CLOSE, TIMEFRAME_OUTPUT_BARS
+from ...tracing import traced
+from .bars import daily_bars, today_shanghai
+
+TIMEFRAMES = ("weekly", "monthly")
+
+
+def period_keys(dates, timeframe: str):
+    """Integer id of the calendar week (Monday-Sunday) or month of each date."""
+    import numpy as np
+    import pandas as pd
+
+    days = pd.to_datetime(dates).to_numpy("datetime64[D]")
+    if timeframe == "weekly":
+        return (days.astype(np.int64) + 3) // 7   # 1970-01-01 was a Thursday
+    return days.astype("datetime64[M]").astype(np.int64)
+
+
+def resample_bars(daily, timeframe: str, prev_close: float | None = None):
+    """OHLCV bars of `timeframe` from daily bars (sorted by date), in one vectorized pass.
+
+    `prev_close` is the close of the bar before the first one (for 涨跌幅 / 振幅); without
+    it the first bar is measured against its own open. Columns: 日期 (last trading day),
+    起始日期, 交易天数, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 换手率, 振幅, 涨跌幅, 涨跌额.
+    """
+    import numpy as np
+    import pandas as pd
+
+    keys = period_keys(daily["日期"], timeframe)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.concatenate((starts[1:], [len(keys)])) - 1
+    dates = daily["日期"].to_numpy()
+    close = daily["收盘"].to_numpy()
+    bars = pd.DataFrame({
+        "日期": dates[ends],
+        "起始日期": dates[starts],
+        "交易天数": (ends - starts + 1).astype(np.int64),
+        "开盘": daily["开盘"].to_numpy()[starts],
+        "收盘": close[ends],
+        "最高": np.maximum.reduceat(daily["最高"].to_numpy(), starts),
+        "最低": np.minimum.reduceat(daily["最低"].to_numpy(), starts),
+        "成交量": np.add.reduceat(daily["成交量"].to_numpy(), starts),
+        "成交额": np.add.reduceat(daily["成交额"].to_numpy(), starts).round(2),
+        "换手率": np.add.reduceat(daily["换手率"].to_numpy(), starts).round(2),
+    })
+    prev = np.concatenate(([bars["开盘"].iloc[0] if prev_close is None else prev_close], close[ends][:-1]))
+    bars["振幅"] = ((bars["最高"] - bars["最低"]) / prev * 100).round(2)
+    bars["涨跌幅"] = ((bars["收盘"] / prev - 1) * 100).round(2)
+    bars["涨跌额"] = (bars["收盘"] - prev).round(2)
+    return bars
+
+
+def open_period(timeframe: str, now=None):
+    """Key (as period_keys) of the week / month that can still get daily bars, or None.
+
+    That is the current calendar week / month while today's session is still open (a weekday before
+    MARKET_CLOSE) or a weekday is left in it; after the close of its last weekday (e.g. Friday 15:00
+    for a week) the period is complete. `now` defaults to the time in Shanghai.
+    """
+    import pandas as pd
+
+    now = now if now is not None else pd.Timestamp.now(tz="Asia/Shanghai")
+    today = pd.Timestamp(now.date())
+    last_day = today + pd.Timedelta(days=6 - today.weekday()) if timeframe == "weekly" else \
+        today + pd.offsets.MonthEnd(0)
+    session_open = today.weekday() < 5 and now.strftime("%H:%M") < MARKET_CLOSE
+    weekdays_left = len(pd.bdate_range(today + pd.Timedelta(days=1), last_day)) > 0
+    return period_keys([today], timeframe)[0] if session_open or weekdays_left else None
+
+
+def timeframe_indicators(bars):
+    """MACD(12, 26, 9), KDJ(9) and Bollinger Bands(20, 2σ) on `bars`, as in the daily pipeline."""
+    close = bars["收盘"]
+    out = bars.copy()
+
+    ema_short = close.ewm(span=12, adjust=False).mean()
+    ema_long = close.ewm(span=26, adjust=False).mean()
+    macd_diff = ema_short - ema_long
+    macd_signal = macd_diff.ewm(span=9, adjust=False).mean()
+    out["MACD_diff"] = macd_diff.round(2)
+    out["MACD_signal"] = macd_signal.round(2)
+    out["MACD_hist"] = (macd_diff - macd_signal).round(2)
+
+    low_min = bars["最低"].rolling(window=9).min()
+    high_max = bars["最高"].rolling(window=9).max()
+    rsv = ((close - low_min) / (high_max - low_min) * 100).tolist()
+    k = [float("nan")] * len(rsv)
+    d = [float("nan")] * len(rsv)
+    first_valid = next((i for i, v in enumerate(rsv) if v == v), None)
+    if first_valid is not None:
+        k[first_valid] = d[first_valid] = 50.0
+        for i in range(first_valid + 1, len(rsv)):
+            if rsv[i] == rsv[i]:  # not NaN
+                k[i] = 2/3 * k[i - 1] + 1/3 * rsv[i]
+                d[i] = 2/3 * d[i - 1] + 1/3 * k[i]
+            else:
+                k[i], d[i] = k[i - 1], d[i - 1]
+    out["K"] = [round(v, 2) for v in k]
+    out["D"] = [round(v, 2) for v in d]
+    out["J"] = [round(3 * a - 2 * b, 2) for a, b in zip(k, d)]
+
+    bb_mid = close.rolling(window=20).mean()
+    bb_std = close.rolling(window=20).std()
+    out["BB_mid"] = bb_mid.round(2)
+    out["BB_upper"] = (bb_mid + 2 * bb_std).round(2)
+    out["BB_lower"] = (bb_mid - 2 * bb_std).round(2)
+    return out
+
+
+@traced()
+def calculate_multi_timeframe_indicators(provided_ticker: str) -> dict:
+    """
+    Weekly and monthly MACD, KDJ and Bollinger Bands for the specified stock.
+
+    Weekly / monthly bars are resampled from the same qfq daily history that
+    calculate_technical_indicators uses (no extra data download): a bar covers the
+    trading days of one calendar week / month and is dated on its last trading day.
+
+    Parameters:
+      provided_ticker (str): Stock code, e.g., "600519"
+
+    Returns (dict):
+        {"weekly": {date: indicators}, "monthly": {date: indicators}} with the most recent
+        bars of each timeframe (oldest first). Each bar has 起始日期, 交易天数, 开盘, 收盘, 最高, 最低,
+        成交量, 成交额, 换手率, 振幅, 涨跌幅, 涨跌额, MACD_diff, MACD_signal, MACD_hist, K, D, J,
+        BB_mid, BB_upper, BB_lower and 未完成 (True for a week / month that is still in progress).
+        On failure: {"status": "error", "error_message": ...}.
+    """
+    try:
+        today = today_shanghai()
+        daily = daily_bars(provided_ticker, today.strftime("%Y%m%d"))
+        if daily is None or daily.empty:
+            return {
+                "status": "error",
+                "error_message": f"未能获取 {provided_ticker} 的历史日线数据。"
+            }
+
+        result = {}
+        for timeframe in TIMEFRAMES:
+            rows = timeframe_indicators(resample_bars(daily, timeframe))
+            rows = rows.tail(TIMEFRAME_OUTPUT_BARS[timeframe]).copy()
+            current = open_period(timeframe)
+            rows["未完成"] = (period_keys(rows["日期"], timeframe) == current) if current is not None else False
+            rows["日期"] = rows["日期"].astype(str)
+            rows["起始日期"] = rows["起始日期"].astype(str)
+            result[timeframe] = {r.pop("日期"): r for r in rows.to_dict(orient="records")}
+        return result
+
+    except Exception as e:
+        return {
+            "error": f"An exception occurred during calculation: {str(e)}"
+        }
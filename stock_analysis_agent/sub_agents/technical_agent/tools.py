@@ -1,9 +1,11 @@
-import pandas as pd
-import numpy as np
-import akshare as ak
+from ...config import TECHNICAL_LEAN_MODE, TECHNICAL_OUTPUT_DAYS, TECHNICAL_TAIL_MODE
+from ...tracing import traced
+from .bars import HISTORY_START_DATE, daily_bars, today_shanghai
 
+# pandas 在函数内部导入，避免导入 agent 包时加载
 
 
+@traced()
 def calculate_technical_indicators(provided_ticker: str) -> dict[str, dict] | dict[str, str]:
     """
     Fetch historical daily data for the specified stock from six months before today up to today,
@@ -60,23 +62,16 @@ def calculate_technical_indicators(provided_ticker: str) -> dict[str, dict] | di
       - If fetching fails, return status="error" with error_message.
       - On success, return status="success" and convert the DataFrame to a list of dicts.
     """
+    import numpy as np
+    import pandas as pd
+
     try:
         # 计算今天的日期（使用中国时区 Asia/Shanghai）
-        tz_sh = "Asia/Shanghai"
-        today_sh = pd.Timestamp.now(tz=tz_sh).normalize()
-        end_date = today_sh.strftime("%Y%m%d")
-        # start_dt = today_sh - pd.DateOffset(years=1)
-        # start_date = start_dt.strftime("%Y%m%d")
-        start_date = "19910101"
-
-        # 1. 拉取历史日线数据 (固定前复权)
-        df = ak.stock_zh_a_hist(
-            symbol=provided_ticker,
-            period="daily",
-            start_date=start_date,
-            end_date=end_date,
-            adjust="qfq"
-        )
+        end_date = today_shanghai().strftime("%Y%m%d")
+        start_date = HISTORY_START_DATE
+
+        # 1. 拉取历史日线数据 (固定前复权，与多周期指标共用缓存)
+        df = daily_bars(provided_ticker, end_date)
 
         if df is None or df.empty:
             return {
@@ -86,6 +81,12 @@ def calculate_technical_indicators(provided_ticker: str) -> dict[str, dict] | di
 
         df = df.sort_values("日期").reset_index(drop=True)
 
+        days = TECHNICAL_OUTPUT_DAYS
+        if TECHNICAL_LEAN_MODE or TECHNICAL_TAIL_MODE:
+            # 输出窗口 + 最新一日 + 窗口前一日（突破判断需要前一日）
+            df, price_hist = _tail_indicator_rows(df, rows=days + 2, lean=TECHNICAL_LEAN_MODE)
+            return _indicator_result(df, price_hist, days)
+
         # 2. 计算对数收益
         df["log_return"] = np.log(df["收盘"] / df["收盘"].shift(1))
 
@@ -285,7 +286,7 @@ def calculate_technical_indicators(provided_ticker: str) -> dict[str, dict] | di
 
 
         # 9.6 向上突破 / 向下突破: 赋值对应均线名称列表与布林带标志
-        df = df.tail(20)
+        df = df.tail(max(20, days + 2))
         df.reset_index(drop=True, inplace=True)
 
         # 突破均线：前一日收盘低于均线且当日收盘大于等于均线
@@ -341,31 +342,210 @@ def calculate_technical_indicators(provided_ticker: str) -> dict[str, dict] | di
         #     "BB_mid", "BB_std", "BB_upper", "BB_lower"
         # ], errors="ignore")
 
-        df = df.drop(columns=[
-            "log_return", "RSV", "vol_ma20", "cum_max_close", "cum_min_close",
-            "max20_close", "min20_close", "max126_close", "min126_close", "max252_close", "min252_close",
-            "pct_change"
-        ], errors="ignore")
-        
-        df['日期'] = df['日期'].astype(str)
-
-        # Transform dataframe into nested dict with dates as keys
-        indicators_list = df.to_dict(orient="records")
-        last_10_days = indicators_list[-10:-1]
-        
-        # Convert list of dicts to nested dict by date
-        result = {}
-        for day_data in last_10_days:
-            date = day_data.pop('日期')  # Remove date from inner dict and use as key
-            result[date] = day_data
-        
-        # Add price history to the last day's data
-        last_date = list(result.keys())[-1]
-        result[last_date]["price_hist_over_past_month"] = price_hist
-
-        return result
+        return _indicator_result(df, price_hist, days)
 
     except Exception as e:
         return {
             "error": f"An exception occurred during calculation: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+def _indicator_result(df, price_hist: list, days: int) -> dict[str, dict]:
+    """Tool output from the indicator frame: date -> indicators for the `days` rows before the last."""
+    df = df.drop(columns=[
+        "log_return", "RSV", "vol_ma20", "cum_max_close", "cum_min_close",
+        "max20_close", "min20_close", "max126_close", "min126_close", "max252_close", "min252_close",
+        "pct_change"
+    ], errors="ignore")
+
+    df['日期'] = df['日期'].astype(str)
+
+    # Transform dataframe into nested dict with dates as keys
+    indicators_list = df.to_dict(orient="records")
+    last_days = indicators_list[-(days + 1):-1]
+
+    # Convert list of dicts to nested dict by date
+    result = {}
+    for day_data in last_days:
+        date = day_data.pop('日期')  # Remove date from inner dict and use as key
+        result[date] = day_data
+
+    # Add price history to the last day's data
+    last_date = list(result.keys())[-1]
+    result[last_date]["price_hist_over_past_month"] = price_hist
+
+    return result
+
+
+_MA_WINDOWS = (5, 10, 20, 30, 60, 120, 250)
+
+
+def _run_lengths(flags):
+    """For each position, how many consecutive True values end there (0 where False)."""
+    import numpy as np
+
+    idx = np.arange(len(flags))
+    last_false = np.maximum.accumulate(np.where(flags, -1, idx))
+    return np.where(flags, idx - last_false, 0)
+
+
+def _tail_indicator_rows(df, rows: int, lean: bool = False):
+    """Tail evaluation of the indicator pipeline (TECHNICAL_TAIL_MODE / TECHNICAL_LEAN_MODE).
+
+    Rolling and recursive state (moving windows, EMAs, KDJ, streak counts) is advanced
+    over the whole history with vectorized pandas/numpy operations or a plain-float loop,
+    while per-row outputs (high/low flags, percentage strings, turnover sums, breakouts)
+    are materialized only for the last `rows` rows. Every value is computed with the same
+    float64 operations as the full pipeline, so those rows are identical to it.
+
+    With `lean`, derived series are float32 / int16 arrays instead, released as soon as
+    they are used: far lower peak memory, values match to float32 precision and the
+    unrounded averages (BB_mid, BB_std, MA*) are reported to 4 decimals.
+    Returns (frame of the last `rows` rows, price history of the last 20 closes).
+    """
+    import numpy as np
+    import pandas as pd
+
+    dtype = np.float32 if lean else np.float64
+    close = df["收盘"].to_numpy(dtype)
+    volume = df["成交量"].to_numpy()          # exact integers for the up/down comparisons
+    turnover = df["换手率"]
+    price_hist = df["收盘"].tail(20).tolist()
+    s = pd.Series(close)
+    n = len(close)
+    start = max(0, n - rows)                # first output row
+    derived = {}
+
+    log_return = np.log(s / s.shift(1))
+    derived["volatility"] = (log_return.rolling(window=20).std() * np.sqrt(252)).to_numpy(dtype)
+    del log_return
+
+    delta = s.diff(1)
+    avg_gain = delta.where(delta > 0, 0.0).rolling(window=14).mean()
+    avg_loss = (-delta.where(delta < 0, 0.0)).rolling(window=14).mean()
+    derived["RSI"] = (100 - (100 / (1 + avg_gain / avg_loss))).shift(1).to_numpy(dtype)
+    del delta, avg_gain, avg_loss
+
+    macd_diff = s.ewm(span=12, adjust=False).mean() - s.ewm(span=26, adjust=False).mean()
+    macd_signal = macd_diff.ewm(span=9, adjust=False).mean()
+    derived["MACD_diff"] = macd_diff.to_numpy(dtype)
+    derived["MACD_signal"] = macd_signal.to_numpy(dtype)
+    derived["MACD_hist"] = (macd_diff - macd_signal).to_numpy(dtype)
+    del macd_diff, macd_signal
+
+    bb_mid = s.rolling(window=20).mean().to_numpy(dtype)
+    bb_std = s.rolling(window=20).std().to_numpy(dtype)
+    derived.update(BB_mid=bb_mid, BB_std=bb_std, BB_upper=bb_mid + 2 * bb_std, BB_lower=bb_mid - 2 * bb_std)
+    del bb_mid, bb_std
+
+    low_min = df["最低"].rolling(window=9).min().to_numpy()
+    high_max = df["最高"].rolling(window=9).max().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsv = ((close - low_min) / (high_max - low_min) * 100).tolist()
+    del low_min, high_max
+    k = [float("nan")] * n
+    d = [float("nan")] * n
+    first_valid = next((i for i, v in enumerate(rsv) if v == v), None)
+    if first_valid is not None:
+        k[first_valid] = d[first_valid] = 50.0
+        for i in range(first_valid + 1, n):
+            if rsv[i] == rsv[i]:  # not NaN
+                k[i] = 2/3 * k[i - 1] + 1/3 * rsv[i]
+                d[i] = 2/3 * d[i - 1] + 1/3 * k[i]
+            else:
+                k[i], d[i] = k[i - 1], d[i - 1]
+    k, d = np.array(k), np.array(d)
+    derived.update(K=k.astype(dtype), D=d.astype(dtype), J=(3 * k - 2 * d).astype(dtype))
+    del rsv, k, d
+
+    derived["volume_amplification"] = (
+        df["成交量"] / df["成交量"].rolling(window=20).mean()).to_numpy(dtype)
+    for window in _MA_WINDOWS:
+        derived[f"MA{window}"] = s.rolling(window=window).mean().to_numpy(dtype)
+
+    # 新高 / 新低 flags only for the output rows
+    recent = close[start:]
+    flags = {}
+    for high, low, window in (("创月新高", "创月新低", 20), ("半年新高", "半年新低", 126), ("一年新高", "一年新低", 252)):
+        rolling_max = s.rolling(window=window).max().to_numpy(dtype)[start:]
+        rolling_min = s.rolling(window=window).min().to_numpy(dtype)[start:]
+        flags[high] = ~np.isnan(rolling_max) & (recent >= rolling_max)
+        flags[low] = ~np.isnan(rolling_min) & (recent <= rolling_min)
+    flags["历史新高"] = recent >= np.maximum.accumulate(close)[start:]
+    flags["历史新低"] = recent <= np.minimum.accumulate(close)[start:]
+    del s, recent
+
+    price_up = np.concatenate(([False], close[1:] > close[:-1]))
+    price_down = np.concatenate(([False], close[1:] < close[:-1]))
+    volume_up = np.concatenate(([False], volume[1:] > volume[:-1]))
+    volume_down = np.concatenate(([False], volume[1:] < volume[:-1]))
+    count = np.int16 if lean else np.int64
+    streaks = {
+        "连续上涨天数": _run_lengths(price_up).astype(count),
+        "连续下跌天数": _run_lengths(price_down).astype(count),
+        "持续放量天数": _run_lengths(volume_up).astype(count),
+        "持续缩量天数": _run_lengths(volume_down).astype(count),
+        "量价齐升天数": _run_lengths(price_up & volume_up).astype(count),
+        "量价齐跌天数": _run_lengths(price_down & volume_down).astype(count),
+    }
+    del price_up, price_down, volume_up, volume_down
+
+    # keep only the output rows from here on
+    out = df.iloc[start:].reset_index(drop=True)
+
+    rounded = {"volatility", "RSI", "MACD_diff", "MACD_signal", "MACD_hist", "BB_upper", "BB_lower",
+               "K", "D", "J", "volume_amplification"}
+    for name, values in derived.items():
+        tail = values[start:].astype(np.float64)
+        if name in rounded:
+            tail = np.round(tail, 2)
+        elif lean:
+            tail = np.round(tail, 4)
+        out[name] = tail
+    for name, values in flags.items():
+        out[name] = values
+
+    def gain(i, streak):
+        return f"{(close[i] / close[i - streak] * 100 - 100):.2f}%" if streak else "0.00%"
+
+    def loss(i, streak):
+        return f"{(1 - close[i] / close[i - streak]) * 100:.2f}%" if streak else "0.00%"
+
+    def turnover_sum(i, streak):  # Series.sum over the same slice, as the full pipeline does
+        return f"{turnover.iloc[i - streak:i + 1].sum():.2f}%" if streak else "0.00%"
+
+    positions = range(start, n)
+    for name, values in streaks.items():
+        out[name] = values[start:]
+        if name == "连续上涨天数":
+            out["连续上涨涨幅"] = [gain(i, values[i]) for i in positions]
+        elif name == "连续下跌天数":
+            out["连续下跌跌幅"] = [loss(i, values[i]) for i in positions]
+        elif name == "量价齐升天数":
+            out["量价齐升期间涨幅"] = [gain(i, values[i]) for i in positions]
+            out["量价齐升期间换手率"] = [turnover_sum(i, values[i]) for i in positions]
+        elif name == "量价齐跌天数":
+            out["量价齐跌期间跌幅"] = [loss(i, values[i]) for i in positions]
+            out["量价齐跌期间换手率"] = [turnover_sum(i, values[i]) for i in positions]
+
+    # 突破 / 跌破：前一日在均线（布林带）一侧，当日到达或越过另一侧；与完整计算一样比较输出的（已取整的）值
+    closes = out["收盘"].to_numpy()
+    prev_close = np.concatenate(([np.nan], closes[:-1]))
+    breakouts, breakdowns = [[] for _ in positions], [[] for _ in positions]
+    for window in _MA_WINDOWS:
+        ma = out[f"MA{window}"].to_numpy()
+        prev_ma = np.concatenate(([np.nan], ma[:-1]))
+        valid = ~np.isnan(ma) & ~np.isnan(prev_ma)
+        for row in np.flatnonzero(valid & (prev_close < prev_ma) & (closes >= ma)):
+            breakouts[row].append(f"{window}日均线")
+        for row in np.flatnonzero(valid & (prev_close > prev_ma) & (closes <= ma)):
+            breakdowns[row].append(f"{window}日均线")
+    out["突破均线"] = breakouts
+    out["跌破均线"] = breakdowns
+    for name, column, above in (("突破布林带上轨", "BB_upper", True), ("跌破布林带下轨", "BB_lower", False)):
+        band = out[column].to_numpy()
+        prev_band = np.concatenate(([np.nan], band[:-1]))
+        valid = ~np.isnan(band) & ~np.isnan(prev_band)
+        crossed = (prev_close < prev_band) & (closes >= band) if above else (prev_close > prev_band) & (closes <= band)
+        out[name] = (valid & crossed).tolist()
+    return out, price_hist
\ No newline at end of file
@@ -1,24 +1,22 @@
 import os
-import markdown
-from numpy import str_
-from weasyprint import HTML, CSS
 from datetime import datetime
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search
+from google.adk.tools import ToolContext, google_search
 
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-
-import time
-import schedule
+# Heavy dependencies (markdown, weasyprint, schedule, the SMTP mailer) are imported
+# inside the tools that need them, so importing the agent package stays fast.
 
 from .config import *
+from .models import get_model
+from .callbacks import record_token_usage
+from .metrics import PDF_RENDER, record_report
+from .tracing import traced, tracer
 
 
 
 
 
+@traced()
 def get_current_time() -> dict:
     """Returns the current date and time.
 
@@ -35,19 +33,37 @@ def get_current_time() -> dict:
 
 
 google_search_agent = LlmAgent(
-    model=GEMINI_LIST[0],
+    model=get_model('google_search_agent'),
     name='google_search_agent',
     instruction="""
     You're a spealist in Google Search who take a search query and return the results.
     """,
-    tools=[google_search]
+    tools=[google_search],
+    after_model_callback=record_token_usage
 )
 
 
 
-def combine_reports(provided_ticker: str, company_name: str) -> dict:
+# Section order of the combined report; each category's section comes from <category>_agent
+REPORT_CATEGORIES = ['fundamental', 'technical', 'fund', 'policy']
+
+
+def state_sections(state) -> tuple[dict, dict]:
+    """(section texts keyed by agent name, degraded sections) from a report session's state.
+
+    The sub-agents store their sections under "<agent>_output" and DeadlineParallelAgent records
+    the degraded ones under "degraded_sections"; reading them from the session, not the shared
+    reports/ files, keeps concurrent reports from picking up each other's sections.
+    """
+    sections = {f"{category}_agent": state.get(f"{category}_agent_output") for category in REPORT_CATEGORIES}
+    return ({name: text for name, text in sections.items() if text is not None},
+            state.get("degraded_sections") or {})
+
+
+@traced()
+def combine_reports(provided_ticker: str, company_name: str, tool_context: ToolContext) -> dict:
     """
-    Combines Markdown files from a hard-coded 'reports' folder into a single report.
+    Combines the sections written by the analysis sub-agents in this session into a single report.
 
     Args:
         provided_ticker (str): Stock ticker symbol, must be a string.
@@ -55,44 +71,64 @@ def combine_reports(provided_ticker: str, company_name: str) -> dict:
 
     Returns:
         dict: A dictionary containing status information with the following structure:
-            On success: {"status": "success", "output_report_name": str, "report_path": str}
+            On success: {"status": "success", "output_report_name": str, "report_path": str,
+                         "degraded_sections": {agent_name: {"reason": str, "fallback": "cached" | "unavailable"}}}
             On error: {"status": "error", "error_message": str}
     """
-    # Hard-coded input folder
-    input_folder = 'reports'
-    # Generate date string in YYYYMMDD format
-    date_str = datetime.now().strftime('%Y%m%d')
     # Validate inputs
     if not isinstance(provided_ticker, str):
         return {"status": "error", "error_message": "provided_ticker must be a string"}
     if not isinstance(company_name, str):
         return {"status": "error", "error_message": "company_name must be a string"}
 
+    # Sections and the ones degraded by the pipeline deadline, from this session's state
+    sections, degraded = state_sections(tool_context.state)
+    for category in REPORT_CATEGORIES:
+        if f"{category}_agent" not in sections:
+            print(f"Warning: {category}_agent_output not found in the session state. Skipping...")
+
+    return render_report(provided_ticker, company_name, sections, degraded)
+
+
+def render_report(provided_ticker: str, company_name: str, sections: dict, degraded: dict,
+                  output_dir: str = 'reports') -> dict:
+    """
+    Writes the combined Markdown, HTML and PDF report from section texts keyed by agent name
+    (e.g. "fundamental_agent"); used by combine_reports, the scripted coordinator and batch
+    runs, all of which take the sections from the session's state (see state_sections).
+
+    Returns the same dict as combine_reports.
+    """
+    # Generate date string in YYYYMMDD format
+    date_str = datetime.now().strftime('%Y%m%d')
+
     # Construct output basename with underscores
     output_basename = f"equity_research_report_{company_name}_{provided_ticker}_{date_str}"
-    combined_md_path = os.path.join(input_folder, f"{output_basename}.md")
+    combined_md_path = os.path.join(output_dir, f"{output_basename}.md")
 
     try:
-        # Define the expected order of files
-        categories = ['fundamental', 'technical', 'fund', 'policy']
+        # inside the try: WeasyPrint raises OSError on import when its system libraries (Pango) are missing
+        import markdown
+        from weasyprint import HTML, CSS
 
-        # Ensure reports directory exists
-        os.makedirs(input_folder, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
 
         # Combine Markdown files
         with open(combined_md_path, 'w', encoding='utf-8') as outfile:
 
+            if degraded:
+                outfile.write("> ⚠️ 本报告以下章节未能按时完成，已使用缓存版本或占位内容：\n")
+                for agent_name, info in degraded.items():
+                    fallback = "缓存版本" if info.get("fallback") == "cached" else "数据暂不可用"
+                    outfile.write(f"> - {agent_name}：{info.get('reason')}（{fallback}）\n")
+                outfile.write("\n")
+
             # Write content from each category
-            for category in categories:
-                filename = f"{category}_agent_report.md"
-                filepath = os.path.join(input_folder, filename)
-                if os.path.exists(filepath):
-                    with open(filepath, 'r', encoding='utf-8') as infile:
-                        content = infile.read()
-                        outfile.write(f"<!-- ===== {category.upper()} SECTION ===== -->\n\n")
-                        outfile.write(content + "\n\n")
-                else:
-                    print(f"Warning: {filename} not found in {input_folder}. Skipping...")
+            for category in REPORT_CATEGORIES:
+                content = sections.get(f"{category}_agent")
+                if content is not None:
+                    outfile.write(f"<!-- ===== {category.upper()} SECTION ===== -->\n\n")
+                    outfile.write(content + "\n\n")
 
         # Normalize output_format
         # 读取 Markdown 文件
@@ -138,7 +174,7 @@ def combine_reports(provided_ticker: str, company_name: str) -> dict:
         """
 
         # 写入 HTML 文件
-        output_file_html = os.path.join(input_folder, f"{output_basename}.html")
+        output_file_html = os.path.join(output_dir, f"{output_basename}.html")
 
         with open(output_file_html, "w", encoding="utf-8") as f:
             f.write(html_full)
@@ -173,19 +209,25 @@ def combine_reports(provided_ticker: str, company_name: str) -> dict:
             }
         ''')
 
-        output_file_pdf = os.path.join(input_folder, f"{output_basename}.pdf")
+        output_file_pdf = os.path.join(output_dir, f"{output_basename}.pdf")
 
-        HTML(string=html_content).write_pdf(output_file_pdf, stylesheets=[css])
+        with tracer.start_as_current_span("render_pdf", attributes={"html.bytes": len(html_content.encode("utf-8"))}), \
+                PDF_RENDER.time():
+            HTML(string=html_content).write_pdf(output_file_pdf, stylesheets=[css])
+
+        record_report("success")
 
 
 
         return {
             "status": "success",
             "output_report_name": output_basename,
-            "report_path": output_file_pdf
+            "report_path": output_file_pdf,
+            "degraded_sections": degraded
         }
 
     except Exception as e:
+        record_report("error")
         return {
             "status": "error",
             "error_message": f"Error occurred during output: {str(e)}"
@@ -194,64 +236,58 @@ def combine_reports(provided_ticker: str, company_name: str) -> dict:
 
 
 
+@traced()
 def email_report(report_path: str, recipient_email: str) -> dict:
     """
-    Placeholder function to email the report.
-    
+    Emails the report to one recipient or a comma-separated distribution list.
+
+    HTML reports are sent as the message body; PDF (and other) reports are sent
+    as an attachment. Delivery goes through the shared mail queue, which reuses
+    pooled SMTP sessions and sends large distribution lists in batches.
+
     Args:
-        report_path (str): Path of the report to be emailed.
-        recipient_email (str): Email address of the recipient.
-    
+        report_path (str): Path of the report to be emailed (.html or .pdf).
+        recipient_email (str): Email address of the recipient, or several addresses separated by commas.
+
     Returns:
-        dict: A dictionary containing status information.
+        dict: A dictionary containing status information with the following structure:
+            {"status": "success" | "partial" | "error", "message": str,
+             "delivered": list[str], "failed": {address: reason}, "attempts": int, "elapsed_seconds": float}
     """
-    
-    
-    # 1. 读取本地 HTML 文件
-    html_file_path = f"{report_path}"
+    from .mailer import MailJob, get_mail_queue
+
+    if not os.path.exists(report_path):
+        return {"status": "error", "message": f"Report file not found: {report_path}"}
+
+    recipients = [r.strip() for r in recipient_email.split(",") if r.strip()]
+    if not recipients:
+        return {"status": "error", "message": "recipient_email must contain at least one address"}
+
     report_name = os.path.basename(report_path)
-    with open(html_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-
-    # 2. 构造邮件内容
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = f'{report_name}'         # 邮件主题
-    msg['From'] = 'sender@example.com'    # 发件人地址
-    msg['To'] = recipient_email   # 收件人地址，可以用逗号分隔多个
-
-    # 将 HTML 内容封装为 MIMEText，指定 subtype='html'
-    html_part = MIMEText(html_content, 'html', 'utf-8')
-    msg.attach(html_part)
-
-    # 3. 通过 SMTP 发送邮件
-    smtp_server = 'smtp.example.com'  # SMTP 服务器地址，例如 smtp.gmail.com
-    smtp_port = 587                   # SMTP 端口（若使用 STARTTLS，一般是 587；SSL/TLS 一般是 465）
-    smtp_user = 'sender@example.com'  # SMTP 登录用户名（通常就是发件人邮箱地址）
-    smtp_password = 'your_password'   # SMTP 登录密码（注意有的邮箱需要开“SMTP/IMAP 服务”并用授权码）
-
-    server = None
+    if report_path.lower().endswith((".html", ".htm")):
+        job = MailJob(subject=report_name, recipients=recipients, body_path=report_path)
+    else:
+        job = MailJob(
+            subject=report_name,
+            recipients=recipients,
+            html_body=f"<p>附件为研究报告 {report_name}，请查收。</p>",
+            attachments=[report_path],
+        )
+
     try:
-        # 建立到 SMTP 服务器的连接（这里以 STARTTLS 模式为例）
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.ehlo()
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(msg['From'], msg['To'].split(','), msg.as_string())
-        print("邮件发送成功！")
+        result = get_mail_queue().send(job).to_dict()
     except Exception as e:
-        print("发送邮件时发生异常：", e)
-    finally:
-        if server:
-            server.quit()
-
+        return {"status": "error", "message": f"Error occurred while emailing: {str(e)}"}
 
-    return {
-        "status": "success",
-        "message": f"Report {report_name} has been emailed to {recipient_email}."
-    }
+    if result["status"] == "success":
+        result["message"] = f"Report {report_name} has been emailed to {len(result['delivered'])} recipient(s)."
+    else:
+        result["message"] = f"Report {report_name} could not be delivered to {len(result['failed'])} recipient(s)."
+    return result
 
 
 
+@traced()
 def schedule_email_report(report_path: str, recipient_email: str, schedule_time: str) -> dict:
     """
     Schedules an email to be sent at a specific time.
@@ -264,7 +300,9 @@ def schedule_email_report(report_path: str, recipient_email: str, schedule_time:
     Returns:
         dict: A dictionary containing status information.
     """
-    
+    import time
+    import schedule
+
     def job():
         email_report(report_path, recipient_email)
     
@@ -0,0 +1,302 @@
+"""
+OpenTelemetry tracing for report runs.
+
+google-adk 已为 invocation、agent_run、call_llm、tool_call 创建 span，本模块补充：
+- traced(): 包装工具函数与 agent 回调，记录 ticker、返回行数（rows）、payload 字节数
+- upstream_span(): 包装上游调用（AkShare、搜索、SMTP）
+- annotate(): 在当前 span 上记录缓存命中等属性
+- setup_tracing(): 按 TRACE_EXPORTER 安装 file（JSON lines）或 console 导出器
+- critical_path(): 从导出的 JSON lines 中找出一次运行的关键路径
+
+    python -m stock_analysis_agent.tracing logs/spans.jsonl
+"""
+import argparse
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Sequence
+
+from opentelemetry import trace
+
+from .config import TRACE_EXPORTER, TRACE_PATH
+from .metrics import TOOL_LATENCY, TOOL_ERRORS, UPSTREAM_LATENCY, UPSTREAM_ERRORS
+
+
+tracer = trace.get_tracer("equianalytica")
+
+# tool/callback argument names that carry the stock code
+_TICKER_ARGS = ("provided_ticker", "symbol", "stock", "ticker")
+
+
+def payload_bytes(value: Any) -> int:
+    """Size of `value` as the JSON the model would receive."""
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def result_rows(value: Any) -> int | None:
+    """Rows in a tool result: its "data" list/dict, a list, or a date-keyed dict."""
+    if isinstance(value, dict):
+        if isinstance(value.get("data"), (list, dict)):
+            return len(value["data"])
+        if "status" in value or "error" in value:
+            return None
+        return len(value)
+    if isinstance(value, list):
+        return len(value)
+    return None
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes (e.g. cache_hit=True) on the current span, if it is recording."""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+
+def _record_result(span: trace.Span, result: Any) -> None:
+    if result is None or not span.is_recording():
+        return
+    rows = result_rows(result)
+    if rows is not None:
+        span.set_attribute("rows", rows)
+    span.set_attribute("payload.bytes", payload_bytes(result))
+    if _failed(result):
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(result.get("error_message", ""))[:200]))
+
+
+def _failed(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def _start_attributes(kind: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> dict:
+    bound = signature.bind_partial(*args, **kwargs).arguments
+    attributes: dict[str, Any] = {"kind": kind}
+    for name in _TICKER_ARGS:
+        if isinstance(bound.get(name), str):
+            attributes["ticker"] = bound[name]
+            break
+    callback_context = bound.get("callback_context")
+    if callback_context is not None:
+        attributes["agent"] = callback_context.agent_name
+    return attributes
+
+
+def traced(kind: str = "tool") -> Callable[[Callable], Callable]:
+    """Run the decorated tool or agent callback (sync or async) inside a "<kind> <name>" span.
+
+    Latency and errors also go to the equi_tool_* metrics. The wrapper keeps the
+    function's name, docstring and signature, so ADK builds the same FunctionTool
+    declaration from it.
+    """
+    def decorate(func: Callable) -> Callable:
+        name = f"{kind} {func.__name__}"
+        signature = inspect.signature(func)
+
+        def observe(start: float, failed: bool) -> None:
+            TOOL_LATENCY.observe(time.perf_counter() - start, tool=func.__name__)
+            if failed:
+                TOOL_ERRORS.inc(tool=func.__name__)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start, failed = time.perf_counter(), True
+                try:
+                    with tracer.start_as_current_span(
+                        name, attributes=_start_attributes(kind, signature, args, kwargs)
+                    ) as span:
+                        result = await func(*args, **kwargs)
+                        _record_result(span, result)
+                        failed = _failed(result)
+                        return result
+                finally:
+                    observe(start, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start, failed = time.perf_counter(), True
+            try:
+                with tracer.start_as_current_span(
+                    name, attributes=_start_attributes(kind, signature, args, kwargs)
+                ) as span:
+                    result = func(*args, **kwargs)
+                    _record_result(span, result)
+                    failed = _failed(result)
+                    return result
+            finally:
+                observe(start, failed)
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def upstream_span(system: str, operation: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Span around one call to an upstream service (akshare, google_search, smtp, ...).
+
+    Latency and errors also go to the equi_upstream_* metrics.
+    """
+    attributes = {k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+    for name in _TICKER_ARGS:
+        if isinstance(attributes.get(name), str):
+            attributes.setdefault("ticker", attributes[name])
+            break
+    start = time.perf_counter()
+    try:
+        with tracer.start_as_current_span(
+            f"upstream {system}.{operation}",
+            kind=trace.SpanKind.CLIENT,
+            attributes={"kind": "upstream", "upstream.system": system, **attributes},
+        ) as span:
+            yield span
+    except BaseException:
+        UPSTREAM_ERRORS.inc(system=system, operation=operation)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, system=system, operation=operation)
+
+
+# --- export ---
+
+class JsonLinesSpanExporter:
+    """SpanExporter appending one JSON object per finished span to `path`."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence) -> Any:
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        lines = [json.dumps(span_to_dict(span), ensure_ascii=False, default=str) for span in spans]
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def span_to_dict(span) -> dict:
+    return {
+        "name": span.name,
+        "trace_id": format(span.context.trace_id, "032x"),
+        "span_id": format(span.context.span_id, "016x"),
+        "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "start": span.start_time,
+        "end": span.end_time,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+_configured = False
+
+
+def setup_tracing(exporter: str = TRACE_EXPORTER, path: str = TRACE_PATH) -> None:
+    """Install the configured exporter ("file" or "console"); a no-op when `exporter` is empty.
+
+    If a TracerProvider is already installed (e.g. by `adk web --trace_to_cloud`),
+    the exporter is added to it instead of replacing it.
+    """
+    global _configured
+    if not exporter or _configured:
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    span_exporter = JsonLinesSpanExporter(path) if exporter == "file" else ConsoleSpanExporter()
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider(resource=Resource.create({"service.name": "equianalytica"}))
+        trace.set_tracer_provider(provider)
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _configured = True
+
+
+# --- analysis ---
+
+def load_spans(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def critical_path(spans: list[dict], trace_id: str | None = None) -> list[tuple[int, dict]]:
+    """(depth, span) along the critical path of one trace (default: the longest one).
+
+    Starting at the root, each span's critical children are found walking back from
+    its end: the child that finished last, then the child that finished last before
+    that one started, and so on.
+    """
+    if trace_id is None:
+        roots = [s for s in spans if s["parent_id"] is None]
+        if not roots:
+            return []
+        trace_id = max(roots, key=lambda s: s["end"] - s["start"])["trace_id"]
+    spans = [s for s in spans if s["trace_id"] == trace_id]
+    ids = {s["span_id"] for s in spans}
+    children: dict[str | None, list[dict]] = {}
+    for s in spans:
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    path: list[tuple[int, dict]] = []
+
+    def walk(span: dict, depth: int) -> None:
+        path.append((depth, span))
+        chain, cursor = [], span["end"]
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: -s["end"]):
+            if child["end"] <= cursor:
+                chain.append(child)
+                cursor = child["start"]
+        for child in reversed(chain):
+            walk(child, depth + 1)
+
+    for root in sorted(children.get(None, []), key=lambda s: s["start"]):
+        walk(root, 0)
+    return path
+
+
+def format_critical_path(path: list[tuple[int, dict]]) -> str:
+    if not path:
+        return "no spans"
+    total = max(s["end"] - s["start"] for depth, s in path if depth == 0) or 1
+    lines = []
+    for i, (depth, span) in enumerate(path):
+        duration = span["end"] - span["start"]
+        on_path_children = 0
+        for d, child in path[i + 1:]:
+            if d <= depth:
+                break
+            if d == depth + 1:
+                on_path_children += child["end"] - child["start"]
+        shown = {k: v for k, v in span["attributes"].items()
+                 if k in ("ticker", "rows", "payload.bytes", "cache_hit", "agent")}
+        lines.append(
+            f"{'  ' * depth}{span['name']:<{max(1, 48 - 2 * depth)}} {duration / 1e9:8.2f}s "
+            f"{duration / total:6.1%}  self {(duration - on_path_children) / 1e9:7.2f}s"
+            + (f"  {shown}" if shown else "")
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print the critical path of a traced run.")
+    parser.add_argument("path", nargs="?", default=TRACE_PATH, help="spans exported with TRACE_EXPORTER=file")
+    parser.add_argument("--trace", help="trace id (default: the longest trace in the file)")
+    args = parser.parse_args()
+    print(format_critical_path(critical_path(load_spans(args.path), args.trace)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Gateway for upstream data calls.
+
+工具函数不再直接调用 ak.xxx()，而是通过 call_akshare("xxx", ...)，
+这样每次上游请求都有一个 tracing span（行数、数据量），akshare 也只在第一次调用时导入。
+
+AKSHARE_MODE 控制数据来源：
+- live：直接请求 AkShare（默认）
+- record：请求 AkShare，并把返回的 DataFrame 压缩保存到 AKSHARE_FIXTURE_DIR
+- replay：不联网、不导入 akshare，从 fixture 读取，并按 AKSHARE_REPLAY_LATENCY 注入延迟
+fixture 以函数名 + 参数命名，AKSHARE_FIXTURE_IGNORE_ARGS 中随日期变化的参数（如 end_date）不参与命名，
+所以录制一次即可在之后任何一天回放。
+"""
+import os
+import re
+import time
+from typing import Any
+
+from .config import AKSHARE_MODE, AKSHARE_FIXTURE_DIR, AKSHARE_FIXTURE_IGNORE_ARGS, AKSHARE_REPLAY_LATENCY
+from .tracing import upstream_span
+
+
+class FixtureNotFound(LookupError):
+    """Replay mode was asked for a call that was never recorded."""
+
+
+def fixture_path(function: str, kwargs: dict[str, Any], fixture_dir: str | None = None) -> str:
+    """<fixture_dir>/<function>/<arg=value,...>.pkl.gz for one ak.<function>(**kwargs) call."""
+    ignored = AKSHARE_FIXTURE_IGNORE_ARGS.get(function, ())
+    parts = [f"{k}={v}" for k, v in sorted(kwargs.items()) if k not in ignored]
+    name = re.sub(r"[^\w.=,-]", "_", ",".join(parts)) or "_"
+    return os.path.join(fixture_dir or AKSHARE_FIXTURE_DIR, function, f"{name}.pkl.gz")
+
+
+def save_fixture(function: str, kwargs: dict[str, Any], df, fixture_dir: str | None = None) -> str:
+    """Write `df` as the recorded result of ak.<function>(**kwargs); returns the fixture path."""
+    path = fixture_path(function, kwargs, fixture_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    df.to_pickle(tmp, compression="gzip")
+    os.replace(tmp, path)
+    return path
+
+
+def load_fixture(function: str, kwargs: dict[str, Any], fixture_dir: str | None = None):
+    import pandas as pd
+
+    path = fixture_path(function, kwargs, fixture_dir)
+    if not os.path.exists(path):
+        raise FixtureNotFound(f"no recorded akshare fixture for {function}({kwargs}) at {path}")
+    return pd.read_pickle(path, compression="gzip")
+
+
+def call_akshare(function: str, **kwargs: Any):
+    """ak.<function>(**kwargs), traced as "upstream akshare.<function>"; recorded or replayed per AKSHARE_MODE."""
+    with upstream_span("akshare", function, mode=AKSHARE_MODE, **kwargs) as span:
+        if AKSHARE_MODE == "replay":
+            latency = AKSHARE_REPLAY_LATENCY.get(function, AKSHARE_REPLAY_LATENCY["default"])
+            if latency:
+                time.sleep(latency)
+            df = load_fixture(function, kwargs)
+        else:
+            import akshare as ak
+
+            df = getattr(ak, function)(**kwargs)
+            if AKSHARE_MODE == "record" and df is not None:
+                save_fixture(function, kwargs, df)
+        if span.is_recording() and df is not None:
+            span.set_attribute("rows", len(df))
+            span.set_attribute("payload.bytes", int(df.memory_usage(deep=True).sum()))
+        return df
@@ -0,0 +1,141 @@
+"""
+Deterministic workflow coordinator.
+
+coordinator_agent (LlmAgent) 的工作是一个固定流程：获取时间 → 识别股票代码 → 调用 analysis_agent → combine_reports，
+每一步都要一次模型往返。WorkflowCoordinator 以代码直接执行这些步骤，只有在无法通过 A 股代码表识别用户输入时，
+才调用 google_search_agent 由模型判断对应的股票。
+"""
+import asyncio
+import functools
+import re
+import time
+import uuid
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from typing_extensions import override
+
+from .config import REPORT_DEADLINE_SECONDS
+from .deadlines import REPORT_DEADLINE_KEY
+from .tools import get_current_time, render_report, state_sections
+from .upstream import call_akshare
+
+
+_TICKER_RE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+
+
+@functools.lru_cache(maxsize=1)
+def a_share_names() -> dict[str, str]:
+    """A-share code -> short name, fetched once per process."""
+    df = call_akshare("stock_info_a_code_name")
+    return dict(zip(df["code"].astype(str), df["name"].astype(str)))
+
+
+def lookup_stock(text: str) -> tuple[str, str] | None:
+    """Resolve a 6-digit code or a company short name in `text` without an LLM."""
+    try:
+        names = a_share_names()
+    except Exception:
+        names = {}
+    if match := _TICKER_RE.search(text):
+        code = match.group(1)
+        return code, names.get(code, code)
+    compact = re.sub(r"\s+", "", text)
+    # 最长匹配优先，避免 “中国平安” 命中 “平安”
+    for code, name in sorted(names.items(), key=lambda kv: -len(kv[1])):
+        if name and name.replace(" ", "") in compact:
+            return code, name
+    return None
+
+
+async def ask_agent(agent: BaseAgent, text: str) -> str:
+    """Run `agent` once on `text` in a throwaway session and return its final text."""
+    runner = InMemoryRunner(agent=agent, app_name=agent.name)
+    session = await runner.session_service.create_session(
+        app_name=agent.name, user_id="workflow", session_id=uuid.uuid4().hex
+    )
+    final = ""
+    async for event in runner.run_async(
+        user_id="workflow",
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+    ):
+        if event.content and event.content.parts:
+            final = "".join(p.text for p in event.content.parts if p.text) or final
+    return final
+
+
+def _text_event(ctx: InvocationContext, author: str, text: str, state_delta: dict | None = None) -> Event:
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=author,
+        branch=ctx.branch,
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+class WorkflowCoordinator(BaseAgent):
+    """Runs get_current_time → ticker resolution → analysis pipeline → combine_reports in code.
+
+    sub_agents[0] is the analysis pipeline. lookup_agent (an LlmAgent with Google
+    Search) is only called when the user input cannot be resolved from the A-share
+    code table.
+    """
+
+    lookup_agent: Optional[BaseAgent] = None
+    output_key: str = "root_agent_output"
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        analysis_agent = self.sub_agents[0]
+        user_text = ""
+        if ctx.user_content and ctx.user_content.parts:
+            user_text = " ".join(p.text for p in ctx.user_content.parts if p.text)
+
+        # 1. 当前时间
+        now = get_current_time()["current date and time"]
+
+        # 2. 识别股票代码与公司名称
+        resolved = await asyncio.to_thread(lookup_stock, user_text)
+        if resolved is None and self.lookup_agent is not None:
+            answer = await ask_agent(
+                self.lookup_agent,
+                f"找出以下输入对应的 A 股 6 位股票代码与公司简称，仅按 “代码,简称” 格式回答：{user_text}",
+            )
+            if match := _TICKER_RE.search(answer):
+                name = answer[match.end():].strip(" ,，:：\n") or match.group(1)
+                resolved = match.group(1), name.split()[0]
+        if resolved is None:
+            yield _text_event(ctx, self.name, "未能从输入中识别出股票代码或公司名称，请提供 6 位 A 股代码。")
+            return
+        ticker, company_name = resolved
+
+        yield _text_event(
+            ctx, self.name,
+            f"provided_ticker: {ticker}\ncompany_name: {company_name}\n{now}",
+            state_delta={
+                "provided_ticker": ticker,
+                "company_name": company_name,
+                REPORT_DEADLINE_KEY: time.time() + REPORT_DEADLINE_SECONDS,
+            },
+        )
+
+        # 3. 并行分析
+        async for event in analysis_agent.run_async(ctx):
+            yield event
+
+        # 4. 汇总报告（PDF 渲染较慢，放到线程中执行）
+        result = await asyncio.to_thread(render_report, ticker, company_name, *state_sections(ctx.session.state))
+        if result.get("status") == "success":
+            summary = f"{company_name}（{ticker}）研究报告已生成：{result['report_path']}"
+            if result.get("degraded_sections"):
+                summary += "；降级章节：" + "、".join(result["degraded_sections"])
+        else:
+            summary = f"报告汇总失败：{result.get('error_message')}"
+        yield _text_event(ctx, self.name, summary,
+                          state_delta={"combine_reports_result": result, self.output_key: summary})